@@ -0,0 +1,64 @@
+# CMAKE generated file: DO NOT EDIT!
+# Generated by "Unix Makefiles" Generator, CMake Version 3.25
+
+# The generator used is:
+set(CMAKE_DEPENDS_GENERATOR "Unix Makefiles")
+
+# The top level Makefile was generated from the following files:
+set(CMAKE_MAKEFILE_DEPENDS
+  "CMakeCache.txt"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/nanobind/cmake/nanobind-config-version.cmake"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/nanobind/cmake/nanobind-config.cmake"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/scikit_build_core/resources/find_python/FindPackageHandleStandardArgs.cmake"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/scikit_build_core/resources/find_python/FindPackageMessage.cmake"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/scikit_build_core/resources/find_python/FindPython.cmake"
+  "/root/.pyenv/versions/3.11.7/lib/python3.11/site-packages/scikit_build_core/resources/find_python/FindPython/Support.cmake"
+  "/root/package/CMakeLists.txt"
+  "CMakeFiles/3.25.1/CMakeCXXCompiler.cmake"
+  "CMakeFiles/3.25.1/CMakeSystem.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeCXXInformation.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeCheckCompilerFlagCommonPatterns.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeCommonLanguageInclude.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeGenericSystem.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeInitializeConfigs.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeLanguageInformation.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeParseImplicitLinkInfo.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeSystemSpecificInformation.cmake"
+  "/usr/share/cmake-3.25/Modules/CMakeSystemSpecificInitialize.cmake"
+  "/usr/share/cmake-3.25/Modules/CheckCXXCompilerFlag.cmake"
+  "/usr/share/cmake-3.25/Modules/CheckCXXSourceCompiles.cmake"
+  "/usr/share/cmake-3.25/Modules/CheckIncludeFileCXX.cmake"
+  "/usr/share/cmake-3.25/Modules/CheckLibraryExists.cmake"
+  "/usr/share/cmake-3.25/Modules/Compiler/CMakeCommonCompilerMacros.cmake"
+  "/usr/share/cmake-3.25/Modules/Compiler/GNU-CXX.cmake"
+  "/usr/share/cmake-3.25/Modules/Compiler/GNU.cmake"
+  "/usr/share/cmake-3.25/Modules/FindOpenMP.cmake"
+  "/usr/share/cmake-3.25/Modules/FindPackageHandleStandardArgs.cmake"
+  "/usr/share/cmake-3.25/Modules/FindPackageMessage.cmake"
+  "/usr/share/cmake-3.25/Modules/FindThreads.cmake"
+  "/usr/share/cmake-3.25/Modules/Internal/CheckCompilerFlag.cmake"
+  "/usr/share/cmake-3.25/Modules/Internal/CheckFlagCommonConfig.cmake"
+  "/usr/share/cmake-3.25/Modules/Internal/CheckSourceCompiles.cmake"
+  "/usr/share/cmake-3.25/Modules/Platform/Linux-GNU-CXX.cmake"
+  "/usr/share/cmake-3.25/Modules/Platform/Linux-GNU.cmake"
+  "/usr/share/cmake-3.25/Modules/Platform/Linux.cmake"
+  "/usr/share/cmake-3.25/Modules/Platform/UnixPaths.cmake"
+  )
+
+# The corresponding makefile is:
+set(CMAKE_MAKEFILE_OUTPUTS
+  "Makefile"
+  "CMakeFiles/cmake.check_cache"
+  )
+
+# Byproducts of CMake generate step:
+set(CMAKE_MAKEFILE_PRODUCTS
+  "CMakeFiles/CMakeDirectoryInformation.cmake"
+  )
+
+# Dependency information for all targets:
+set(CMAKE_DEPEND_INFO_FILES
+  "CMakeFiles/_simplify.dir/DependInfo.cmake"
+  "CMakeFiles/nanobind-static.dir/DependInfo.cmake"
+  "CMakeFiles/_replay.dir/DependInfo.cmake"
+  )
@@ -0,0 +1,11 @@
+file(REMOVE_RECURSE
+  "CMakeFiles/_replay.dir/fast_simplification/_replay.cpp.o"
+  "CMakeFiles/_replay.dir/fast_simplification/_replay.cpp.o.d"
+  "_replay.cpython-311-x86_64-linux-gnu.so"
+  "_replay.pdb"
+)
+
+# Per-language clean rules from dependency scanning.
+foreach(lang CXX)
+  include(CMakeFiles/_replay.dir/cmake_clean_${lang}.cmake OPTIONAL)
+endforeach()
@@ -0,0 +1,11 @@
+file(REMOVE_RECURSE
+  "CMakeFiles/_simplify.dir/fast_simplification/_simplify.cpp.o"
+  "CMakeFiles/_simplify.dir/fast_simplification/_simplify.cpp.o.d"
+  "_simplify.cpython-311-x86_64-linux-gnu.so"
+  "_simplify.pdb"
+)
+
+# Per-language clean rules from dependency scanning.
+foreach(lang CXX)
+  include(CMakeFiles/_simplify.dir/cmake_clean_${lang}.cmake OPTIONAL)
+endforeach()
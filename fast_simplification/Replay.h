@@ -12,36 +12,64 @@ namespace Replay{
 	struct Triangle { int v[3];double err[4];int deleted,dirty,attr;vec3f n;vec3f uvs[3];int material; };
 	struct Vertex { vec3f p;int tstart,tcount;SymetricMatrix q;int border;};
 	struct Ref { int tid,tvertex; };
+
+	// Replay state for a single mesh. Every instance owns its own buffers,
+	// so independent replays can run concurrently from different threads as
+	// long as each thread uses its own Replayer.
+	class Replayer
+	{
+	public:
 	std::vector<Triangle> triangles;
 	std::vector<Vertex> vertices;
 	std::vector<Ref> refs;
     std::string mtllib;
     std::vector<std::string> materials;
-    std::vector<std::vector<int>> collapses;
+    std::vector<int> collapses;  // flat (i0, i1) pairs
+    bool single_precision=false;  // points were loaded from float32
+
+    void replay_simplification()
+    {
+        begin_replay();
+        replay_collapses(0, collapses.size() / 2);
+
+        // remove deleted vertices
+        int dst=0;
+		loopi(0,vertices.size())
+		if(vertices[i].tcount)
+		{
+			vertices[i].tstart=dst;
+			vertices[dst].p=vertices[i].p;
+			dst++;
+		}
 
-    // Helper functions
-    double vertex_error(SymetricMatrix q, double x, double y, double z);
-	double calculate_error(int id_v1, int id_v2, vec3f &p_result);
-    void initialize_quadrics();
+		vertices.resize(dst);
 
+    }
 
-    void replay_simplification()
+    // Compute the quadrics of the loaded mesh so that collapses can be
+    // replayed with replay_collapses()
+    void begin_replay()
     {
     	// init
 		for(int i=0; i<vertices.size(); i++)
         {
             vertices[i].tcount=1;
         }
+        initialize_quadrics();
+    }
 
+    // Apply the collapses [begin, end) to the vertices. Collapsed vertices
+    // are only flagged (tcount=0), so this can be called repeatedly to
+    // advance the replay.
+    void replay_collapses(int begin, int end)
+    {
 		// main iteration loop
         int i0,i1;
-        int n_collapses = collapses.size();
-        initialize_quadrics();
 
-        for (int iteration=0; iteration < n_collapses; iteration++)
+        for (int iteration=begin; iteration < end; iteration++)
         {
-            i0 = collapses[iteration][0];
-            i1 = collapses[iteration][1];
+            i0 = collapses[2*iteration];
+            i1 = collapses[2*iteration+1];
 
             Vertex &v0 = vertices[i0];
             Vertex &v1 = vertices[i1];
@@ -58,19 +86,6 @@ namespace Replay{
             v1.tcount=0; // mark vertex as deleted (will be removed later)
 
         }
-
-        // remove deleted vertices
-        int dst=0;
-		loopi(0,vertices.size())
-		if(vertices[i].tcount)
-		{
-			vertices[i].tstart=dst;
-			vertices[dst].p=vertices[i].p;
-			dst++;
-		}
-
-		vertices.resize(dst);
-
     }
 
 
@@ -130,40 +145,7 @@ namespace Replay{
 		}
 
 		// Initialize vertices.borders
-		std::vector<int> vcount,vids;
-
-		loopi(0,vertices.size())
-				vertices[i].border=0;
-
-			loopi(0,vertices.size())
-			{
-				Vertex &v=vertices[i];
-				vcount.clear();
-				vids.clear();
-				loopj(0,v.tcount)
-				{
-					int k=refs[v.tstart+j].tid;
-					Triangle &t=triangles[k];
-					loopk(0,3)
-					{
-						int ofs=0,id=t.v[k];
-						while(ofs<vcount.size())
-						{
-							if(vids[ofs]==id)break;
-							ofs++;
-						}
-						if(ofs==vcount.size())
-						{
-							vcount.push_back(1);
-							vids.push_back(id);
-						}
-						else
-							vcount[ofs]++;
-					}
-				}
-				loopj(0,vcount.size()) if(vcount[j]==1)
-					vertices[vids[j]].border=1;
-			}
+		Simplify::identify_borders(vertices,triangles,refs,1);
 	}
 
 
@@ -213,7 +195,7 @@ namespace Replay{
 		return error;
 	}
 
-	char *trimwhitespace(char *str)
+	static char *trimwhitespace(char *str)
 	{
 		char *end;
 
@@ -436,5 +418,6 @@ namespace Replay{
 		}
 		fclose(file);
 	}
+	}; // class Replayer
 
 }
\ No newline at end of file
@@ -21,13 +21,22 @@
 //#include <float.h>
 #include <stdio.h>
 #include <stdlib.h>
+#include <array>
 #include <map>
+#include <algorithm>
+#include <queue>
 #include <vector>
 #include <utility> // std::pair
 #include <string>
+#include <atomic>
+#include <chrono>
+#include <functional>
 #include <math.h>
 #include <stdint.h>
 #include <float.h> //FLT_EPSILON, DBL_EPSILON
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 #define loopi(start_l,end_l) for ( int i=start_l;i<end_l;++i )
 #define loopi(start_l,end_l) for ( int i=start_l;i<end_l;++i )
@@ -317,26 +326,230 @@ namespace Simplify
 		TEXCOORD = 4,
 		COLOR = 8
 	};
-	struct Triangle { int v[3];double err[4];int deleted,dirty,attr;vec3f n;vec3f uvs[3];int material; };
+	// Flags are packed into bit fields, the smallest edge error is computed
+	// on the fly and the texture coordinates and material ids live in
+	// optional arrays of the Simplifier, so a triangle takes 64 bytes
+	// instead of 176 and a reference 4 bytes instead of 8.
+	struct Triangle { int v[3];unsigned deleted:1,dirty:1,attr:4;double err[3];vec3f n; };
 	struct Vertex { vec3f p;int tstart,tcount;SymetricMatrix q;int border;};
-	struct Ref { int tid,tvertex; };
+	struct Ref { unsigned tid:30,tvertex:2; };
+
+	// Triangle ids must fit in the 30 bits of Ref::tid
+	const int MAX_TRIANGLES=(1<<30)-1;
+
+	// Candidate edge collapse i0 <- i1 in the heap engine. The stamps record
+	// the version of both vertices when the cost was computed; an entry whose
+	// stamps no longer match is stale and skipped (lazy invalidation).
+	struct HeapEdge {
+		double err; int i0,i1; int stamp0,stamp1;
+		bool operator>(const HeapEdge &e) const
+		{
+			if(err!=e.err) return err>e.err;
+			if(i0!=e.i0) return i0>e.i0;
+			return i1>e.i1;
+		}
+	};
+
+	// Identify boundary : vertices[].border=0,1
+	// A vertex is on the border when one of its edges is not shared by
+	// exactly two triangles: open edges, used by a single triangle, and
+	// non-manifold edges, used by three or more. The neighbours reached
+	// through the references of a vertex are sorted so that every edge
+	// becomes one run of equal ids, as long as the number of triangles
+	// using it, which costs O(k log k) for a vertex of valence k instead of
+	// the O(k^2) of a linear search, and stays cheap on high valence fans.
+	// Each vertex only writes its own flag. Shared by the Simplify and
+	// Replay cores.
+	template <class VertexT, class TriangleT, class RefT>
+	void identify_borders(std::vector<VertexT> &vertices,
+		const std::vector<TriangleT> &triangles, const std::vector<RefT> &refs,
+		int n_threads)
+	{
+		int nv=vertices.size();
+#pragma omp parallel num_threads(n_threads)
+		{
+			std::vector<int> ids;
+#pragma omp for
+			for(int i=0;i<nv;i++)
+			{
+				VertexT &v=vertices[i];
+				ids.clear();
+				loopj(0,v.tcount)
+				{
+					const RefT &r=refs[v.tstart+j];
+					const TriangleT &t=triangles[r.tid];
+					ids.push_back(t.v[(r.tvertex+1)%3]);
+					ids.push_back(t.v[(r.tvertex+2)%3]);
+				}
+				std::sort(ids.begin(),ids.end());
+				v.border=0;
+				for(size_t a=0,b;a<ids.size();a=b)
+				{
+					for(b=a+1;b<ids.size() && ids[b]==ids[a];b++);
+					if(b-a!=2) { v.border=1; break; }
+				}
+			}
+		}
+	}
+
+	// Flag another thread sets to stop a running simplification
+	struct CancelToken { std::atomic<bool> cancelled{false}; };
+
+	// Counters and phase times (in seconds) of the runs of a Simplifier.
+	// A candidate is an edge an engine tried to collapse: it is collapsed,
+	// or rejected because it touches a border or locked vertex, or because
+	// the collapse would flip a triangle. Each iteration records its error
+	// bound: the threshold of the threshold engine, the largest error
+	// collapsed by a heap pass and DBL_EPSILON for the lossless passes.
+	// The heap engine counts a border edge every time it skips queueing
+	// it. Load and export are timed by the bindings.
+	struct Stats
+	{
+		int iterations=0;
+		std::vector<double> thresholds;
+		int64_t candidates=0,collapsed=0,rejected_border=0,rejected_flipped=0;
+		double time_load=0,time_update_mesh=0,time_collapse=0,time_compact=0,time_export=0;
+	};
+
+	// Adds the wall-clock time of its scope to one of the phase times
+	struct ScopedTimer
+	{
+		double &total;
+		std::chrono::steady_clock::time_point start=std::chrono::steady_clock::now();
+		ScopedTimer(double &t) : total(t) {}
+		~ScopedTimer()
+		{
+			total+=std::chrono::duration<double>(std::chrono::steady_clock::now()-start).count();
+		}
+	};
+
+	// Time of an engine run spent outside update_mesh() and compact_mesh()
+	struct CollapseTimer
+	{
+		Stats &stats;
+		ScopedTimer timer;
+		double excluded;
+		CollapseTimer(Stats &s) : stats(s), timer(s.time_collapse),
+			excluded(s.time_update_mesh+s.time_compact) {}
+		~CollapseTimer() { stats.time_collapse-=stats.time_update_mesh+stats.time_compact-excluded; }
+	};
+
+	// Decimation state for a single mesh. Every instance owns its own
+	// buffers, so independent meshes can be simplified concurrently from
+	// different threads as long as each thread uses its own Simplifier.
+	class Simplifier
+	{
+	public:
 	std::vector<Triangle> triangles;
 	std::vector<Vertex> vertices;
 	std::vector<Ref> refs;
     std::string mtllib;
     std::vector<std::string> materials;
 
-	std::vector<std::vector<int>> collapses;
+	// Per-triangle texture coordinates and material ids, parallel to
+	// triangles. Only filled by load_obj when the file provides them.
+	std::vector<std::array<vec3f,3> > triangle_uvs;
+	std::vector<int> triangle_materials;
+
+	// Optional id of every triangle, parallel to triangles and carried
+	// through compaction; the partitions store the global triangle index
+	// to merge their results back in the original order.
+	std::vector<int> triangle_ids;
+
+	// Collapse history as a flat list of (i0, i1) pairs: vertex i1 was
+	// merged into vertex i0
+	std::vector<int> collapses;
+
+	// When set, the position vertex i0 is moved to by every collapse is
+	// recorded as well, as flat (x, y, z) triplets parallel to collapses
+	bool record_positions=false;
+	std::vector<double> collapse_positions;
+
+	// Set when the points were loaded from float32, so the results are
+	// exported as float32 as well
+	bool single_precision=false;
+
+	// Edges whose quadric error is above max_error are never collapsed;
+	// simplify_mesh() and simplify_mesh_heap() stop once every edge left
+	// is more expensive, even if target_count is not reached
+	double max_error=DBL_MAX;
+
+	// Threads used by the OpenMP setup phases (quadric init, edge errors,
+	// reference build and compaction); 0 uses the OpenMP default. Results
+	// do not depend on this value.
+	int n_threads=1;
+
+	// Vertices that may not be collapsed, e.g. the seams between partitions
+	// decimated independently; empty when nothing is locked.
+	std::vector<char> locked;
+
+	// When set, update_mesh(0) keeps the quadrics already stored in the
+	// vertices instead of rebuilding them from the triangle planes.
+	bool keep_quadrics=false;
+
+	// Pre-compaction index of every vertex kept by compact_mesh()
+	std::vector<int> vertex_map;
+
+	// Levels of detail: the first time the live triangle count drops to
+	// lod_targets[k] (in decreasing order), the mesh is stored compacted in
+	// lod_points[k] / lod_faces[k], exactly as compact_mesh() would leave it
+	// had the simplification stopped there, along with the number of
+	// collapses that led to it. Levels that are never reached get the final
+	// mesh.
+	std::vector<int> lod_targets;
+	std::vector<std::vector<double> > lod_points;
+	std::vector<std::vector<int> > lod_faces;
+	std::vector<int> lod_collapses;
+
+	// Cooperative interruption: the collapse loops of every engine stop
+	// once *cancel_token is set or the deadline has passed, checked every
+	// 1024 steps, and the mesh reached so far is compacted as usual along
+	// with the collapses that led to it. interrupted records that an
+	// engine stopped early and stays set, so that later passes stop too.
+	const CancelToken *cancel_token=nullptr;
+	std::chrono::steady_clock::time_point deadline=std::chrono::steady_clock::time_point::max();
+	bool interrupted=false;
+	unsigned stop_ticks=0;
+
+	// Set the deadline to seconds from now
+	void set_time_budget(double seconds)
+	{
+		typedef std::chrono::steady_clock clock;
+		if(seconds>=1e9) { deadline=clock::time_point::max(); return; }
+		deadline=clock::now()+std::chrono::duration_cast<clock::duration>(
+			std::chrono::duration<double>(std::max(seconds,0.0)));
+	}
+
+	bool should_stop()
+	{
+		if(interrupted) return true;
+		if((stop_ticks++ & 1023)!=0) return false;
+		if(cancel_token && cancel_token->cancelled.load(std::memory_order_relaxed))
+			interrupted=true;
+		else if(std::chrono::steady_clock::now()>=deadline)
+			interrupted=true;
+		return interrupted;
+	}
+
+	Stats stats;
 
-	// Helper functions
+	// Called with the number of collapses and of live triangles every
+	// progress_interval collapses; may throw to abort the simplification.
+	// progress_base collapses made beforehand, e.g. by the partitions, are
+	// added to the count.
+	std::function<void(int,int)> progress;
+	int progress_interval=1;
+	int progress_base=0;
+
+	int omp_threads() const
+	{
+#ifdef _OPENMP
+		return n_threads>0 ? n_threads : omp_get_max_threads();
+#else
+		return 1;
+#endif
+	}
 
-	double vertex_error(SymetricMatrix q, double x, double y, double z);
-	double calculate_error(int id_v1, int id_v2, vec3f &p_result);
-	bool flipped(vec3f p,int i0,int i1,Vertex &v0,Vertex &v1,std::vector<int> &deleted);
-	void update_uvs(int i0,const Vertex &v,const vec3f &p,std::vector<int> &deleted);
-	void update_triangles(int i0,Vertex &v,std::vector<int> &deleted,int &deleted_triangles);
-	void update_mesh(int iteration);
-	void compact_mesh();
 	//
 	// Main simplification function
 	//
@@ -348,6 +561,7 @@ namespace Simplify
 
 	void simplify_mesh(int target_count, double agressiveness=7, bool verbose=false, bool preserve_border=false)
 	{
+		CollapseTimer timer(stats);
 
 		// init
 		loopi(0,triangles.size())
@@ -361,11 +575,14 @@ namespace Simplify
 		int triangle_count=triangles.size();
 		//int iteration = 0;
 		//loop(iteration,0,100)
-		collapses.clear();
+		reserve_collapses(triangle_count-target_count);
+		snapshot_lods(triangle_count);
 		for (int iteration = 0; iteration < 100; iteration ++)
 		{
 
 			if(triangle_count-deleted_triangles<=target_count)break;
+			if(interrupted)break;
+			int deleted_before=deleted_triangles;
 
 			// update mesh once in a while
 			if(iteration%5==0)
@@ -383,6 +600,10 @@ namespace Simplify
 			// If it does not, try to adjust the 3 parameters
 			//
 			double threshold = 0.000000001*pow(double(iteration+3),agressiveness);
+			bool capped = threshold>=max_error;
+			if(capped) threshold=max_error;
+			stats.iterations++;
+			stats.thresholds.push_back(threshold);
 
 			// target number of triangles reached ? Then break
 			if ((verbose) && (iteration%5==0)) {
@@ -392,8 +613,9 @@ namespace Simplify
 			// remove vertices & mark deleted triangles
 			loopi(0,triangles.size())
 			{
+				if(should_stop()) break;
 				Triangle &t=triangles[i];
-				if(t.err[3]>threshold) continue;
+				if(min(t.err[0],min(t.err[1],t.err[2]))>threshold) continue;
 				if(t.deleted) continue;
 				if(t.dirty) continue;
 
@@ -403,10 +625,16 @@ namespace Simplify
 					int i0=t.v[ j     ]; Vertex &v0 = vertices[i0];
 					int i1=t.v[(j+1)%3]; Vertex &v1 = vertices[i1];
 					// Border check
+					stats.candidates++;
+					bool border_edge;
 					if (preserve_border) {
-						if (v0.border || v1.border) continue;  // keep all open-border vertices
-					} else if (v0.border != v1.border) {
-						continue;  // base behaviour
+						border_edge = v0.border || v1.border;  // keep all open-border vertices
+					} else {
+						border_edge = v0.border != v1.border;  // base behaviour
+					}
+					if (border_edge || is_locked(i0,i1)) {
+						stats.rejected_border++;
+						continue;
 					}
 
 					// Compute vertex to collapse to
@@ -415,9 +643,12 @@ namespace Simplify
 					deleted0.resize(v0.tcount); // normals temporarily
 					deleted1.resize(v1.tcount); // normals temporarily
 					// don't remove if flipped
-					if( flipped(p,i0,i1,v0,v1,deleted0) ) continue;
-
-					if( flipped(p,i1,i0,v1,v0,deleted1) ) continue;
+					if( flipped(p,i0,i1,v0,v1,deleted0) ||
+						flipped(p,i1,i0,v1,v0,deleted1) )
+					{
+						stats.rejected_flipped++;
+						continue;
+					}
 
 					if ( (t.attr & TEXCOORD) == TEXCOORD  )
 					{
@@ -436,7 +667,9 @@ namespace Simplify
 					update_triangles(i0,v1,deleted1,deleted_triangles);
 
 					// record collapse
-					collapses.push_back(std::vector<int>({i0,i1}));
+					record_collapse(i0,i1,p);
+					snapshot_lods(triangle_count-deleted_triangles);
+					report_progress(triangle_count-deleted_triangles);
 
 					int tcount=refs.size()-tstart;
 
@@ -456,46 +689,80 @@ namespace Simplify
 				// done?
 				if(triangle_count-deleted_triangles<=target_count)break;
 			}
+			// once the threshold is capped by max_error, it no longer grows:
+			// stop when a pass finds nothing left to collapse
+			if(capped && deleted_triangles==deleted_before)break;
 		}
 		// clean up mesh
+		finish_lods();
 		compact_mesh();
 
 	} //simplify_mesh()
 
+	//
+	// Lossless simplification
+	//
+	// Collapses every edge whose error is below DBL_EPSILON, pass after
+	// pass, until a pass makes no collapse. Whether an edge can collapse
+	// only depends on the triangles around its two vertices, so a triangle
+	// that failed can only succeed once a collapse touched a vertex of its
+	// one-ring. The first pass visits every triangle; later passes only
+	// visit the triangles around the vertices touched by the previous
+	// collapses. Triangles are visited in index order, and the ones after
+	// the current triangle that a collapse touches join the current pass,
+	// so the collapses are exactly those of a full scan of every pass,
+	// without compacting the mesh in between.
+	//
+
 	void simplify_mesh_lossless(bool verbose=false, bool preserve_border=false)
 	{
+		CollapseTimer timer(stats);
 		// init
 		loopi(0,triangles.size()) triangles[i].deleted=0;
+		update_mesh(0);
 
-		// main iteration loop
+		int nt=triangles.size();
 		int deleted_triangles=0;
 		std::vector<int> deleted0,deleted1;
-		int triangle_count=triangles.size();
-		//int iteration = 0;
-		//loop(iteration,0,100)
+		std::vector<int> work(nt),touched;
+		loopi(0,nt) work[i]=i;
+		std::vector<int> next;
+		std::vector<char> in_next(nt,0),in_pass(nt,0);
+		std::vector<int> stamp(vertices.size(),-1);
+		int n_stamp=0;
+		std::priority_queue<int,std::vector<int>,std::greater<int> > extra;
 		collapses.clear();
-		for (int iteration = 0; iteration < 9999; iteration ++)
+		collapse_positions.clear();
+		for (int iteration = 0; iteration < 9999 && !work.empty(); iteration ++)
 		{
-			// update mesh constantly
-			update_mesh(iteration);
 			// clear dirty flag
-			loopi(0,triangles.size()) triangles[i].dirty=0;
+			for(int i : work) { triangles[i].dirty=0; in_pass[i]=1; }
 			//
 			// All triangles with edges below the threshold will be removed
 			//
-			// The following numbers works well for most models.
-			// If it does not, try to adjust the 3 parameters
-			//
 			double threshold = DBL_EPSILON; //1.0E-3 EPS;
+			stats.iterations++;
+			stats.thresholds.push_back(threshold);
 			if (verbose) {
-				printf("lossless iteration %d\n", iteration);
+				printf("lossless iteration %d - triangles to visit %d\n", iteration, (int)work.size());
 			}
 
 			// remove vertices & mark deleted triangles
-			loopi(0,triangles.size())
+			int n_collapsed=0;
+			size_t pos=0;
+			while(pos<work.size() || !extra.empty())
 			{
+				int i;
+				if(extra.empty() || (pos<work.size() && work[pos]<extra.top()))
+					i=work[pos++];
+				else
+				{
+					i=extra.top(); extra.pop();
+				}
+				in_pass[i]=0;
+				if(should_stop()) break;
 				Triangle &t=triangles[i];
-				if(t.err[3]>threshold) continue;
+				if(min(t.err[0],min(t.err[1],t.err[2]))>threshold) continue;
 				if(t.deleted) continue;
 				if(t.dirty) continue;
 
@@ -505,10 +772,16 @@ namespace Simplify
 					int i1=t.v[(j+1)%3]; Vertex &v1 = vertices[i1];
 
 					// Border check
+					stats.candidates++;
+					bool border_edge;
 					if (preserve_border) {
-						if (v0.border || v1.border) continue;  // keep all open-border vertices
-					} else if (v0.border != v1.border) {
-						continue;  // base behaviour
+						border_edge = v0.border || v1.border;  // keep all open-border vertices
+					} else {
+						border_edge = v0.border != v1.border;  // base behaviour
+					}
+					if (border_edge || is_locked(i0,i1)) {
+						stats.rejected_border++;
+						continue;
 					}
 
 					// Compute vertex to collapse to
@@ -519,8 +792,12 @@ namespace Simplify
 					deleted1.resize(v1.tcount); // normals temporarily
 
 					// don't remove if flipped
-					if( flipped(p,i0,i1,v0,v1,deleted0) ) continue;
-					if( flipped(p,i1,i0,v1,v0,deleted1) ) continue;
+					if( flipped(p,i0,i1,v0,v1,deleted0) ||
+						flipped(p,i1,i0,v1,v0,deleted1) )
+					{
+						stats.rejected_flipped++;
+						continue;
+					}
 
 					if ( (t.attr & TEXCOORD) == TEXCOORD )
 					{
@@ -538,7 +815,8 @@ namespace Simplify
 					update_triangles(i0,v1,deleted1,deleted_triangles);
 
 					// record collapse
-					collapses.push_back(std::vector<int>({i0,i1}));
+					record_collapse(i0,i1,p);
+					report_progress(nt-deleted_triangles);
 
 					int tcount=refs.size()-tstart;
 
@@ -552,20 +830,363 @@ namespace Simplify
 						v0.tstart=tstart;
 
 					v0.tcount=tcount;
+					n_collapsed++;
+
+					// revisit the triangles around the vertices of the
+					// triangles of v0 and v1, deleted ones included: later in
+					// this pass if they come after this one, and in the next
+					// pass in any case
+					touched.clear();
+					for(const Vertex *v : {&v0,&v1}) loopk(0,v->tcount)
+					{
+						const Triangle &n=triangles[refs[v->tstart+k].tid];
+						for(int u : n.v) if(stamp[u]!=n_stamp)
+						{
+							stamp[u]=n_stamp;
+							touched.push_back(u);
+						}
+					}
+					n_stamp++;
+					for(int u : touched) loopk(0,vertices[u].tcount)
+					{
+						int tid=refs[vertices[u].tstart+k].tid;
+						if(triangles[tid].deleted) continue;
+						if(!in_next[tid]) { in_next[tid]=1; next.push_back(tid); }
+						if(tid>i && !in_pass[tid]) { in_pass[tid]=1; extra.push(tid); }
+					}
 					break;
 				}
 			}
-			if(deleted_triangles<=0)break;
-			deleted_triangles=0;
+			if(n_collapsed==0 || interrupted)break;
+
+			work.clear();
+			for(int i : next)
+			{
+				in_next[i]=0;
+				if(!triangles[i].deleted) work.push_back(i);
+			}
+			next.clear();
+			std::sort(work.begin(),work.end());
+
+			// drop the references of deleted triangles once the appended
+			// references outgrow the mesh
+			if(refs.size()>triangles.size()*6) update_refs();
 		} //for each iteration
 		// clean up mesh
 		compact_mesh();
 	} //simplify_mesh_lossless()
 
+	//
+	// Heap based simplification
+	//
+	// Always collapses the cheapest remaining edge, with edge costs kept in
+	// a min-heap keyed on the quadric error. Entries are invalidated lazily
+	// through per-vertex stamps, so every collapse only pushes the edges of
+	// the surviving vertex. Edges rejected by the flip test park their
+	// vertices, which are requeued once a neighbouring collapse reshapes
+	// them. Stops as soon as target_count is reached, or once the cheapest
+	// edge costs more than max_error.
+	//
+
+	void simplify_mesh_heap(int target_count, bool verbose=false, bool preserve_border=false)
+	{
+		CollapseTimer timer(stats);
+		// init
+		loopi(0,triangles.size()) triangles[i].deleted=0;
+		reserve_collapses(triangles.size()-target_count);
+		update_mesh(0);
+
+		int deleted_triangles=0;
+		int triangle_count=triangles.size();
+		snapshot_lods(triangle_count);
+		std::vector<int> deleted0,deleted1;
+		std::vector<int> stamps(vertices.size(),0);
+		std::vector<char> parked(vertices.size(),0);
+		// min-heap of candidate edges, kept in a plain vector so that stale
+		// entries can be purged in place
+		std::vector<HeapEdge> heap;
+		std::greater<HeapEdge> heap_order;
+		size_t pushed=0; // entries pushed since the last purge
+		auto stale = [&](const HeapEdge &e)
+		{
+			return e.stamp0!=stamps[e.i0] || e.stamp1!=stamps[e.i1];
+		};
+
+		// push every edge of the triangles around vertex i (or of all
+		// triangles if i<0, heapified once at the end), each undirected
+		// edge once where possible. An open edge joins two border
+		// vertices, so only those pay for the twin lookup
+		auto push_edges = [&](int i)
+		{
+			int count = i<0 ? triangles.size() : vertices[i].tcount;
+			loopk(0,count)
+			{
+				int tid = i<0 ? k : refs[vertices[i].tstart+k].tid;
+				Triangle &t=triangles[tid];
+				if(t.deleted) continue;
+				loopj(0,3)
+				{
+					int i0=t.v[j], i1=t.v[(j+1)%3];
+					if(i>=0 && i0!=i && i1!=i) continue;
+					Vertex &v0=vertices[i0], &v1=vertices[i1];
+					if(i0>i1 && (!v0.border || !v1.border || has_edge(i1,i0)))
+						continue; // pushed from the twin
+					bool border_edge;
+					if (preserve_border) {
+						border_edge = v0.border || v1.border;
+					} else {
+						border_edge = v0.border != v1.border;
+					}
+					if (border_edge || is_locked(i0,i1)) {
+						stats.candidates++;
+						stats.rejected_border++;
+						continue;
+					}
+					vec3f p;
+					HeapEdge e;
+					e.err=calculate_error(i0,i1,p);
+					e.i0=i0; e.i1=i1;
+					e.stamp0=stamps[i0]; e.stamp1=stamps[i1];
+					heap.push_back(e);
+					if(i>=0) std::push_heap(heap.begin(),heap.end(),heap_order);
+					pushed++;
+				}
+			}
+			if(i<0) std::make_heap(heap.begin(),heap.end(),heap_order);
+		};
+
+		for (int pass = 0; pass < 100; pass ++)
+		{
+			if(triangle_count-deleted_triangles<=target_count)break;
+			if(interrupted)break;
+			if(pass>0) update_mesh(pass); // compact triangles, rebuild refs
+			push_edges(-1);
+			if (verbose) {
+				printf("heap pass %d - triangles %d edges %d\n",pass,triangle_count-deleted_triangles,(int)heap.size());
+			}
+
+			int n_collapsed=0;
+			double pass_error=0;
+			while(!heap.empty() && triangle_count-deleted_triangles>target_count)
+			{
+				if(should_stop()) break;
+				std::pop_heap(heap.begin(),heap.end(),heap_order);
+				HeapEdge e=heap.back(); heap.pop_back();
+				if(stale(e)) continue;
+				if(e.err>max_error) break; // every edge left costs more
+				stats.candidates++;
+
+				int i0=e.i0; Vertex &v0 = vertices[i0];
+				int i1=e.i1; Vertex &v1 = vertices[i1];
+
+				// Compute vertex to collapse to
+				vec3f p;
+				calculate_error(i0,i1,p);
+				deleted0.resize(v0.tcount);
+				deleted1.resize(v1.tcount);
+				// don't remove if flipped
+				if( flipped(p,i0,i1,v0,v1,deleted0,true) ||
+					flipped(p,i1,i0,v1,v0,deleted1,true) )
+				{
+					stats.rejected_flipped++;
+					parked[i0]=1;
+					parked[i1]=1;
+					continue;
+				}
+
+				// not flipped, so remove edge
+				// v0 <- v1 (i0 <- i1)
+				v0.p=p;
+				v0.q=v1.q+v0.q;
+				int tstart=refs.size();
+
+				update_triangles(i0,v0,deleted0,deleted_triangles);
+				update_triangles(i0,v1,deleted1,deleted_triangles);
+
+				// record collapse
+				record_collapse(i0,i1,p);
+				snapshot_lods(triangle_count-deleted_triangles);
+				report_progress(triangle_count-deleted_triangles);
+
+				int tcount=refs.size()-tstart;
+				if(tcount<=v0.tcount)
+				{
+					// save ram
+					if(tcount)memcpy(&refs[v0.tstart],&refs[tstart],tcount*sizeof(Ref));
+				}
+				else
+					// append
+					v0.tstart=tstart;
+				v0.tcount=tcount;
+				n_collapsed++;
+				pass_error=std::max(pass_error,e.err);
+
+				// invalidate every queued edge of both vertices and requeue
+				// the edges of the merged vertex
+				stamps[i0]++;
+				stamps[i1]++;
+				parked[i0]=0;
+				push_edges(i0);
+
+				// the triangles around the merged vertex moved, so the flip
+				// test of parked neighbours may pass now: requeue their edges
+				loopk(0,v0.tcount)
+				{
+					Triangle &t=triangles[refs[v0.tstart+k].tid];
+					if(t.deleted) continue;
+					for(int u : t.v) if(parked[u])
+					{
+						parked[u]=0;
+						stamps[u]++;
+						push_edges(u);
+					}
+				}
+
+				// keep the appended references bounded
+				if(refs.size()>triangles.size()*6)
+				{
+					update_mesh(1);
+				}
+
+				// most queued entries are stale after many collapses: drop
+				// them once the heap holds about twice the live edges, so it
+				// shrinks along with the mesh. Waiting for half a heap of new
+				// entries keeps the purges amortized when few are stale
+				if(heap.size()>3*(size_t)(triangle_count-deleted_triangles) &&
+					2*pushed>heap.size())
+				{
+					heap.erase(std::remove_if(heap.begin(),heap.end(),stale),heap.end());
+					std::make_heap(heap.begin(),heap.end(),heap_order);
+					pushed=0;
+				}
+			}
+
+			stats.iterations++;
+			stats.thresholds.push_back(pass_error);
+
+			// parked edges are only requeued next to a collapse; retry every
+			// edge once more and stop once a pass makes no progress
+			if(n_collapsed==0) break;
+			heap.clear();
+		}
+		// clean up mesh
+		finish_lods();
+		compact_mesh();
+
+	} //simplify_mesh_heap()
+
+	// Store the levels of detail reached with live_triangles left
+
+	void snapshot_lods(int live_triangles)
+	{
+		while(lod_points.size()<lod_targets.size() &&
+			  live_triangles<=lod_targets[lod_points.size()])
+			snapshot_mesh();
+	}
+
+	// Store the levels of detail that were not reached
+
+	void finish_lods()
+	{
+		while(lod_points.size()<lod_targets.size())
+			snapshot_mesh();
+	}
+
+	// Append the live mesh, compacted, to lod_points / lod_faces without
+	// touching the simplification state
+
+	void snapshot_mesh()
+	{
+		std::vector<int> index(vertices.size(),-1);
+		std::vector<double> points;
+		std::vector<int> faces;
+		loopi(0,triangles.size())
+		if(!triangles[i].deleted)
+		{
+			loopj(0,3) index[triangles[i].v[j]]=0;
+		}
+		int dst=0;
+		loopi(0,vertices.size())
+		if(index[i]==0)
+		{
+			index[i]=dst++;
+			points.push_back(vertices[i].p.x);
+			points.push_back(vertices[i].p.y);
+			points.push_back(vertices[i].p.z);
+		}
+		loopi(0,triangles.size())
+		if(!triangles[i].deleted)
+		{
+			loopj(0,3) faces.push_back(index[triangles[i].v[j]]);
+		}
+		lod_points.push_back(std::move(points));
+		lod_faces.push_back(std::move(faces));
+		lod_collapses.push_back(collapses.size()/2);
+	}
+
+	// Clear the collapse log and reserve room for the collapses needed to
+	// remove n_remove triangles; every collapse deletes at least one
 
-	// Check if a triangle flips when this edge is removed
+	void reserve_collapses(int n_remove)
+	{
+		collapses.clear();
+		collapse_positions.clear();
+		n_remove=std::max(0,std::min(n_remove,(int)vertices.size()));
+		collapses.reserve(2*(size_t)n_remove);
+		if(record_positions) collapse_positions.reserve(3*(size_t)n_remove);
+	}
+
+	// Call progress every progress_interval collapses
+
+	void report_progress(int live_triangles)
+	{
+		int n=progress_base+collapses.size()/2;
+		if(progress && n%progress_interval==0) progress(n,live_triangles);
+	}
+
+	// Log the collapse of vertex i1 into vertex i0, moved to p
 
-	bool flipped(vec3f p,int i0,int i1,Vertex &v0,Vertex &v1,std::vector<int> &deleted)
+	void record_collapse(int i0, int i1, const vec3f &p)
+	{
+		collapses.push_back(i0); collapses.push_back(i1);
+		stats.collapsed++;
+		if(record_positions)
+		{
+			collapse_positions.push_back(p.x);
+			collapse_positions.push_back(p.y);
+			collapse_positions.push_back(p.z);
+		}
+	}
+
+	// Check if either end of the edge i0-i1 is locked
+
+	bool is_locked(int i0,int i1) const
+	{
+		return !locked.empty() && (locked[i0] || locked[i1]);
+	}
+
+	// Check if the directed edge i0 -> i1 belongs to a live triangle
+
+	bool has_edge(int i0,int i1)
+	{
+		Vertex &v=vertices[i0];
+		loopk(0,v.tcount)
+		{
+			Ref &r=refs[v.tstart+k];
+			Triangle &t=triangles[r.tid];
+			if(t.deleted)continue;
+			if(t.v[(r.tvertex+1)%3]==i1) return true;
+		}
+		return false;
+	}
+
+
+	// Check if a triangle flips when this edge is removed. With
+	// tolerate_slivers, a triangle that already is a sliver may move as long
+	// as it does not become degenerate
+
+	bool flipped(vec3f p,int i0,int i1,Vertex &v0,Vertex &v1,std::vector<int> &deleted,
+		bool tolerate_slivers=false)
 	{
 
 		loopk(0,v0.tcount)
@@ -585,7 +1206,14 @@ namespace Simplify
 			}
 			vec3f d1 = vertices[id1].p-p; d1.normalize();
 			vec3f d2 = vertices[id2].p-p; d2.normalize();
-			if(fabs(d1.dot(d2))>0.999) return true;
+			double cos_angle=fabs(d1.dot(d2));
+			if(cos_angle>0.999)
+			{
+				if(!tolerate_slivers || cos_angle>0.99999) return true;
+				vec3f e1 = vertices[id1].p-v0.p; e1.normalize();
+				vec3f e2 = vertices[id2].p-v0.p; e2.normalize();
+				if(fabs(e1.dot(e2))<=0.999) return true;
+			}
 			vec3f n;
 			n.cross(d1,d2);
 			n.normalize();
@@ -608,7 +1236,8 @@ namespace Simplify
 			vec3f p1=vertices[t.v[0]].p;
 			vec3f p2=vertices[t.v[1]].p;
 			vec3f p3=vertices[t.v[2]].p;
-			t.uvs[r.tvertex] = interpolate(p,p1,p2,p3,t.uvs);
+			std::array<vec3f,3> &uvs=triangle_uvs[r.tid];
+			uvs[r.tvertex] = interpolate(p,p1,p2,p3,uvs.data());
 		}
 	}
 
@@ -633,7 +1262,6 @@ namespace Simplify
 			t.err[0]=calculate_error(t.v[0],t.v[1],p);
 			t.err[1]=calculate_error(t.v[1],t.v[2],p);
 			t.err[2]=calculate_error(t.v[2],t.v[0],p);
-			t.err[3]=min(t.err[0],min(t.err[1],t.err[2]));
 			refs.push_back(r);
 		}
 	}
@@ -642,15 +1270,16 @@ namespace Simplify
 
 	void update_mesh(int iteration)
 	{
+		ScopedTimer timer(stats.time_update_mesh);
 		if(iteration>0) // compact triangles
 		{
 			int dst=0;
 			loopi(0,triangles.size())
 			if(!triangles[i].deleted)
 			{
-				triangles[dst++]=triangles[i];
+				copy_triangle(dst++,i);
 			}
-			triangles.resize(dst);
+			resize_triangles(dst);
 		}
 		//
 		// Init Quadrics by Plane & Edge Errors
@@ -661,12 +1290,15 @@ namespace Simplify
 		//
 		if( iteration == 0 )
 		{
-			loopi(0,vertices.size())
-				vertices[i].q=SymetricMatrix(0.0);
-			loopi(0,vertices.size())
+			int nv=vertices.size(),nt=triangles.size();
+#pragma omp parallel for num_threads(omp_threads())
+			for(int i=0;i<nv;i++)
+			{
+				if(!keep_quadrics) vertices[i].q=SymetricMatrix(0.0);
 				vertices[i].border=0;
-
-			loopi(0,triangles.size())
+			}
+#pragma omp parallel for num_threads(omp_threads())
+			for(int i=0;i<nt;i++)
 			{
 				Triangle &t=triangles[i];
 				vec3f n,p[3];
@@ -674,28 +1306,63 @@ namespace Simplify
 				n.cross(p[1]-p[0],p[2]-p[0]);
 				n.normalize();
 				t.n=n;
-				loopj(0,3) vertices[t.v[j]].q =
-					vertices[t.v[j]].q+SymetricMatrix(n.x,n.y,n.z,-n.dot(p[0]));
 			}
-			loopi(0,triangles.size())
+		}
+
+		// Init Reference ID list
+		update_refs();
+
+		if( iteration == 0 )
+		{
+			int nv=vertices.size(),nt=triangles.size();
+
+			// Gather the plane quadrics of the faces around each vertex.
+			// References are sorted by triangle id, so the sums are
+			// accumulated in the same order as a serial scatter.
+#pragma omp parallel for num_threads(omp_threads())
+			for(int i=0;i<nv;i++)
+			{
+				if(keep_quadrics) continue;
+				Vertex &v=vertices[i];
+				loopj(0,v.tcount)
+				{
+					Triangle &t=triangles[refs[v.tstart+j].tid];
+					vec3f &n=t.n,&p0=vertices[t.v[0]].p;
+					v.q=v.q+SymetricMatrix(n.x,n.y,n.z,-n.dot(p0));
+				}
+			}
+#pragma omp parallel for num_threads(omp_threads())
+			for(int i=0;i<nt;i++)
 			{
 				// Calc Edge Error
 				Triangle &t=triangles[i];vec3f p;
 				loopj(0,3) t.err[j]=calculate_error(t.v[j],t.v[(j+1)%3],p);
-				t.err[3]=min(t.err[0],min(t.err[1],t.err[2]));
 			}
+
+			identify_borders(vertices,triangles,refs,omp_threads());
 		}
+	}
 
-		// Init Reference ID list
-		loopi(0,vertices.size())
+	// Rebuild the vertex -> triangle reference list
+
+	void update_refs()
+	{
+		int nv=vertices.size(),nt=triangles.size();
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nv;i++)
 		{
 			vertices[i].tstart=0;
 			vertices[i].tcount=0;
 		}
-		loopi(0,triangles.size())
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nt;i++)
 		{
 			Triangle &t=triangles[i];
-			loopj(0,3) vertices[t.v[j]].tcount++;
+			loopj(0,3)
+			{
+#pragma omp atomic
+				vertices[t.v[j]].tcount++;
+			}
 		}
 		int tstart=0;
 		loopi(0,vertices.size())
@@ -708,6 +1375,33 @@ namespace Simplify
 
 		// Write References
 		refs.resize(triangles.size()*3);
+#if defined(_OPENMP) && _OPENMP >= 201107
+		// slots are claimed concurrently, then each vertex's references are
+		// sorted back into triangle order so the result does not depend on
+		// the number of threads
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nt;i++)
+		{
+			Triangle &t=triangles[i];
+			loopj(0,3)
+			{
+				Vertex &v=vertices[t.v[j]];
+				int slot;
+#pragma omp atomic capture
+				slot=v.tcount++;
+				refs[v.tstart+slot].tid=i;
+				refs[v.tstart+slot].tvertex=j;
+			}
+		}
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nv;i++)
+		{
+			Vertex &v=vertices[i];
+			std::sort(refs.begin()+v.tstart,refs.begin()+v.tstart+v.tcount,
+				[](const Ref &a,const Ref &b)
+				{ return a.tid<b.tid || (a.tid==b.tid && a.tvertex<b.tvertex); });
+		}
+#else
 		loopi(0,triangles.size())
 		{
 			Triangle &t=triangles[i];
@@ -719,53 +1413,35 @@ namespace Simplify
 				v.tcount++;
 			}
 		}
+#endif
+	}
 
-		// Identify boundary : vertices[].border=0,1
-		if( iteration == 0 )
-		{
-			std::vector<int> vcount,vids;
+	// Move triangle src, with its optional attributes, to slot dst
 
-			loopi(0,vertices.size())
-				vertices[i].border=0;
+	void copy_triangle(int dst,int src)
+	{
+		triangles[dst]=triangles[src];
+		if(!triangle_uvs.empty()) triangle_uvs[dst]=triangle_uvs[src];
+		if(!triangle_materials.empty()) triangle_materials[dst]=triangle_materials[src];
+		if(!triangle_ids.empty()) triangle_ids[dst]=triangle_ids[src];
+	}
 
-			loopi(0,vertices.size())
-			{
-				Vertex &v=vertices[i];
-				vcount.clear();
-				vids.clear();
-				loopj(0,v.tcount)
-				{
-					int k=refs[v.tstart+j].tid;
-					Triangle &t=triangles[k];
-					loopk(0,3)
-					{
-						int ofs=0,id=t.v[k];
-						while(ofs<vcount.size())
-						{
-							if(vids[ofs]==id)break;
-							ofs++;
-						}
-						if(ofs==vcount.size())
-						{
-							vcount.push_back(1);
-							vids.push_back(id);
-						}
-						else
-							vcount[ofs]++;
-					}
-				}
-				loopj(0,vcount.size()) if(vcount[j]==1)
-					vertices[vids[j]].border=1;
-			}
-		}
+	void resize_triangles(int n)
+	{
+		triangles.resize(n);
+		if(!triangle_uvs.empty()) triangle_uvs.resize(n);
+		if(!triangle_materials.empty()) triangle_materials.resize(n);
+		if(!triangle_ids.empty()) triangle_ids.resize(n);
 	}
 
 	// Finally compact mesh before exiting
 
 	void compact_mesh()
 	{
-		int dst=0;
-		loopi(0,vertices.size())
+		ScopedTimer timer(stats.time_compact);
+		int dst=0,nv=vertices.size();
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nv;i++)
 		{
 			vertices[i].tcount=0;
 		}
@@ -773,24 +1449,30 @@ namespace Simplify
 		if(!triangles[i].deleted)
 		{
 			Triangle &t=triangles[i];
-			triangles[dst++]=t;
 			loopj(0,3)vertices[t.v[j]].tcount=1;
+			copy_triangle(dst++,i);
 		}
-		triangles.resize(dst);
+		resize_triangles(dst);
 		dst=0;
+		vertex_map.resize(vertices.size());
 		loopi(0,vertices.size())
 		if(vertices[i].tcount)
 		{
 			vertices[i].tstart=dst;
 			vertices[dst].p=vertices[i].p;
+			vertices[dst].q=vertices[i].q;
+			vertex_map[dst]=i;
 			dst++;
 		}
-		loopi(0,triangles.size())
+		int nt=triangles.size();
+#pragma omp parallel for num_threads(omp_threads())
+		for(int i=0;i<nt;i++)
 		{
 			Triangle &t=triangles[i];
 			loopj(0,3)t.v[j]=vertices[t.v[j]].tstart;
 		}
 		vertices.resize(dst);
+		vertex_map.resize(dst);
 	}
 
 	// Error between vertex and Quadric
@@ -838,7 +1520,7 @@ namespace Simplify
 		return error;
 	}
 
-	char *trimwhitespace(char *str)
+	static char *trimwhitespace(char *str)
 	{
 		char *end;
 
@@ -861,7 +1543,7 @@ namespace Simplify
 	//Option : Load OBJ
 	void load_obj(const char* filename, bool process_uv=false){
 		vertices.clear();
-		triangles.clear();
+		resize_triangles(0);
 		// printf ( "Loading Objects %s ... \n",filename);
 		FILE* fn;
 		if(filename==NULL)		return ;
@@ -878,6 +1560,7 @@ namespace Simplify
 		std::map<std::string, int> material_map;
 		std::vector<vec3f> uvs;
 		std::vector<std::vector<int> > uvMap;
+		std::vector<int> tri_materials;
 
 		while(fgets( line, 1000, fn ) != NULL)
 		{
@@ -986,7 +1669,7 @@ namespace Simplify
 						t.attr |= TEXCOORD;
 					}
 
-					t.material = material;
+					tri_materials.push_back(material);
 					//geo.triangles.push_back ( tri );
 					triangles.push_back(t);
 					//state_before = state;
@@ -997,12 +1680,15 @@ namespace Simplify
 
 		if ( process_uv && uvs.size() )
 		{
+			triangle_uvs.resize(triangles.size());
 			loopi(0,triangles.size())
 			{
 				loopj(0,3)
-				triangles[i].uvs[j] = uvs[uvMap[i][j]];
+				triangle_uvs[i][j] = uvs[uvMap[i][j]];
 			}
 		}
+		if ( materials.size() )
+			triangle_materials.swap(tri_materials);
 
 		fclose(fn);
 
@@ -1035,18 +1721,19 @@ namespace Simplify
 		{
 			loopi(0,triangles.size()) if(!triangles[i].deleted)
 			{
-				fprintf(file, "vt %g %g\n", triangles[i].uvs[0].x, triangles[i].uvs[0].y);
-				fprintf(file, "vt %g %g\n", triangles[i].uvs[1].x, triangles[i].uvs[1].y);
-				fprintf(file, "vt %g %g\n", triangles[i].uvs[2].x, triangles[i].uvs[2].y);
+				fprintf(file, "vt %g %g\n", triangle_uvs[i][0].x, triangle_uvs[i][0].y);
+				fprintf(file, "vt %g %g\n", triangle_uvs[i][1].x, triangle_uvs[i][1].y);
+				fprintf(file, "vt %g %g\n", triangle_uvs[i][2].x, triangle_uvs[i][2].y);
 			}
 		}
 		int uv = 1;
 		loopi(0,triangles.size()) if(!triangles[i].deleted)
 		{
-			if (triangles[i].material != cur_material)
+			int material = triangle_materials.empty() ? -1 : triangle_materials[i];
+			if (material != cur_material)
 			{
-				cur_material = triangles[i].material;
-				fprintf(file, "usemtl %s\n", materials[triangles[i].material].c_str());
+				cur_material = material;
+				fprintf(file, "usemtl %s\n", materials[material].c_str());
 			}
 			if (has_uv)
 			{
@@ -1061,5 +1748,6 @@ namespace Simplify
 		}
 		fclose(file);
 	}
+	}; // class Simplifier
 };
 ///////////////////////////////////////////
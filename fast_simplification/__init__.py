@@ -1,8 +1,22 @@
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as _version
 
-from .replay import _map_isolated_points, replay_simplification  # noqa: F401
-from .simplify import simplify, simplify_mesh  # noqa: F401
+from .history import CollapseHistory, load_collapses, save_collapses  # noqa: F401
+from .replay import (  # noqa: F401
+    ReplaySession,
+    _map_isolated_points,
+    apply_collapses_to_cell_data,
+    apply_collapses_to_point_data,
+    replay_simplification,
+)
+from .simplify import (  # noqa: F401
+    CancellationToken,
+    SimplifyStats,
+    simplify,
+    simplify_lods,
+    simplify_many,
+    simplify_mesh,
+)
 
 try:
     __version__ = _version("fast_simplification")
@@ -1,12 +1,17 @@
 // nanobind bindings for the replay half of fast-simplification.
 //
 // Mirrors the surface previously provided by the Cython module
-// ``fast_simplification._replay``. The C++ core (Replay.h / wrapper_replay.h)
-// is unchanged. The two array-processing helpers ``compute_indice_mapping``
-// and ``clean_triangles_and_edges`` were pure Cython routines; they are
-// reimplemented here with identical semantics so ``replay.py`` keeps working
-// unchanged.
-
+// ``fast_simplification._replay``. All mesh state lives in a
+// ``Replay::Replayer`` instance exposed as ``Replayer``; the heavy loops run
+// with the GIL released. The two array-processing helpers
+// ``compute_indice_mapping`` and ``clean_triangles_and_edges`` were pure Cython
+// routines; they are reimplemented here with identical semantics.
+// ``replay_full`` chains the replay and every post-processing step in a single
+// call, which is what ``replay.py`` uses. Points are accepted as float32 or
+// float64 and returned in the same dtype.
+
+#include <algorithm>
+#include <climits>
 #include <cstdint>
 #include <cstdlib>
 #include <stdexcept>
@@ -16,6 +21,7 @@
 #include <nanobind/nanobind.h>
 #include <nanobind/ndarray.h>
 #include <nanobind/stl/string.h>
+#include <nanobind/stl/vector.h>
 
 #include "array_support.h"
 #include "wrapper_replay.h"
@@ -24,93 +30,138 @@ namespace nb = nanobind;
 using namespace nb::literals;
 
 // ---------------------------------------------------------------------------
-// Loaders (replay uses float32 points)
+// Loaders (float32 or float64 points)
 // ---------------------------------------------------------------------------
 
-static void load_int32(int n_points, int n_faces, int n_collapses,
-                       InArray<float, 2> points, InArray<int32_t, 2> faces,
+template <typename S>
+static void load_int32(Replay::Replayer &self, int n_points, int n_faces,
+                       int n_collapses, InArray<S, 2> points,
+                       InArray<int32_t, 2> faces,
                        InArray<int32_t, 2> collapses) {
-  Replay::load_arrays_int32(n_points, n_faces, n_collapses, points.data(),
+  nb::gil_scoped_release release;
+  Replay::load_arrays_int32(self, n_points, n_faces, n_collapses, points.data(),
                             faces.data(), collapses.data());
 }
 
-static void load_int64(int n_points, int n_faces, int n_collapses,
-                       InArray<float, 2> points, InArray<int64_t, 2> faces,
+template <typename S>
+static void load_int64(Replay::Replayer &self, int n_points, int n_faces,
+                       int n_collapses, InArray<S, 2> points,
+                       InArray<int64_t, 2> faces,
                        InArray<int32_t, 2> collapses) {
-  Replay::load_arrays_int64(n_points, n_faces, n_collapses, points.data(),
+  nb::gil_scoped_release release;
+  Replay::load_arrays_int64(self, n_points, n_faces, n_collapses, points.data(),
                             faces.data(), collapses.data());
 }
 
-static void load_from_vtk(int n_points, InArray<float, 2> points,
-                          InArray<int32_t, 1> faces, int n_faces) {
-  int result = Replay::load_triangles_from_vtk(n_faces, faces.data());
+template <typename S>
+static void load_from_vtk(Replay::Replayer &self, int n_points,
+                          InArray<S, 2> points, InArray<int32_t, 1> faces,
+                          int n_faces) {
+  int result;
+  {
+    nb::gil_scoped_release release;
+    result = Replay::load_triangles_from_vtk(self, n_faces, faces.data());
+    if (!result)
+      Replay::load_points(self, n_points, points.data());
+  }
   if (result) {
     throw std::invalid_argument(
         "Input mesh ``mesh`` must consist of only triangles.\n"
         "Run ``.triangulate()`` to convert to an all triangle mesh.");
   }
-  Replay::load_points(n_points, points.data());
 }
 
-static void replay() { Replay::replay_simplification(); }
+static void replay(Replay::Replayer &self) {
+  nb::gil_scoped_release release;
+  self.replay_simplification();
+}
 
-static void save_obj(const std::string &filename) {
-  Replay::write_obj(filename.c_str());
+static void save_obj(Replay::Replayer &self, const std::string &filename) {
+  self.write_obj(filename.c_str());
 }
 
-static void read_obj(const std::string &filename) {
-  Replay::load_obj(filename.c_str(), false);
+static void read_obj(Replay::Replayer &self, const std::string &filename) {
+  self.load_obj(filename.c_str(), false);
 }
 
 // ---------------------------------------------------------------------------
-// Result accessors (replay points are float32)
+// Result accessors (points in the dtype they were loaded with)
 // ---------------------------------------------------------------------------
 
-static NDArray<float, 2> return_points() {
-  int n = Replay::n_points();
-  auto arr = MakeNDArray<float, 2>({n, 3});
-  Replay::get_points(arr.data());
+template <typename S>
+static NDArray<S, 2> points_as(Replay::Replayer &self) {
+  int n = Replay::n_points(self);
+  auto arr = MakeNDArray<S, 2>({n, 3});
+  {
+    nb::gil_scoped_release release;
+    Replay::get_points(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 2> return_triangles() {
-  int n = Replay::n_triangles();
+static nb::object return_points(Replay::Replayer &self) {
+  if (self.single_precision)
+    return nb::cast(points_as<float>(self));
+  return nb::cast(points_as<double>(self));
+}
+
+static NDArray<int32_t, 2> return_triangles(Replay::Replayer &self) {
+  int n = Replay::n_triangles(self);
   auto arr = MakeNDArray<int32_t, 2>({n, 3});
-  Replay::get_triangles(arr.data());
+  {
+    nb::gil_scoped_release release;
+    Replay::get_triangles(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 2> return_collapses() {
-  int n = Replay::n_collapses();
+static NDArray<int32_t, 2> return_collapses(Replay::Replayer &self) {
+  int n = Replay::n_collapses(self);
   auto arr = MakeNDArray<int32_t, 2>({n, 2});
-  Replay::get_collapses(arr.data());
+  {
+    nb::gil_scoped_release release;
+    Replay::get_collapses(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 1> return_faces_int32_no_padding() {
-  size_t cap = (size_t)Replay::n_triangles() * 3;
+static NDArray<int32_t, 1>
+return_faces_int32_no_padding(Replay::Replayer &self) {
+  size_t cap = (size_t)Replay::n_triangles(self) * 3;
   int32_t *buf = (int32_t *)std::malloc((cap ? cap : 1) * sizeof(int32_t));
   if (!buf)
     throw std::bad_alloc();
-  int n_tri = Replay::get_faces_int32_no_padding(buf);
+  int n_tri;
+  {
+    nb::gil_scoped_release release;
+    n_tri = Replay::get_faces_int32_no_padding(self, buf);
+  }
   return WrapFlat<int32_t>(buf, (size_t)n_tri * 3);
 }
 
-static NDArray<int32_t, 1> return_faces_int32() {
-  size_t cap = (size_t)Replay::n_triangles() * 4;
+static NDArray<int32_t, 1> return_faces_int32(Replay::Replayer &self) {
+  size_t cap = (size_t)Replay::n_triangles(self) * 4;
   int32_t *buf = (int32_t *)std::malloc((cap ? cap : 1) * sizeof(int32_t));
   if (!buf)
     throw std::bad_alloc();
-  int n_tri = Replay::get_faces_int32(buf);
+  int n_tri;
+  {
+    nb::gil_scoped_release release;
+    n_tri = Replay::get_faces_int32(self, buf);
+  }
   return WrapFlat<int32_t>(buf, (size_t)n_tri * 4);
 }
 
-static NDArray<int64_t, 1> return_faces_int64() {
-  size_t cap = (size_t)Replay::n_triangles() * 4;
+static NDArray<int64_t, 1> return_faces_int64(Replay::Replayer &self) {
+  size_t cap = (size_t)Replay::n_triangles(self) * 4;
   int64_t *buf = (int64_t *)std::malloc((cap ? cap : 1) * sizeof(int64_t));
   if (!buf)
     throw std::bad_alloc();
-  int n_tri = Replay::get_faces_int64(buf);
+  int n_tri;
+  {
+    nb::gil_scoped_release release;
+    n_tri = Replay::get_faces_int64(self, buf);
+  }
   return WrapFlat<int64_t>(buf, (size_t)n_tri * 4);
 }
 
@@ -118,93 +169,94 @@ static NDArray<int64_t, 1> return_faces_int64() {
 // Array-processing helpers (formerly pure Cython)
 // ---------------------------------------------------------------------------
 
-// Compute the mapping from original indices to new indices after collapsing
-// edges. Reproduces the numpy/Cython implementation exactly, including the
-// last-wins semantics of assigning through duplicated origin indices and the
-// simultaneous read-then-write of numpy fancy indexing.
-static NDArray<int32_t, 1>
-compute_indice_mapping(InArray<int32_t, 2> collapses, int n_points) {
-  size_t n_coll = collapses.shape(0);
-  const int32_t *cptr = (n_coll > 0) ? collapses.data() : nullptr;
-
-  // origin_indices = collapses[:, 1], targets = collapses[:, 0]
-  std::vector<int64_t> mapping((size_t)n_points);
-  for (int i = 0; i < n_points; ++i)
-    mapping[(size_t)i] = i;
+// Throw unless every index lies in ``[0, n)``.
+template <typename T>
+static void check_indices(const T *idx, size_t count, size_t n,
+                          const char *name) {
+  for (size_t i = 0; i < count; ++i)
+    if (idx[i] < 0 || (size_t)idx[i] >= n)
+      throw std::invalid_argument(std::string("``") + name +
+                                  "`` contains an invalid point index");
+}
 
-  // indice_mapping[origin_indices] = collapses[:, 0]  (last wins on dups)
+// Compute the mapping from original indices to new indices after collapsing
+// edges. Every collapsed vertex points at the vertex it was merged into (the
+// last collapse wins when an origin is repeated); each vertex is then
+// resolved to the root of its chain with path compression, so every pointer
+// is followed once and the whole mapping costs O(n_points + n_collapses).
+// The roots are identical to the ones obtained by repeatedly sweeping
+// ``mapping[origin] = mapping[mapping[origin]]`` until nothing changes.
+// Returns false if the collapses contain a cycle.
+static bool resolve_indice_mapping(const int32_t *cptr, size_t n_coll, size_t n,
+                                   int32_t *out) {
+  // origin = collapses[:, 1] is merged into target = collapses[:, 0]
+  std::vector<int32_t> parent(n);
+  std::vector<char> removed(n, 0);
+  for (size_t i = 0; i < n; ++i)
+    parent[i] = (int32_t)i;
   for (size_t k = 0; k < n_coll; ++k) {
-    int64_t origin = cptr[2 * k + 1];
-    int64_t target = cptr[2 * k + 0];
-    mapping[(size_t)origin] = target;
+    parent[(size_t)cptr[2 * k + 1]] = cptr[2 * k + 0];
+    removed[(size_t)cptr[2 * k + 1]] = 1;
   }
 
-  // Iterate indice_mapping[origin] = indice_mapping[indice_mapping[origin]]
-  // until a stationary state is reached. Each iteration reads the full
-  // pre-iteration state (RHS) before writing (matches numpy semantics).
-  if (n_coll > 0) {
-    std::vector<int64_t> rhs(n_coll);
-    bool changed = true;
-    while (changed) {
-      for (size_t k = 0; k < n_coll; ++k) {
-        int64_t origin = cptr[2 * k + 1];
-        rhs[k] = mapping[(size_t)mapping[(size_t)origin]];
-      }
-      changed = false;
-      for (size_t k = 0; k < n_coll; ++k) {
-        int64_t origin = cptr[2 * k + 1];
-        if (mapping[(size_t)origin] != rhs[k]) {
-          changed = true;
-          mapping[(size_t)origin] = rhs[k];
-        }
-      }
+  // 0: unresolved, 1: on the current path, 2: parent is a root
+  std::vector<char> state(n, 0);
+  std::vector<int32_t> path;
+  for (size_t i = 0; i < n; ++i) {
+    int32_t v = (int32_t)i;
+    while (state[v] == 0 && parent[v] != v) {
+      state[v] = 1;
+      path.push_back(v);
+      v = parent[v];
     }
-  }
-
-  // keep = setdiff1d(arange(n_points), collapses[:, 1]) is the sorted set of
-  // indices that are never an origin. application[i] is the rank of i among
-  // kept indices, or 0 for removed indices.
-  std::vector<char> removed((size_t)n_points, 0);
-  for (size_t k = 0; k < n_coll; ++k) {
-    int64_t origin = cptr[2 * k + 1];
-    if (origin >= 0 && origin < n_points)
-      removed[(size_t)origin] = 1;
-  }
-  std::vector<int32_t> application((size_t)n_points, 0);
-  int32_t rank = 0;
-  for (int i = 0; i < n_points; ++i) {
-    if (!removed[(size_t)i]) {
-      application[(size_t)i] = rank;
-      ++rank;
+    if (state[v] == 1)
+      return false;
+    int32_t root = state[v] == 2 ? parent[v] : v;
+    for (int32_t p : path) {
+      parent[p] = root;
+      state[p] = 2;
     }
+    path.clear();
   }
 
-  // indice_mapping = application[indice_mapping]
-  auto out = MakeNDArray<int32_t, 1>({n_points});
-  int32_t *optr = out.data();
-  for (int i = 0; i < n_points; ++i)
-    optr[i] = application[(size_t)mapping[(size_t)i]];
-  return out;
+  // application[i] is the rank of i among the vertices that are never an
+  // origin, or 0 for removed vertices
+  std::vector<int32_t> application(n, 0);
+  int32_t rank = 0;
+  for (size_t i = 0; i < n; ++i)
+    if (!removed[i])
+      application[i] = rank++;
+  for (size_t i = 0; i < n; ++i)
+    out[i] = application[(size_t)parent[i]];
+  return true;
 }
 
-// Split mapped triangles into genuine triangles and degenerate edges. Only the
-// ``clean_edges == false`` behaviour used by replay.py is required; the
-// deduplicating branch is kept for surface parity.
-static nb::tuple clean_triangles_and_edges(InArray<int32_t, 2> mapped_triangles,
-                                           bool clean_edges) {
-  size_t N = mapped_triangles.shape(0);
-  const int32_t *mt = (N > 0) ? mapped_triangles.data() : nullptr;
-
-  int32_t *edges = (int32_t *)std::malloc(((N ? N : 1)) * 2 * sizeof(int32_t));
-  int32_t *tris = (int32_t *)std::malloc(((N ? N : 1)) * 3 * sizeof(int32_t));
-  if (!edges || !tris) {
-    std::free(edges);
-    std::free(tris);
-    throw std::bad_alloc();
+static NDArray<int32_t, 1>
+compute_indice_mapping(InArray<int32_t, 2> collapses, int n_points) {
+  size_t n_coll = collapses.shape(0);
+  const int32_t *cptr = (n_coll > 0) ? collapses.data() : nullptr;
+  size_t n = (size_t)std::max(n_points, 0);
+  check_indices(cptr, 2 * n_coll, n, "collapses");
+
+  auto out = MakeNDArray<int32_t, 1>({(int)n});
+  bool valid;
+  {
+    nb::gil_scoped_release release;
+    valid = resolve_indice_mapping(cptr, n_coll, n, out.data());
   }
+  if (!valid)
+    throw std::invalid_argument("``collapses`` contains a cycle");
+  return out;
+}
 
-  size_t n_edges = 0;
-  size_t n_triangles = 0;
+// Split mapped triangles into genuine triangles and degenerate edges.
+// ``tris`` may alias ``mt``: a triangle is never written ahead of the one
+// being read.
+static void split_triangles_and_edges(const int32_t *mt, size_t N,
+                                      int32_t *tris, size_t &n_triangles,
+                                      int32_t *edges, size_t &n_edges) {
+  n_edges = 0;
+  n_triangles = 0;
   for (size_t i = 0; i < N; ++i) {
     int32_t j = mt[3 * i + 0];
     int32_t k = mt[3 * i + 1];
@@ -228,6 +280,25 @@ static nb::tuple clean_triangles_and_edges(InArray<int32_t, 2> mapped_triangles,
       ++n_edges;
     }
   }
+}
+
+// Only the ``clean_edges == false`` behaviour used by replay.py is required;
+// the deduplicating branch is kept for surface parity.
+static nb::tuple clean_triangles_and_edges(InArray<int32_t, 2> mapped_triangles,
+                                           bool clean_edges) {
+  size_t N = mapped_triangles.shape(0);
+  const int32_t *mt = (N > 0) ? mapped_triangles.data() : nullptr;
+
+  int32_t *edges = (int32_t *)std::malloc(((N ? N : 1)) * 2 * sizeof(int32_t));
+  int32_t *tris = (int32_t *)std::malloc(((N ? N : 1)) * 3 * sizeof(int32_t));
+  if (!edges || !tris) {
+    std::free(edges);
+    std::free(tris);
+    throw std::bad_alloc();
+  }
+
+  size_t n_edges, n_triangles;
+  split_triangles_and_edges(mt, N, tris, n_triangles, edges, n_edges);
 
   (void)clean_edges; // dedup branch unused by replay.py; kept for surface parity
 
@@ -245,31 +316,689 @@ static nb::tuple clean_triangles_and_edges(InArray<int32_t, 2> mapped_triangles,
   return nb::make_tuple(edges2, tris2);
 }
 
+// Merge the points that are only reachable through degenerate edges into the
+// points of the triangles. This is a breadth-first search started from every
+// point that is used by a triangle or by no edge at all; a point reached at
+// level ``L`` takes the mapping of its neighbour from level ``L - 1``, and
+// when several neighbours qualify the one joined by the last edge wins. That
+// matches the level-by-level fixed point previously computed with numpy.
+// On return ``level[i]`` is -1 for the points that could not be connected.
+static void resolve_isolated_points(size_t n, const int32_t *e, size_t n_edges,
+                                    const int32_t *t, size_t n_tri_idx,
+                                    int64_t *map, std::vector<int> &level) {
+  for (size_t i = 0; i < n; ++i)
+    map[i] = (int64_t)i;
+
+  // level[i] is -1 while ``i`` still has to be connected, 0 for anchors and
+  // L for points merged at level L
+  std::vector<char> in_triangle(n, 0), in_edge(n, 0);
+  for (size_t i = 0; i < n_tri_idx; ++i)
+    in_triangle[t[i]] = 1;
+  for (size_t i = 0; i < 2 * n_edges; ++i)
+    in_edge[e[i]] = 1;
+  level.assign(n, 0);
+  for (size_t i = 0; i < n; ++i)
+    if (in_edge[i] && !in_triangle[i])
+      level[i] = -1;
+
+  // edges incident to each point, in increasing edge order
+  std::vector<size_t> start(n + 1, 0);
+  for (size_t i = 0; i < 2 * n_edges; ++i)
+    start[(size_t)e[i] + 1]++;
+  for (size_t i = 0; i < n; ++i)
+    start[i + 1] += start[i];
+  std::vector<size_t> incident(2 * n_edges);
+  {
+    std::vector<size_t> fill(start.begin(), start.end() - 1);
+    for (size_t k = 0; k < n_edges; ++k) {
+      incident[fill[(size_t)e[2 * k]]++] = k;
+      if (e[2 * k + 1] != e[2 * k])
+        incident[fill[(size_t)e[2 * k + 1]]++] = k;
+    }
+  }
+
+  std::vector<int32_t> frontier, next;
+  for (size_t i = 0; i < n; ++i)
+    if (level[i] == 0 && start[i + 1] > start[i])
+      frontier.push_back((int32_t)i);
+
+  for (int depth = 1; !frontier.empty(); ++depth) {
+    next.clear();
+    for (int32_t v : frontier) {
+      for (size_t j = start[v]; j < start[v + 1]; ++j) {
+        size_t k = incident[j];
+        int32_t c = e[2 * k] == v ? e[2 * k + 1] : e[2 * k];
+        if (level[c] == -1) {
+          level[c] = depth;
+          next.push_back(c);
+        }
+      }
+    }
+    // each newly reached point follows its last edge into the previous level
+    for (int32_t c : next) {
+      for (size_t j = start[c + 1]; j-- > start[c];) {
+        size_t k = incident[j];
+        int32_t o = e[2 * k] == c ? e[2 * k + 1] : e[2 * k];
+        if (level[o] >= 0 && level[o] < depth) {
+          map[c] = map[o];
+          break;
+        }
+      }
+    }
+    frontier.swap(next);
+  }
+}
+
+// Read-only flat index buffer; the edges and triangles are only scanned.
+using IndexArray =
+    nb::ndarray<const int32_t, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+// Returns ``(mapping, merged_points, outliers)``.
+static nb::tuple map_isolated_points(int n_points, IndexArray edges,
+                                     IndexArray triangles) {
+  size_t n_edges = edges.shape(0) / 2;
+  size_t n_tri_idx = triangles.shape(0);
+  const int32_t *e = n_edges ? edges.data() : nullptr;
+  const int32_t *t = n_tri_idx ? triangles.data() : nullptr;
+  size_t n = (size_t)std::max(n_points, 0);
+  check_indices(e, 2 * n_edges, n, "edges");
+  check_indices(t, n_tri_idx, n, "triangles");
+
+  auto mapping = MakeNDArray<int64_t, 1>({(int)n});
+  int64_t *map = mapping.data();
+  std::vector<int64_t> merged;
+  std::vector<int64_t> outliers;
+  {
+    nb::gil_scoped_release release;
+    std::vector<int> level;
+    resolve_isolated_points(n, e, n_edges, t, n_tri_idx, map, level);
+    for (size_t i = 0; i < n; ++i) {
+      if (map[i] != (int64_t)i)
+        merged.push_back((int64_t)i);
+      else if (level[i] == -1)
+        outliers.push_back((int64_t)i);
+    }
+  }
+
+  size_t n_merged = merged.size(), n_outliers = outliers.size();
+  auto merged_arr = WrapVector<int64_t, 1>(std::move(merged), {n_merged});
+  auto outliers_arr = WrapVector<int64_t, 1>(std::move(outliers), {n_outliers});
+  return nb::make_tuple(mapping, merged_arr, outliers_arr);
+}
+
+// ---------------------------------------------------------------------------
+// Collapse history encoding (see history.py for the file layout)
+// ---------------------------------------------------------------------------
+
+static inline uint32_t zigzag(int64_t x) {
+  return (uint32_t)((x << 1) ^ (x >> 63));
+}
+
+static inline int64_t unzigzag(uint64_t u) {
+  return (int64_t)(u >> 1) ^ -(int64_t)(u & 1);
+}
+
+static inline void put_varint(std::vector<uint8_t> &out, uint32_t u) {
+  while (u >= 0x80) {
+    out.push_back((uint8_t)(u | 0x80));
+    u >>= 7;
+  }
+  out.push_back((uint8_t)u);
+}
+
+// Encode every collapse (i0, i1) as two zigzag LEB128 varints: the change of
+// i1 from the previous collapse, then i0 - i1. Neighbouring vertices tend to
+// have close indices, so most collapses take 2 to 4 bytes instead of 8.
+static NDArray<uint8_t, 1> encode_collapses(InArray<int32_t, 2> collapses) {
+  if (collapses.shape(1) != 2)
+    throw std::invalid_argument("Expected ``collapses`` to be (n, 2)");
+  size_t n_coll = collapses.shape(0);
+  const int32_t *cptr = n_coll ? collapses.data() : nullptr;
+  std::vector<uint8_t> out;
+  {
+    nb::gil_scoped_release release;
+    out.reserve(4 * n_coll);
+    int64_t prev = 0;
+    for (size_t k = 0; k < n_coll; ++k) {
+      int64_t i0 = cptr[2 * k + 0], i1 = cptr[2 * k + 1];
+      put_varint(out, zigzag(i1 - prev));
+      put_varint(out, zigzag(i0 - i1));
+      prev = i1;
+    }
+  }
+  size_t n = out.size();
+  return WrapVector<uint8_t, 1>(std::move(out), {n});
+}
+
+// Read-only byte buffer, e.g. a slice of an ``np.memmap``
+using ByteArray =
+    nb::ndarray<const uint8_t, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+// Decode ``n_collapses`` collapses written by encode_collapses.
+static NDArray<int32_t, 2> decode_collapses(ByteArray data,
+                                            size_t n_collapses) {
+  size_t size = data.shape(0);
+  const uint8_t *ptr = size ? data.data() : nullptr;
+  // every collapse takes at least two bytes; checked before allocating, so a
+  // corrupted count cannot request a huge buffer
+  if (n_collapses > size / 2)
+    throw std::invalid_argument("the encoded collapses are truncated");
+  std::vector<int32_t> out(2 * n_collapses);
+  const char *error = nullptr;
+  {
+    nb::gil_scoped_release release;
+    size_t pos = 0;
+    int64_t prev = 0;
+    for (size_t i = 0; i < 2 * n_collapses; ++i) {
+      uint64_t u = 0;
+      int shift = 0;
+      while (true) {
+        if (pos >= size) {
+          error = "the encoded collapses are truncated";
+          break;
+        }
+        uint8_t byte = ptr[pos++];
+        u |= (uint64_t)(byte & 0x7f) << shift;
+        if (!(byte & 0x80))
+          break;
+        shift += 7;
+        if (shift > 28) {
+          error = "the encoded collapses are corrupted";
+          break;
+        }
+      }
+      if (error)
+        break;
+      // even values hold i1 relative to the previous i1, odd ones i0 - i1
+      int64_t index = unzigzag(u) + prev;
+      if (index < 0 || index > INT32_MAX) {
+        error = "the encoded collapses are corrupted";
+        break;
+      }
+      if (i % 2 == 0) {
+        prev = index;
+        out[i + 1] = (int32_t)index;
+      } else {
+        out[i - 1] = (int32_t)index;
+      }
+    }
+    if (!error && pos != size)
+      error = "the encoded collapses have trailing bytes";
+  }
+  if (error)
+    throw std::invalid_argument(error);
+  return WrapVector<int32_t, 2>(std::move(out), {n_collapses, 2});
+}
+
+// ---------------------------------------------------------------------------
+// Full replay pipeline
+// ---------------------------------------------------------------------------
+
+// Throw unless every point is used by a triangle. The collapse bookkeeping
+// ranks unreferenced points like any other, while the replayer drops them.
+template <typename T>
+static void check_referenced(const T *tri, size_t n_tri, size_t n) {
+  std::vector<char> referenced(n, 0);
+  for (size_t i = 0; i < 3 * n_tri; ++i)
+    referenced[(size_t)tri[i]] = 1;
+  for (size_t i = 0; i < n; ++i)
+    if (!referenced[i])
+      throw std::invalid_argument(
+          "``points`` contains points that are not used by any triangle");
+}
+
+// Build the decimated mesh once the first ``n_coll`` collapses have been
+// replayed on the ``n`` points, ``point(i)`` being the position of point
+// ``i`` after those collapses: resolve the indice mapping, split the mapped
+// triangles into triangles and degenerate edges, merge the points that only
+// hang on degenerate edges and compact the points that are left. Produces
+// points of type P and int64 triangles and indice mapping. Returns false if
+// the collapses contain a cycle.
+template <typename P, typename T, typename PointFn>
+static bool build_replayed_mesh(size_t n, PointFn point, const T *tri,
+                                size_t n_tri, const int32_t *cptr,
+                                size_t n_coll, std::vector<P> &out_points,
+                                std::vector<int64_t> &out_triangles,
+                                std::vector<int64_t> &out_mapping) {
+  std::vector<int32_t> imap(n);
+  if (!resolve_indice_mapping(cptr, n_coll, n, imap.data()))
+    return false;
+
+  // the points that survive the collapses, in the order of their rank
+  std::vector<char> removed(n, 0);
+  for (size_t k = 0; k < n_coll; ++k)
+    removed[(size_t)cptr[2 * k + 1]] = 1;
+  std::vector<int32_t> dec_ids;
+  for (size_t i = 0; i < n; ++i)
+    if (!removed[i])
+      dec_ids.push_back((int32_t)i);
+  size_t n_dec = dec_ids.size();
+
+  std::vector<int32_t> tris(3 * n_tri);
+  std::vector<int32_t> edges(2 * n_tri);
+  size_t n_tris_out = 0, n_edges = 0;
+  for (size_t i = 0; i < 3 * n_tri; ++i)
+    tris[i] = imap[(size_t)tri[i]];
+  split_triangles_and_edges(tris.data(), n_tri, tris.data(), n_tris_out,
+                            edges.data(), n_edges);
+
+  std::vector<int64_t> map(n_dec);
+  std::vector<int> level;
+  resolve_isolated_points(n_dec, edges.data(), n_edges, tris.data(),
+                          3 * n_tris_out, map.data(), level);
+
+  // drop the merged and isolated points; every point is shifted down by the
+  // number of removed points up to and including it
+  std::vector<int64_t> shift(n_dec);
+  int64_t n_removed = 0;
+  out_points.clear();
+  out_points.reserve(3 * n_dec);
+  for (size_t i = 0; i < n_dec; ++i) {
+    if (map[i] != (int64_t)i || level[i] == -1) {
+      ++n_removed;
+    } else {
+      const vec3f &p = point((size_t)dec_ids[i]);
+      out_points.push_back((P)p.x);
+      out_points.push_back((P)p.y);
+      out_points.push_back((P)p.z);
+    }
+    shift[i] = (int64_t)i - n_removed;
+  }
+  for (size_t i = 0; i < n_dec; ++i)
+    map[i] = shift[(size_t)map[i]];
+
+  out_triangles.resize(3 * n_tris_out);
+  for (size_t i = 0; i < 3 * n_tris_out; ++i)
+    out_triangles[i] = map[(size_t)tris[i]];
+  out_mapping.resize(n);
+  for (size_t i = 0; i < n; ++i)
+    out_mapping[i] = map[(size_t)imap[i]];
+  return true;
+}
+
+// Wrap the buffers of build_replayed_mesh as ``(points, triangles,
+// indice_mapping)``.
+template <typename P>
+static nb::tuple wrap_replayed_mesh(std::vector<P> &&points,
+                                    std::vector<int64_t> &&triangles,
+                                    std::vector<int64_t> &&mapping) {
+  size_t n_points = points.size() / 3, n_tri = triangles.size() / 3;
+  size_t n = mapping.size();
+  auto points_arr = WrapVector<P, 2>(std::move(points), {n_points, 3});
+  auto triangles_arr = WrapVector<int64_t, 2>(std::move(triangles), {n_tri, 3});
+  auto mapping_arr = WrapVector<int64_t, 1>(std::move(mapping), {n});
+  return nb::make_tuple(points_arr, triangles_arr, mapping_arr);
+}
+
+// Replay ``collapses`` on the mesh and build the final decimated mesh in one
+// native call. Every point must be used by a triangle. Returns ``(points,
+// triangles, indice_mapping)`` with points of the input dtype and int64
+// indices.
+template <typename S, typename T>
+static nb::tuple replay_full(InArray<S, 2> points, InArray<T, 2> triangles,
+                             InArray<int32_t, 2> collapses) {
+  if (points.shape(1) != 3 || triangles.shape(1) != 3 ||
+      collapses.shape(1) != 2)
+    throw std::invalid_argument(
+        "Expected (n, 3) points, (n, 3) triangles and (n, 2) collapses");
+  size_t n = points.shape(0);
+  size_t n_tri = triangles.shape(0);
+  size_t n_coll = collapses.shape(0);
+  T *tri = n_tri ? triangles.data() : nullptr;
+  int32_t *cptr = n_coll ? collapses.data() : nullptr;
+  check_indices(tri, 3 * n_tri, n, "triangles");
+  check_indices(cptr, 2 * n_coll, n, "collapses");
+  check_referenced(tri, n_tri, n);
+
+  std::vector<S> out_points;
+  std::vector<int64_t> out_triangles, out_mapping;
+  bool valid;
+  {
+    nb::gil_scoped_release release;
+    Replay::Replayer s;
+    Replay::load_points(s, (int)n, n ? points.data() : nullptr);
+    Replay::load_triangles(s, (int)n_tri, tri);
+    Replay::load_collapses(s, (int)n_coll, cptr);
+    s.begin_replay();
+    s.replay_collapses(0, (int)n_coll);
+    s.triangles.clear();
+    s.triangles.shrink_to_fit();
+    valid = build_replayed_mesh(
+        n, [&](size_t i) -> const vec3f & { return s.vertices[i].p; }, tri,
+        n_tri, cptr, n_coll, out_points, out_triangles, out_mapping);
+  }
+  if (!valid)
+    throw std::invalid_argument("``collapses`` contains a cycle");
+  return wrap_replayed_mesh(std::move(out_points), std::move(out_triangles),
+                            std::move(out_mapping));
+}
+
+// Read-only positions, possibly a view of a mapped collapse history file.
+using PositionArray =
+    nb::ndarray<const double, nb::ndim<2>, nb::c_contig, nb::device::cpu>;
+
+// Replay ``collapses`` using the position recorded for every collapse
+// instead of recomputing it from the quadrics: each collapse only moves its
+// surviving vertex, so the replay is a scatter and the positions are exactly
+// those of the simplification. Returns ``(points, triangles,
+// indice_mapping)`` with points of the input dtype and int64 indices.
+template <typename S, typename T>
+static nb::tuple replay_positions(InArray<S, 2> points, InArray<T, 2> triangles,
+                                  InArray<int32_t, 2> collapses,
+                                  PositionArray positions) {
+  if (points.shape(1) != 3 || triangles.shape(1) != 3 ||
+      collapses.shape(1) != 2)
+    throw std::invalid_argument(
+        "Expected (n, 3) points, (n, 3) triangles and (n, 2) collapses");
+  size_t n = points.shape(0);
+  size_t n_tri = triangles.shape(0);
+  size_t n_coll = collapses.shape(0);
+  if (positions.shape(0) != n_coll || positions.shape(1) != 3)
+    throw std::invalid_argument(
+        "Expected one (x, y, z) position per collapse in ``positions``");
+  T *tri = n_tri ? triangles.data() : nullptr;
+  int32_t *cptr = n_coll ? collapses.data() : nullptr;
+  check_indices(tri, 3 * n_tri, n, "triangles");
+  check_indices(cptr, 2 * n_coll, n, "collapses");
+  check_referenced(tri, n_tri, n);
+
+  std::vector<S> out_points;
+  std::vector<int64_t> out_triangles, out_mapping;
+  bool valid;
+  {
+    nb::gil_scoped_release release;
+    const S *pts = points.data();
+    const double *pos = positions.data();
+    std::vector<vec3f> moved(n);
+    for (size_t i = 0; i < n; ++i)
+      moved[i] = vec3f(pts[3 * i], pts[3 * i + 1], pts[3 * i + 2]);
+    for (size_t k = 0; k < n_coll; ++k)
+      moved[(size_t)cptr[2 * k]] =
+          vec3f(pos[3 * k], pos[3 * k + 1], pos[3 * k + 2]);
+    valid = build_replayed_mesh(
+        n, [&](size_t i) -> const vec3f & { return moved[i]; }, tri, n_tri,
+        cptr, n_coll, out_points, out_triangles, out_mapping);
+  }
+  if (!valid)
+    throw std::invalid_argument("``collapses`` contains a cycle");
+  return wrap_replayed_mesh(std::move(out_points), std::move(out_triangles),
+                            std::move(out_mapping));
+}
+
+// ---------------------------------------------------------------------------
+// Progressive replay
+// ---------------------------------------------------------------------------
+
+// A mesh whose quadrics are computed once and whose collapses can then be
+// replayed up to any collapse count. Moving forward only replays the
+// collapses in between; moving backward restores the vertices saved after
+// the quadrics were computed instead of reloading the mesh.
+struct ReplaySession {
+  Replay::Replayer s;
+  std::vector<Replay::Vertex> initial;
+  std::vector<int32_t> triangles;
+  int position = 0;
+};
+
+template <typename S, typename T>
+static void session_init(ReplaySession *self, InArray<S, 2> points,
+                         InArray<T, 2> triangles,
+                         InArray<int32_t, 2> collapses) {
+  if (points.shape(1) != 3 || triangles.shape(1) != 3 ||
+      collapses.shape(1) != 2)
+    throw std::invalid_argument(
+        "Expected (n, 3) points, (n, 3) triangles and (n, 2) collapses");
+  size_t n = points.shape(0);
+  size_t n_tri = triangles.shape(0);
+  size_t n_coll = collapses.shape(0);
+  T *tri = n_tri ? triangles.data() : nullptr;
+  int32_t *cptr = n_coll ? collapses.data() : nullptr;
+  check_indices(tri, 3 * n_tri, n, "triangles");
+  check_indices(cptr, 2 * n_coll, n, "collapses");
+  check_referenced(tri, n_tri, n);
+
+  ReplaySession *session = new (self) ReplaySession();
+  nb::gil_scoped_release release;
+  Replay::Replayer &s = session->s;
+  Replay::load_points(s, (int)n, n ? points.data() : nullptr);
+  Replay::load_triangles(s, (int)n_tri, tri);
+  Replay::load_collapses(s, (int)n_coll, cptr);
+  s.begin_replay();
+  session->triangles.assign(tri, tri + 3 * n_tri);
+  s.triangles.clear();
+  s.triangles.shrink_to_fit();
+  s.refs.clear();
+  s.refs.shrink_to_fit();
+  session->initial = s.vertices;
+}
+
+static void session_seek(ReplaySession &self, int n_collapses) {
+  int total = Replay::n_collapses(self.s);
+  if (n_collapses < 0 || n_collapses > total)
+    throw std::invalid_argument("``n_collapses`` must be between 0 and " +
+                                std::to_string(total));
+  nb::gil_scoped_release release;
+  if (n_collapses < self.position) {
+    self.s.vertices = self.initial;
+    self.position = 0;
+  }
+  self.s.replay_collapses(self.position, n_collapses);
+  self.position = n_collapses;
+}
+
+template <typename P>
+static nb::tuple session_mesh_as(ReplaySession &self) {
+  std::vector<P> out_points;
+  std::vector<int64_t> out_triangles, out_mapping;
+  bool valid;
+  {
+    nb::gil_scoped_release release;
+    const int32_t *cptr = self.position ? self.s.collapses.data() : nullptr;
+    const std::vector<Replay::Vertex> &vertices = self.s.vertices;
+    valid = build_replayed_mesh(
+        vertices.size(),
+        [&](size_t i) -> const vec3f & { return vertices[i].p; },
+        self.triangles.data(), self.triangles.size() / 3, cptr,
+        (size_t)self.position, out_points, out_triangles, out_mapping);
+  }
+  if (!valid)
+    throw std::invalid_argument("``collapses`` contains a cycle");
+  return wrap_replayed_mesh(std::move(out_points), std::move(out_triangles),
+                            std::move(out_mapping));
+}
+
+static nb::tuple session_mesh(ReplaySession &self) {
+  if (self.s.single_precision)
+    return session_mesh_as<float>(self);
+  return session_mesh_as<double>(self);
+}
+
+// ---------------------------------------------------------------------------
+// Point data
+// ---------------------------------------------------------------------------
+
+// Read-only (n, k) data array, float32 or float64.
+using DataArray =
+    nb::ndarray<nb::ro, nb::ndim<2>, nb::c_contig, nb::device::cpu>;
+
+// Read-only point mapping, -1 for the points that were dropped.
+using MappingArray =
+    nb::ndarray<const int64_t, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+enum class Reduction { Mean, First, Max };
+
+// Reduce the rows of ``data`` that ``map`` sends to the same output row. The
+// input is streamed once in order; the mean is accumulated in double.
+template <typename S>
+static void reduce_rows(const S *data, size_t n, size_t k, const int64_t *map,
+                        const std::vector<int64_t> &counts, Reduction mode,
+                        S *out, size_t n_out) {
+  if (mode == Reduction::Mean) {
+    std::vector<double> acc(n_out * k, 0.0);
+    for (size_t i = 0; i < n; ++i) {
+      if (map[i] < 0)
+        continue;
+      double *dst = acc.data() + (size_t)map[i] * k;
+      const S *src = data + i * k;
+      for (size_t c = 0; c < k; ++c)
+        dst[c] += src[c];
+    }
+    for (size_t j = 0; j < n_out; ++j) {
+      double scale = counts[j] ? 1.0 / (double)counts[j] : 0.0;
+      for (size_t c = 0; c < k; ++c)
+        out[j * k + c] = (S)(acc[j * k + c] * scale);
+    }
+    return;
+  }
+  std::vector<char> seen(n_out, 0);
+  std::fill(out, out + n_out * k, (S)0);
+  for (size_t i = 0; i < n; ++i) {
+    if (map[i] < 0)
+      continue;
+    size_t j = (size_t)map[i];
+    S *dst = out + j * k;
+    const S *src = data + i * k;
+    if (!seen[j]) {
+      seen[j] = 1;
+      std::copy(src, src + k, dst);
+    } else if (mode == Reduction::Max) {
+      for (size_t c = 0; c < k; ++c)
+        dst[c] = std::max(dst[c], src[c]);
+    }
+  }
+}
+
+// Reduce every ``(n, k)`` array onto the ``n_out`` points of a decimated mesh,
+// point ``i`` contributing to point ``mapping[i]``. Returns one ``(n_out, k)``
+// array per input, in the dtype of that input.
+static nb::list reduce_point_data(std::vector<DataArray> arrays,
+                                  MappingArray mapping, size_t n_out,
+                                  const std::string &reduction) {
+  Reduction mode;
+  if (reduction == "mean")
+    mode = Reduction::Mean;
+  else if (reduction == "first")
+    mode = Reduction::First;
+  else if (reduction == "max")
+    mode = Reduction::Max;
+  else
+    throw std::invalid_argument(
+        "``reduction`` must be 'mean', 'first' or 'max'");
+
+  size_t n = mapping.shape(0);
+  const int64_t *map = n ? mapping.data() : nullptr;
+  std::vector<int64_t> counts(n_out, 0);
+  for (size_t i = 0; i < n; ++i) {
+    if (map[i] >= (int64_t)n_out)
+      throw std::invalid_argument(
+          "``mapping`` contains an index outside of the decimated points");
+    if (map[i] >= 0)
+      ++counts[(size_t)map[i]];
+  }
+  for (const DataArray &a : arrays) {
+    if (a.shape(0) != n)
+      throw std::invalid_argument(
+          "Every array must have one row per point of ``mapping``");
+    if (a.dtype() != nb::dtype<float>() && a.dtype() != nb::dtype<double>())
+      throw std::invalid_argument("Point data must be float32 or float64");
+  }
+
+  nb::list out;
+  for (const DataArray &a : arrays) {
+    size_t k = a.shape(1);
+    if (a.dtype() == nb::dtype<float>()) {
+      auto arr = MakeNDArray<float, 2>({(int)n_out, (int)k});
+      {
+        nb::gil_scoped_release release;
+        reduce_rows((const float *)a.data(), n, k, map, counts, mode,
+                    arr.data(), n_out);
+      }
+      out.append(arr);
+    } else {
+      auto arr = MakeNDArray<double, 2>({(int)n_out, (int)k});
+      {
+        nb::gil_scoped_release release;
+        reduce_rows((const double *)a.data(), n, k, map, counts, mode,
+                    arr.data(), n_out);
+      }
+      out.append(arr);
+    }
+  }
+  return out;
+}
+
 // ---------------------------------------------------------------------------
 // Module
 // ---------------------------------------------------------------------------
 
 NB_MODULE(_replay, m) {
-  m.def("load_int32", &load_int32, "n_points"_a, "n_faces"_a, "n_collapses"_a,
-        "points"_a, "faces"_a, "collapses"_a);
-  m.def("load_int64", &load_int64, "n_points"_a, "n_faces"_a, "n_collapses"_a,
-        "points"_a, "faces"_a, "collapses"_a);
-  m.def("load_from_vtk", &load_from_vtk, "n_points"_a, "points"_a, "faces"_a,
-        "n_faces"_a);
-  m.def("replay", &replay);
-  m.def("save_obj", &save_obj, "filename"_a);
-  m.def("read", &read_obj, "filename"_a);
-  m.def("return_points", &return_points);
-  m.def("return_triangles", &return_triangles);
-  m.def("return_collapses", &return_collapses);
-  m.def("return_faces_int32_no_padding", &return_faces_int32_no_padding);
-  m.def("return_faces_int32", &return_faces_int32);
-  m.def("return_faces_int64", &return_faces_int64);
+  nb::class_<Replay::Replayer>(m, "Replayer")
+      .def(nb::init<>())
+      .def("load_int32", &load_int32<float>, "n_points"_a, "n_faces"_a,
+           "n_collapses"_a, "points"_a, "faces"_a, "collapses"_a)
+      .def("load_int32", &load_int32<double>, "n_points"_a, "n_faces"_a,
+           "n_collapses"_a, "points"_a, "faces"_a, "collapses"_a)
+      .def("load_int64", &load_int64<float>, "n_points"_a, "n_faces"_a,
+           "n_collapses"_a, "points"_a, "faces"_a, "collapses"_a)
+      .def("load_int64", &load_int64<double>, "n_points"_a, "n_faces"_a,
+           "n_collapses"_a, "points"_a, "faces"_a, "collapses"_a)
+      .def("load_from_vtk", &load_from_vtk<float>, "n_points"_a, "points"_a,
+           "faces"_a, "n_faces"_a)
+      .def("load_from_vtk", &load_from_vtk<double>, "n_points"_a, "points"_a,
+           "faces"_a, "n_faces"_a)
+      .def("replay", &replay)
+      .def("save_obj", &save_obj, "filename"_a)
+      .def("read", &read_obj, "filename"_a)
+      .def("return_points", &return_points)
+      .def("return_triangles", &return_triangles)
+      .def("return_collapses", &return_collapses)
+      .def("return_faces_int32_no_padding", &return_faces_int32_no_padding)
+      .def("return_faces_int32", &return_faces_int32)
+      .def("return_faces_int64", &return_faces_int64)
+      .def("n_points", &Replay::n_points)
+      .def("n_triangles", &Replay::n_triangles)
+      .def("n_collapses", &Replay::n_collapses);
+
   m.def("compute_indice_mapping", &compute_indice_mapping, "collapses"_a,
         "n_points"_a);
   m.def("clean_triangles_and_edges", &clean_triangles_and_edges,
         "mapped_triangles"_a, "clean_edges"_a = false);
-  m.def("n_points", &Replay::n_points);
-  m.def("n_triangles", &Replay::n_triangles);
-  m.def("n_collapses", &Replay::n_collapses);
+  nb::class_<ReplaySession>(m, "ReplaySession")
+      .def("__init__", &session_init<float, int32_t>, "points"_a, "triangles"_a,
+           "collapses"_a)
+      .def("__init__", &session_init<float, int64_t>, "points"_a, "triangles"_a,
+           "collapses"_a)
+      .def("__init__", &session_init<double, int32_t>, "points"_a,
+           "triangles"_a, "collapses"_a)
+      .def("__init__", &session_init<double, int64_t>, "points"_a,
+           "triangles"_a, "collapses"_a)
+      .def("seek", &session_seek, "n_collapses"_a)
+      .def("mesh", &session_mesh)
+      .def_ro("position", &ReplaySession::position)
+      .def_prop_ro("n_collapses", [](const ReplaySession &self) {
+        return Replay::n_collapses(self.s);
+      });
+
+  m.def("encode_collapses", &encode_collapses, "collapses"_a);
+  m.def("decode_collapses", &decode_collapses, "data"_a, "n_collapses"_a);
+  m.def("replay_full", &replay_full<float, int32_t>, "points"_a, "triangles"_a,
+        "collapses"_a);
+  m.def("replay_full", &replay_full<float, int64_t>, "points"_a, "triangles"_a,
+        "collapses"_a);
+  m.def("replay_full", &replay_full<double, int32_t>, "points"_a, "triangles"_a,
+        "collapses"_a);
+  m.def("replay_full", &replay_full<double, int64_t>, "points"_a, "triangles"_a,
+        "collapses"_a);
+  m.def("replay_positions", &replay_positions<float, int32_t>, "points"_a,
+        "triangles"_a, "collapses"_a, "positions"_a);
+  m.def("replay_positions", &replay_positions<float, int64_t>, "points"_a,
+        "triangles"_a, "collapses"_a, "positions"_a);
+  m.def("replay_positions", &replay_positions<double, int32_t>, "points"_a,
+        "triangles"_a, "collapses"_a, "positions"_a);
+  m.def("replay_positions", &replay_positions<double, int64_t>, "points"_a,
+        "triangles"_a, "collapses"_a, "positions"_a);
+  m.def("reduce_point_data", &reduce_point_data, "arrays"_a, "mapping"_a,
+        "n_out"_a, "reduction"_a = "mean");
+  m.def("map_isolated_points", &map_isolated_points, "n_points"_a, "edges"_a,
+        "triangles"_a);
 }
@@ -1,17 +1,22 @@
 // nanobind bindings for the Fast-Quadric-Mesh-Simplification core.
 //
 // This module mirrors the surface previously provided by the Cython module
-// ``fast_simplification._simplify``. The C++ core (Simplify.h / wrapper.h) is
-// unchanged; only the Python binding layer is reimplemented on nanobind.
+// ``fast_simplification._simplify``. All mesh state lives in a
+// ``Simplify::Simplifier`` instance exposed as ``Simplifier``, so independent
+// meshes can be decimated concurrently, each through its own instance. The
+// heavy loops (load, simplify, result extraction) run with the GIL released.
 
+#include <climits>
 #include <cstdint>
 #include <cstdlib>
 #include <stdexcept>
 #include <string>
+#include <vector>
 
 #include <nanobind/nanobind.h>
 #include <nanobind/ndarray.h>
 #include <nanobind/stl/string.h>
+#include <nanobind/stl/vector.h>
 
 #include "array_support.h"
 #include "wrapper.h"
@@ -23,100 +28,502 @@ using namespace nb::literals;
 // Loaders
 // ---------------------------------------------------------------------------
 
-static void load_int32(int n_points, int n_faces,
-                       InArray<double, 2> points,
-                       InArray<int32_t, 2> faces) {
-  Simplify::load_arrays_int32(n_points, n_faces, points.data(), faces.data());
+// Triangle ids are packed into 30 bits in the core, so larger meshes are
+// rejected instead of wrapping around.
+static void check_n_faces(size_t n_faces) {
+  if (n_faces > (size_t)Simplify::MAX_TRIANGLES)
+    throw std::invalid_argument(
+        "``faces`` has too many faces, at most 2**30 - 1 are supported");
+}
+
+static void load_int32(Simplify::Simplifier &self, int n_points, int n_faces,
+                       InArray<double, 2> points, InArray<int32_t, 2> faces) {
+  check_n_faces(n_faces);
+  nb::gil_scoped_release release;
+  Simplify::ScopedTimer timer(self.stats.time_load);
+  Simplify::load_arrays_int32(self, n_points, n_faces, points.data(),
+                              faces.data());
+}
+
+static void load_int64(Simplify::Simplifier &self, int n_points, int n_faces,
+                       InArray<double, 2> points, InArray<int64_t, 2> faces) {
+  check_n_faces(n_faces);
+  nb::gil_scoped_release release;
+  Simplify::ScopedTimer timer(self.stats.time_load);
+  Simplify::load_arrays_int64(self, n_points, n_faces, points.data(),
+                              faces.data());
+}
+
+// Read-only (n, 3) points or faces of any supported dtype and any strides.
+// The dtype is dispatched at load time, so NumPy arrays are read in place.
+using MeshArray = nb::ndarray<nb::ro, nb::ndim<2>, nb::device::cpu>;
+
+// VTK-padded connectivity, int32 or int64.
+using VTKFaces =
+    nb::ndarray<nb::ro, nb::ndim<1>, nb::c_contig, nb::device::cpu>;
+
+static void check_points(const MeshArray &points) {
+  if (points.shape(1) != 3)
+    throw std::invalid_argument("Expected ``points`` array to be (n, 3)");
+  if (points.dtype() != nb::dtype<float>() &&
+      points.dtype() != nb::dtype<double>())
+    throw std::invalid_argument("``points`` must be float32 or float64");
+  if (points.shape(0) > INT_MAX)
+    throw std::invalid_argument("``points`` has too many points");
+}
+
+static void check_mesh(const MeshArray &points, const MeshArray &faces) {
+  check_points(points);
+  if (faces.shape(1) != 3)
+    throw std::invalid_argument("Expected ``faces`` array to be (n, 3)");
+  if (faces.dtype() != nb::dtype<int32_t>() &&
+      faces.dtype() != nb::dtype<int64_t>() &&
+      faces.dtype() != nb::dtype<uint32_t>())
+    throw std::invalid_argument("``faces`` must be int32, int64 or uint32");
+  check_n_faces(faces.shape(0));
+}
+
+static void load_points_any(Simplify::Simplifier &s, const MeshArray &points) {
+  int n = (int)points.shape(0);
+  if (points.dtype() == nb::dtype<float>())
+    Simplify::load_points(s, n, (const float *)points.data(), points.stride(0),
+                          points.stride(1));
+  else
+    Simplify::load_points(s, n, (const double *)points.data(), points.stride(0),
+                          points.stride(1));
+}
+
+// Fill the Simplifier from arrays validated by check_mesh in a single pass
+// with no intermediate copies. Returns false if a face index is out of range.
+static bool load_mesh(Simplify::Simplifier &s, const MeshArray &points,
+                      const MeshArray &faces) {
+  load_points_any(s, points);
+  int n_points = (int)points.shape(0);
+  int n_faces = (int)faces.shape(0);
+  int64_t s0 = faces.stride(0), s1 = faces.stride(1);
+  if (faces.dtype() == nb::dtype<int32_t>())
+    return Simplify::load_triangles(s, n_faces, (const int32_t *)faces.data(),
+                                    s0, s1, n_points);
+  if (faces.dtype() == nb::dtype<int64_t>())
+    return Simplify::load_triangles(s, n_faces, (const int64_t *)faces.data(),
+                                    s0, s1, n_points);
+  return Simplify::load_triangles(s, n_faces, (const uint32_t *)faces.data(),
+                                  s0, s1, n_points);
 }
 
-static void load_int64(int n_points, int n_faces,
-                       InArray<double, 2> points,
-                       InArray<int64_t, 2> faces) {
-  Simplify::load_arrays_int64(n_points, n_faces, points.data(), faces.data());
+static void load(Simplify::Simplifier &self, MeshArray points,
+                 MeshArray faces) {
+  check_mesh(points, faces);
+  bool valid;
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_load);
+    valid = load_mesh(self, points, faces);
+  }
+  if (!valid)
+    throw std::invalid_argument(
+        "``faces`` contains indices outside the range of ``points``");
 }
 
-static void load_from_vtk(int n_points, InArray<double, 2> points,
-                          InArray<int32_t, 1> faces, int n_faces) {
-  int result = Simplify::load_triangles_from_vtk(n_faces, faces.data());
+static void load_from_vtk(Simplify::Simplifier &self, int n_points,
+                          MeshArray points, VTKFaces faces, int n_faces) {
+  check_points(points);
+  check_n_faces(n_faces);
+  bool is_int64 = faces.dtype() == nb::dtype<int64_t>();
+  if (!is_int64 && faces.dtype() != nb::dtype<int32_t>())
+    throw std::invalid_argument("``faces`` must be int32 or int64");
+  if (faces.shape(0) != (size_t)n_faces * 4 ||
+      points.shape(0) != (size_t)n_points) {
+    throw std::invalid_argument(
+        "Input mesh ``mesh`` must consist of only triangles.\n"
+        "Run ``.triangulate()`` to convert to an all triangle mesh.");
+  }
+  int result;
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_load);
+    if (is_int64)
+      result = Simplify::load_triangles_from_vtk(self, n_faces,
+                                                 (const int64_t *)faces.data());
+    else
+      result = Simplify::load_triangles_from_vtk(self, n_faces,
+                                                 (const int32_t *)faces.data());
+    if (!result)
+      load_points_any(self, points);
+  }
   if (result) {
     throw std::invalid_argument(
         "Input mesh ``mesh`` must consist of only triangles.\n"
         "Run ``.triangulate()`` to convert to an all triangle mesh.");
   }
-  Simplify::load_points(n_points, points.data());
 }
 
 // ---------------------------------------------------------------------------
 // Simplification
 // ---------------------------------------------------------------------------
 
-static void simplify(int target_count, double aggressiveness, bool verbose,
+static void simplify(Simplify::Simplifier &self, int target_count,
+                     double aggressiveness, bool verbose,
                      bool preserve_border) {
-  Simplify::simplify_mesh(target_count, aggressiveness, verbose, preserve_border);
+  nb::gil_scoped_release release;
+  self.simplify_mesh(target_count, aggressiveness, verbose, preserve_border);
 }
 
-static void simplify_lossless(bool verbose, bool preserve_border) {
-  Simplify::simplify_mesh_lossless(verbose, preserve_border);
+static void simplify_heap(Simplify::Simplifier &self, int target_count,
+                          bool verbose, bool preserve_border) {
+  nb::gil_scoped_release release;
+  self.simplify_mesh_heap(target_count, verbose, preserve_border);
 }
 
-static void save_obj(const std::string &filename) {
-  Simplify::write_obj(filename.c_str());
+static void simplify_partitioned(Simplify::Simplifier &self, int target_count,
+                                 int n_partitions, double aggressiveness,
+                                 bool lossless, bool heap, bool verbose,
+                                 bool preserve_border, int n_threads) {
+  nb::gil_scoped_release release;
+  Simplify::simplify_partitioned(self, target_count, n_partitions,
+                                 aggressiveness, lossless, heap, verbose,
+                                 preserve_border, n_threads);
 }
 
-static void read_obj(const std::string &filename) {
-  Simplify::load_obj(filename.c_str(), false);
+static void simplify_lossless(Simplify::Simplifier &self, bool verbose,
+                              bool preserve_border) {
+  nb::gil_scoped_release release;
+  self.simplify_mesh_lossless(verbose, preserve_border);
 }
 
 // ---------------------------------------------------------------------------
-// Result accessors
+// Interruption
 // ---------------------------------------------------------------------------
 
-static NDArray<double, 2> return_points() {
-  int n = Simplify::n_points();
-  auto arr = MakeNDArray<double, 2>({n, 3});
-  Simplify::get_points(arr.data());
+// The token is kept alive by the Simplifier, so another thread can cancel it
+// while the simplification runs without the GIL. ``None`` clears it.
+static void set_cancel_token(Simplify::Simplifier &self,
+                             const Simplify::CancelToken *token) {
+  self.cancel_token = token;
+}
+
+static void cancel(Simplify::CancelToken &token) { token.cancelled = true; }
+
+static void reset(Simplify::CancelToken &token) { token.cancelled = false; }
+
+static bool cancelled(const Simplify::CancelToken &token) {
+  return token.cancelled;
+}
+
+// ---------------------------------------------------------------------------
+// Progress and statistics
+// ---------------------------------------------------------------------------
+
+// ``callback(n_collapses, n_triangles)`` runs with the GIL held for the
+// duration of the call only. An exception it raises aborts the
+// simplification and propagates to the caller. ``None`` clears it.
+static void set_progress(Simplify::Simplifier &self, nb::object callback,
+                         int interval) {
+  if (interval < 1)
+    throw std::invalid_argument("``progress_interval`` must be at least 1");
+  if (callback.is_none()) {
+    self.progress = nullptr;
+    return;
+  }
+  self.progress_interval = interval;
+  self.progress = [callback](int n_collapses, int n_triangles) {
+    nb::gil_scoped_acquire acquire;
+    callback(n_collapses, n_triangles);
+  };
+}
+
+static nb::dict return_stats(Simplify::Simplifier &self) {
+  const Simplify::Stats &stats = self.stats;
+  nb::dict out;
+  out["iterations"] = stats.iterations;
+  out["thresholds"] = WrapVector<double, 1>(
+      std::vector<double>(stats.thresholds), {stats.thresholds.size()});
+  out["candidates"] = stats.candidates;
+  out["collapsed"] = stats.collapsed;
+  out["rejected_border"] = stats.rejected_border;
+  out["rejected_flipped"] = stats.rejected_flipped;
+  out["interrupted"] = self.interrupted;
+  out["time_load"] = stats.time_load;
+  out["time_update_mesh"] = stats.time_update_mesh;
+  out["time_collapse"] = stats.time_collapse;
+  out["time_compact"] = stats.time_compact;
+  out["time_export"] = stats.time_export;
+  return out;
+}
+
+static void save_obj(Simplify::Simplifier &self, const std::string &filename) {
+  self.write_obj(filename.c_str());
+}
+
+static void read_obj(Simplify::Simplifier &self, const std::string &filename) {
+  self.load_obj(filename.c_str(), false);
+  check_n_faces(self.triangles.size());
+}
+
+// ---------------------------------------------------------------------------
+// Result accessors (points are returned in the dtype they were loaded with)
+// ---------------------------------------------------------------------------
+
+template <typename S>
+static NDArray<S, 2> points_as(Simplify::Simplifier &self) {
+  int n = Simplify::n_points(self);
+  auto arr = MakeNDArray<S, 2>({n, 3});
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_export);
+    Simplify::get_points(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 2> return_triangles() {
-  int n = Simplify::n_triangles();
+static nb::object return_points(Simplify::Simplifier &self) {
+  if (self.single_precision)
+    return nb::cast(points_as<float>(self));
+  return nb::cast(points_as<double>(self));
+}
+
+static NDArray<int32_t, 2> return_triangles(Simplify::Simplifier &self) {
+  int n = Simplify::n_triangles(self);
   auto arr = MakeNDArray<int32_t, 2>({n, 3});
-  Simplify::get_triangles(arr.data());
+  {
+    nb::gil_scoped_release release;
+    Simplify::get_triangles(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 2> return_collapses() {
-  int n = Simplify::n_collapses();
-  auto arr = MakeNDArray<int32_t, 2>({n, 2});
-  Simplify::get_collapses(arr.data());
+// The collapse log is moved into the returned array without a copy, so it
+// can be returned once per simplification; later calls return an empty array.
+static NDArray<int32_t, 2> return_collapses(Simplify::Simplifier &self) {
+  size_t n = Simplify::n_collapses(self);
+  return WrapVector<int32_t, 2>(std::move(self.collapses), {n, 2});
+}
+
+// Positions recorded with ``record_positions``, moved out like the collapses.
+static NDArray<double, 2>
+return_collapse_positions(Simplify::Simplifier &self) {
+  size_t n = self.collapse_positions.size() / 3;
+  return WrapVector<double, 2>(std::move(self.collapse_positions), {n, 3});
+}
+
+// Faces buffers are sized to the triangles that survive, so nothing is
+// over-allocated when the mesh has not been compacted yet.
+static NDArray<int32_t, 1>
+return_faces_int32_no_padding(Simplify::Simplifier &self) {
+  int n = Simplify::n_live_triangles(self);
+  auto arr = MakeNDArray<int32_t, 1>({n * 3});
+  {
+    nb::gil_scoped_release release;
+    Simplify::get_faces_int32_no_padding(self, arr.data());
+  }
   return arr;
 }
 
-static NDArray<int32_t, 1> return_faces_int32_no_padding() {
-  size_t cap = (size_t)Simplify::n_triangles() * 3;
-  int32_t *buf = (int32_t *)std::malloc((cap ? cap : 1) * sizeof(int32_t));
-  if (!buf)
-    throw std::bad_alloc();
-  int n_tri = Simplify::get_faces_int32_no_padding(buf);
-  return WrapFlat<int32_t>(buf, (size_t)n_tri * 3);
+static NDArray<int32_t, 1> return_faces_int32(Simplify::Simplifier &self) {
+  int n = Simplify::n_live_triangles(self);
+  auto arr = MakeNDArray<int32_t, 1>({n * 4});
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_export);
+    Simplify::get_faces_int32(self, arr.data());
+  }
+  return arr;
 }
 
-static NDArray<int32_t, 1> return_faces_int32() {
-  size_t cap = (size_t)Simplify::n_triangles() * 4;
-  int32_t *buf = (int32_t *)std::malloc((cap ? cap : 1) * sizeof(int32_t));
-  if (!buf)
-    throw std::bad_alloc();
-  int n_tri = Simplify::get_faces_int32(buf);
-  return WrapFlat<int32_t>(buf, (size_t)n_tri * 4);
+static NDArray<int64_t, 1> return_faces_int64(Simplify::Simplifier &self) {
+  int n = Simplify::n_live_triangles(self);
+  auto arr = MakeNDArray<int64_t, 1>({n * 4});
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_export);
+    Simplify::get_faces_int64(self, arr.data());
+  }
+  return arr;
+}
+
+// Export the decimated mesh as ``(points, faces)`` arrays allocated once at
+// their final size and owned by NumPy through a capsule. The core's vertex,
+// triangle and reference buffers are released right after, so the Simplifier
+// holds only the collapse log once this returns.
+template <typename S>
+static nb::tuple export_mesh_as(Simplify::Simplifier &self) {
+  auto points = MakeNDArray<S, 2>({Simplify::n_points(self), 3});
+  auto faces = MakeNDArray<int32_t, 2>({Simplify::n_live_triangles(self), 3});
+  {
+    nb::gil_scoped_release release;
+    Simplify::ScopedTimer timer(self.stats.time_export);
+    Simplify::export_mesh(self, points.data(), faces.data());
+  }
+  return nb::make_tuple(points, faces);
+}
+
+static nb::tuple return_mesh(Simplify::Simplifier &self) {
+  if (self.single_precision)
+    return export_mesh_as<float>(self);
+  return export_mesh_as<double>(self);
 }
 
-static NDArray<int64_t, 1> return_faces_int64() {
-  size_t cap = (size_t)Simplify::n_triangles() * 4;
-  int64_t *buf = (int64_t *)std::malloc((cap ? cap : 1) * sizeof(int64_t));
+// ---------------------------------------------------------------------------
+// Levels of detail
+// ---------------------------------------------------------------------------
+
+// Triangle counts, in decreasing order, at which the next simplify() or
+// simplify_heap() call stores a copy of the mesh.
+static void set_lod_targets(Simplify::Simplifier &self,
+                            std::vector<int> targets) {
+  for (size_t i = 1; i < targets.size(); ++i)
+    if (targets[i] > targets[i - 1])
+      throw std::invalid_argument(
+          "``targets`` must be sorted in decreasing order");
+  self.lod_targets = std::move(targets);
+  self.lod_points.clear();
+  self.lod_faces.clear();
+  self.lod_collapses.clear();
+}
+
+// Hand the stored levels to NumPy as a list of (points, faces, n_collapses)
+// tuples; the snapshots are moved out, so a second call returns an empty
+// list. Snapshots of float32 meshes are narrowed when they are handed out.
+static nb::list return_lods(Simplify::Simplifier &self) {
+  nb::list lods;
+  for (size_t k = 0; k < self.lod_points.size(); ++k) {
+    std::vector<double> &snapshot = self.lod_points[k];
+    size_t n_points = snapshot.size() / 3;
+    size_t n_faces = self.lod_faces[k].size() / 3;
+    nb::object points;
+    if (self.single_precision) {
+      std::vector<float> narrowed(snapshot.begin(), snapshot.end());
+      std::vector<double>().swap(snapshot);
+      points =
+          nb::cast(WrapVector<float, 2>(std::move(narrowed), {n_points, 3}));
+    } else {
+      points =
+          nb::cast(WrapVector<double, 2>(std::move(snapshot), {n_points, 3}));
+    }
+    auto faces =
+        WrapVector<int32_t, 2>(std::move(self.lod_faces[k]), {n_faces, 3});
+    lods.append(nb::make_tuple(points, faces, self.lod_collapses[k]));
+  }
+  self.lod_targets.clear();
+  self.lod_points.clear();
+  self.lod_faces.clear();
+  self.lod_collapses.clear();
+  return lods;
+}
+
+// ---------------------------------------------------------------------------
+// Batch simplification
+// ---------------------------------------------------------------------------
+
+// Decimated mesh copied out of a worker's Simplifier into malloc-backed
+// buffers (the collapse log is moved), so the Simplifier is released as soon
+// as its job finishes. ``points`` holds floats when ``single_precision`` is
+// set and doubles otherwise.
+struct BatchResult {
+  void *points = nullptr;
+  bool single_precision = false;
+  int32_t *faces = nullptr;
+  std::vector<int32_t> collapses;
+  int n_points = 0;
+  int n_triangles = 0;
+};
+
+template <typename T>
+static T *batch_alloc(size_t n) {
+  T *buf = (T *)std::malloc((n ? n : 1) * sizeof(T));
   if (!buf)
     throw std::bad_alloc();
-  int n_tri = Simplify::get_faces_int64(buf);
-  return WrapFlat<int64_t>(buf, (size_t)n_tri * 4);
+  return buf;
+}
+
+static void simplify_batch_job(BatchResult &result, MeshArray &points,
+                               MeshArray &faces, int target_count,
+                               double aggressiveness, bool lossless, bool heap,
+                               bool preserve_border, bool return_collapses) {
+  Simplify::Simplifier s;
+  if (!load_mesh(s, points, faces))
+    throw std::invalid_argument(
+        "``faces`` contains indices outside the range of ``points``");
+
+  if (lossless)
+    s.simplify_mesh_lossless(false, preserve_border);
+  else if (heap)
+    s.simplify_mesh_heap(target_count, false, preserve_border);
+  else
+    s.simplify_mesh(target_count, aggressiveness, false, preserve_border);
+
+  result.n_points = Simplify::n_points(s);
+  result.single_precision = s.single_precision;
+  if (s.single_precision) {
+    float *points = batch_alloc<float>((size_t)result.n_points * 3);
+    Simplify::get_points(s, points);
+    result.points = points;
+  } else {
+    double *points = batch_alloc<double>((size_t)result.n_points * 3);
+    Simplify::get_points(s, points);
+    result.points = points;
+  }
+
+  result.faces = batch_alloc<int32_t>((size_t)Simplify::n_triangles(s) * 3);
+  result.n_triangles = Simplify::get_faces_int32_no_padding(s, result.faces);
+
+  if (return_collapses)
+    result.collapses.swap(s.collapses);
+}
+
+// Simplify every mesh of a batch on a pool of native threads. The whole batch
+// runs without the GIL; only the final wrapping of the outputs holds it.
+static nb::list simplify_many(std::vector<MeshArray> points,
+                              std::vector<MeshArray> faces,
+                              std::vector<int> target_counts,
+                              std::vector<double> aggressiveness, bool lossless,
+                              bool heap, bool preserve_border,
+                              bool return_collapses, int n_threads) {
+  size_t n_meshes = points.size();
+  if (faces.size() != n_meshes || target_counts.size() != n_meshes ||
+      aggressiveness.size() != n_meshes)
+    throw std::invalid_argument(
+        "``points``, ``faces``, ``target_counts`` and ``aggressiveness`` "
+        "must all have one entry per mesh");
+  for (size_t ii = 0; ii < n_meshes; ++ii)
+    check_mesh(points[ii], faces[ii]);
+
+  std::vector<BatchResult> results(n_meshes);
+  try {
+    nb::gil_scoped_release release;
+    Simplify::parallel_for((int)n_meshes, n_threads, [&](int ii) {
+      simplify_batch_job(results[ii], points[ii], faces[ii], target_counts[ii],
+                         aggressiveness[ii], lossless, heap, preserve_border,
+                         return_collapses);
+    });
+  } catch (...) {
+    for (BatchResult &r : results) {
+      std::free(r.points);
+      std::free(r.faces);
+    }
+    throw;
+  }
+
+  nb::list out;
+  for (BatchResult &r : results) {
+    nb::object pts;
+    if (r.single_precision)
+      pts = nb::cast(
+          WrapNDArray<float, 2>((float *)r.points, {(size_t)r.n_points, 3}));
+    else
+      pts = nb::cast(
+          WrapNDArray<double, 2>((double *)r.points, {(size_t)r.n_points, 3}));
+    auto tris = WrapNDArray<int32_t, 2>(r.faces, {(size_t)r.n_triangles, 3});
+    if (return_collapses) {
+      size_t n_collapses = r.collapses.size() / 2;
+      auto coll =
+          WrapVector<int32_t, 2>(std::move(r.collapses), {n_collapses, 2});
+      out.append(nb::make_tuple(pts, tris, coll));
+    } else {
+      out.append(nb::make_tuple(pts, tris));
+    }
+  }
+  return out;
 }
 
 // ---------------------------------------------------------------------------
@@ -124,25 +531,61 @@ static NDArray<int64_t, 1> return_faces_int64() {
 // ---------------------------------------------------------------------------
 
 NB_MODULE(_simplify, m) {
-  m.def("load_int32", &load_int32, "n_points"_a, "n_faces"_a, "points"_a,
-        "faces"_a);
-  m.def("load_int64", &load_int64, "n_points"_a, "n_faces"_a, "points"_a,
-        "faces"_a);
-  m.def("load_from_vtk", &load_from_vtk, "n_points"_a, "points"_a, "faces"_a,
-        "n_faces"_a);
-  m.def("simplify", &simplify, "target_count"_a, "aggressiveness"_a = 7.0,
-        "verbose"_a = false, "preserve_border"_a = false);
-  m.def("simplify_lossless", &simplify_lossless, "verbose"_a = false,
-        "preserve_border"_a = false);
-  m.def("save_obj", &save_obj, "filename"_a);
-  m.def("read", &read_obj, "filename"_a);
-  m.def("return_points", &return_points);
-  m.def("return_triangles", &return_triangles);
-  m.def("return_collapses", &return_collapses);
-  m.def("return_faces_int32_no_padding", &return_faces_int32_no_padding);
-  m.def("return_faces_int32", &return_faces_int32);
-  m.def("return_faces_int64", &return_faces_int64);
-  m.def("n_points", &Simplify::n_points);
-  m.def("n_triangles", &Simplify::n_triangles);
-  m.def("n_collapses", &Simplify::n_collapses);
+  nb::class_<Simplify::CancelToken>(
+      m, "CancellationToken",
+      "Flag that stops a running :func:`simplify` from another thread.")
+      .def(nb::init<>())
+      .def("cancel", &cancel)
+      .def("reset", &reset)
+      .def_prop_ro("cancelled", &cancelled);
+
+  nb::class_<Simplify::Simplifier>(m, "Simplifier")
+      .def(nb::init<>())
+      .def_rw("n_threads", &Simplify::Simplifier::n_threads)
+      .def_rw("record_positions", &Simplify::Simplifier::record_positions)
+      .def_rw("max_error", &Simplify::Simplifier::max_error)
+      .def_ro("interrupted", &Simplify::Simplifier::interrupted)
+      .def("set_time_budget", &Simplify::Simplifier::set_time_budget,
+           "seconds"_a)
+      .def("set_cancel_token", &set_cancel_token, "token"_a.none(),
+           nb::keep_alive<1, 2>())
+      .def("set_progress", &set_progress, "callback"_a.none(), "interval"_a = 1)
+      .def("return_stats", &return_stats)
+      .def("load", &load, "points"_a, "faces"_a)
+      .def("load_int32", &load_int32, "n_points"_a, "n_faces"_a, "points"_a,
+           "faces"_a)
+      .def("load_int64", &load_int64, "n_points"_a, "n_faces"_a, "points"_a,
+           "faces"_a)
+      .def("load_from_vtk", &load_from_vtk, "n_points"_a, "points"_a, "faces"_a,
+           "n_faces"_a)
+      .def("simplify", &simplify, "target_count"_a, "aggressiveness"_a = 7.0,
+           "verbose"_a = false, "preserve_border"_a = false)
+      .def("simplify_heap", &simplify_heap, "target_count"_a,
+           "verbose"_a = false, "preserve_border"_a = false)
+      .def("simplify_lossless", &simplify_lossless, "verbose"_a = false,
+           "preserve_border"_a = false)
+      .def("simplify_partitioned", &simplify_partitioned, "target_count"_a,
+           "n_partitions"_a, "aggressiveness"_a = 7.0, "lossless"_a = false,
+           "heap"_a = false, "verbose"_a = false, "preserve_border"_a = false,
+           "n_threads"_a = 0)
+      .def("save_obj", &save_obj, "filename"_a)
+      .def("read", &read_obj, "filename"_a)
+      .def("return_points", &return_points)
+      .def("return_triangles", &return_triangles)
+      .def("return_collapses", &return_collapses)
+      .def("return_collapse_positions", &return_collapse_positions)
+      .def("return_faces_int32_no_padding", &return_faces_int32_no_padding)
+      .def("return_faces_int32", &return_faces_int32)
+      .def("return_faces_int64", &return_faces_int64)
+      .def("return_mesh", &return_mesh)
+      .def("set_lod_targets", &set_lod_targets, "targets"_a)
+      .def("return_lods", &return_lods)
+      .def("n_points", &Simplify::n_points)
+      .def("n_triangles", &Simplify::n_triangles)
+      .def("n_collapses", &Simplify::n_collapses);
+
+  m.def("simplify_many", &simplify_many, "points"_a, "faces"_a,
+        "target_counts"_a, "aggressiveness"_a, "lossless"_a = false,
+        "heap"_a = false, "preserve_border"_a = false,
+        "return_collapses"_a = false, "n_threads"_a = 0);
 }
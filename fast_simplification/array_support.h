@@ -4,6 +4,7 @@
 #include <array>
 #include <cstdlib>
 #include <new>
+#include <vector>
 
 #include <nanobind/nanobind.h>
 #include <nanobind/ndarray.h>
@@ -58,4 +59,27 @@ static NDArray<T, 1> WrapFlat(T *buf, size_t len) {
   return NDArray<T, 1>(buf, 1, shape_, owner);
 }
 
+// Wrap an already malloc-allocated buffer holding exactly ``shape`` elements
+// as an owned ndarray. The buffer must be non-null (allocate at least one
+// element for empty shapes); ownership passes to the returned array.
+template <typename T, size_t N>
+static NDArray<T, N> WrapNDArray(T *buf, std::array<size_t, N> shape) {
+  nb::capsule owner(buf, [](void *p) noexcept { std::free(p); });
+  return NDArray<T, N>(buf, N, shape.data(), owner);
+}
+
+// Hand a std::vector holding exactly ``shape`` elements over to NumPy
+// without a copy: the vector is moved to the heap and destroyed by the
+// capsule once the array is released.
+template <typename T, size_t N>
+static NDArray<T, N> WrapVector(std::vector<T> &&vec,
+                                std::array<size_t, N> shape) {
+  if (vec.data() == nullptr)
+    vec.reserve(1);
+  std::vector<T> *owned = new std::vector<T>(std::move(vec));
+  nb::capsule owner(
+      owned, [](void *p) noexcept { delete static_cast<std::vector<T> *>(p); });
+  return NDArray<T, N>(owned->data(), N, shape.data(), owner);
+}
+
 #endif // ARRAY_SUPPORT_HEADER_H
@@ -0,0 +1,206 @@
+"""Compact on-disk format for collapse histories.
+
+A collapse history file stores the collapses returned by
+:func:`fast_simplification.simplify` with ``return_collapses=True``, the
+number of points of the mesh they were recorded on and, optionally, the
+target position and the error of every collapse. All values are
+little-endian:
+
+====================  ===========  ==========================================
+offset                type         content
+====================  ===========  ==========================================
+0                     8 bytes      magic ``b"FSCOLLAP"``
+8                     uint16       format version, currently 1
+10                    uint16       flags: 1 = positions, 2 = errors
+12                    uint32       reserved, 0
+16                    uint64       number of points of the original mesh
+24                    uint64       number of collapses ``n``
+32                    uint64       size of the encoded collapses in bytes
+40                    bytes        encoded collapses
+8-byte aligned        float64      ``(n, 3)`` collapse positions, if flagged
+after positions       float64      ``(n,)`` collapse errors, if flagged
+====================  ===========  ==========================================
+
+Every collapse ``(i0, i1)`` is encoded as two zigzag LEB128 varints: the
+difference between its ``i1`` and the ``i1`` of the previous collapse (0
+for the first one), then ``i0 - i1``. Vertices merged one after the other
+tend to have close indices, so a collapse usually takes 2 to 4 bytes
+instead of the 8 bytes of an ``int32`` pair.
+
+Files are opened with :class:`numpy.memmap`: only the encoded collapses are
+read to decode them, and the positions and errors are returned as views of
+the mapped file.
+"""
+
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from . import _replay
+
+MAGIC = b"FSCOLLAP"
+VERSION = 1
+
+_HAS_POSITIONS = 1
+_HAS_ERRORS = 2
+
+_HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u2"),
+        ("flags", "<u2"),
+        ("reserved", "<u4"),
+        ("n_points", "<u8"),
+        ("n_collapses", "<u8"),
+        ("payload_size", "<u8"),
+    ]
+)
+
+
+class CollapseHistory(NamedTuple):
+    """Collapse history read by :func:`load_collapses`."""
+
+    #: ``(n, 2)`` int32 array of collapses.
+    collapses: np.ndarray
+    #: Number of points of the mesh the collapses were recorded on.
+    n_points: int
+    #: ``(n, 3)`` float64 collapse positions, or ``None``.
+    positions: np.ndarray | None
+    #: ``(n,)`` float64 collapse errors, or ``None``.
+    errors: np.ndarray | None
+
+
+def save_collapses(path, collapses, n_points, positions=None, errors=None):
+    """Write a collapse history file.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        Destination file.
+    collapses : sequence
+        A ``(n, 2)`` array of collapses.
+    n_points : int
+        Number of points of the mesh the collapses were recorded on.
+    positions : sequence, optional
+        A ``(n, 3)`` array with the position of the merged vertex after
+        every collapse.
+    errors : sequence, optional
+        A ``(n,)`` array with the error of every collapse.
+
+    Examples
+    --------
+    >>> points_out, faces_out, collapses = fast_simplification.simplify(
+    ...     points, faces, 0.9, return_collapses=True
+    ... )
+    >>> fast_simplification.save_collapses("mesh.fsc", collapses, len(points))
+
+    """
+    collapses = np.ascontiguousarray(collapses, dtype=np.int32).reshape(-1, 2)
+    n_collapses = collapses.shape[0]
+    if n_points < 0:
+        raise ValueError("``n_points`` must be positive")
+    if n_collapses and (collapses.min() < 0 or collapses.max() >= n_points):
+        raise ValueError("``collapses`` contains indices outside the range of ``n_points``")
+
+    flags = 0
+    if positions is not None:
+        positions = np.asarray(positions, dtype="<f8")
+        if positions.shape != (n_collapses, 3):
+            raise ValueError(
+                f"Expected ``positions`` to be ({n_collapses}, 3), not {positions.shape}"
+            )
+        flags |= _HAS_POSITIONS
+    if errors is not None:
+        errors = np.asarray(errors, dtype="<f8")
+        if errors.shape != (n_collapses,):
+            raise ValueError(f"Expected ``errors`` to be ({n_collapses},), not {errors.shape}")
+        flags |= _HAS_ERRORS
+
+    payload = _replay.encode_collapses(collapses)
+    header = np.zeros((), dtype=_HEADER)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["flags"] = flags
+    header["n_points"] = n_points
+    header["n_collapses"] = n_collapses
+    header["payload_size"] = payload.shape[0]
+
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(payload.tobytes())
+        f.write(b"\0" * (-(_HEADER.itemsize + payload.shape[0]) % 8))
+        if positions is not None:
+            f.write(positions.tobytes())
+        if errors is not None:
+            f.write(errors.tobytes())
+
+
+def load_collapses(source):
+    """Read a collapse history file.
+
+    Parameters
+    ----------
+    source : str | os.PathLike | numpy.ndarray
+        Path of a file written by :func:`save_collapses`, or its content as
+        a one dimensional ``uint8`` array such as a :class:`numpy.memmap`.
+
+    Returns
+    -------
+    CollapseHistory
+        Named tuple of ``(collapses, n_points, positions, errors)``. The
+        positions and errors are ``None`` when the file does not store
+        them, and views of the mapped file otherwise.
+
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if os.path.getsize(source) < _HEADER.itemsize:
+            raise ValueError(f"{os.fspath(source)!r} is not a collapse history file")
+        data = np.memmap(source, dtype=np.uint8, mode="r")
+    else:
+        data = np.asarray(source)
+        if data.dtype != np.uint8 or data.ndim != 1:
+            raise ValueError("Expected a path or a one dimensional ``uint8`` array")
+        if data.shape[0] < _HEADER.itemsize:
+            raise ValueError("The data is not a collapse history")
+
+    header = data[: _HEADER.itemsize].view(_HEADER)[0]
+    if header["magic"] != MAGIC:
+        raise ValueError("The data is not a collapse history")
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported collapse history version {header['version']}")
+
+    n_collapses = int(header["n_collapses"])
+    payload_size = int(header["payload_size"])
+    # every collapse takes at least two bytes of the payload
+    if n_collapses > payload_size // 2:
+        raise ValueError("The collapse history is corrupted")
+    flags = int(header["flags"])
+    start = _HEADER.itemsize
+    end = start + payload_size
+    offset = end + (-end % 8)
+    size = offset
+    if flags & _HAS_POSITIONS:
+        size += 24 * n_collapses
+    if flags & _HAS_ERRORS:
+        size += 8 * n_collapses
+    if data.shape[0] < size:
+        raise ValueError("The collapse history is truncated")
+
+    collapses = _replay.decode_collapses(data[start:end], n_collapses)
+
+    positions = errors = None
+    if flags & _HAS_POSITIONS:
+        positions = data[offset : offset + 24 * n_collapses].view("<f8").reshape(-1, 3)
+        offset += 24 * n_collapses
+    if flags & _HAS_ERRORS:
+        errors = data[offset : offset + 8 * n_collapses].view("<f8")
+
+    return CollapseHistory(collapses, int(header["n_points"]), positions, errors)
+
+
+def _is_collapse_history(collapses):
+    """Return True if ``collapses`` refers to a collapse history file."""
+    if isinstance(collapses, (str, os.PathLike)):
+        return True
+    return isinstance(collapses, np.ndarray) and collapses.dtype == np.uint8 and collapses.ndim == 1
@@ -1,6 +1,7 @@
 import numpy as np
 
 from . import _replay
+from .history import _is_collapse_history, load_collapses
 from .utils import ascontiguous
 
 
@@ -41,6 +42,10 @@ def _map_isolated_points(points, edges, triangles, return_outliers=False):
     isolated points array. Else, the function will return the mapping array and the
     merged points array.
 
+    The points are merged by a single breadth-first search over the edges,
+    started from the points of the triangles, so the cost is linear in the
+    number of edges.
+
     Parameters
     ----------
         points : sequence
@@ -59,98 +64,32 @@ def _map_isolated_points(points, edges, triangles, return_outliers=False):
         np.ndarray
             merged points array
     """
-    n_points = points.shape[0]
-
-    # The points to connect are the points that are not in the triangles
-    # but are in the edges
-    points_to_connect = np.intersect1d(
-        np.setdiff1d(np.arange(n_points), np.unique(triangles)), np.unique(edges)
+    edges = np.ascontiguousarray(edges, dtype=np.int32).reshape(-1)
+    triangles = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1)
+    mapping, merged_points, isolated_points = _replay.map_isolated_points(
+        points.shape[0], edges, triangles
     )
-    # Start with the identity mapping
-    mapping = np.arange(n_points, dtype=np.int64)
-
-    # Remove edges that do not contains points to connect
-    edges = edges[np.isin(edges, points_to_connect).any(axis=1)]
-
-    n_edges = edges.shape[0]
-    n_edges_old = 0
-
-    # Iterate until there is no more edges to collapse
-    # or until a statiionary state is reached
-    while n_edges > 0 and n_edges != n_edges_old:
-        n_edges_old = n_edges
-
-        # Edges that connect two points to connect
-        # are kept for the next iteration
-        keep = np.isin(edges, points_to_connect).all(axis=1)
-
-        # Edges that connect a point to connect to a point
-        # that is not to connect are merged
-        connexions = edges[~keep]
-
-        a = np.isin(connexions, points_to_connect)
-        merged = connexions[np.where(a)]
-        target = connexions[np.where(~a)]
-
-        # Update the mapping array and the points to connect
-        mapping[merged] = mapping[target]
-        points_to_connect = np.setdiff1d(points_to_connect, merged)
-
-        # Remove the edges that are merged
-        edges = edges[keep]
-        # Remove edges that do not contains points to connect
-        edges = edges[np.isin(edges, points_to_connect).any(axis=1)]
-        n_edges = edges.shape[0]
-
-    # The points that have been merged are the ones
-    # such that mapping[i] != i
-    merged_points = np.where(mapping != np.arange(len(mapping)))[0]
 
     if return_outliers:
-        isolated_points = points_to_connect
         return mapping, merged_points, isolated_points
     return mapping, merged_points
 
 
-@ascontiguous
-def replay_simplification(points, triangles, collapses):
-    """Replay the decimation of a triangular mesh.
-
-    Parameters
-    ----------
-    points : sequence
-        A ``(n, 3)`` array of points. May be a ``numpy.ndarray`` or a
-        list of points. For efficiency, provide points as a float32
-        array.
-    triangles : sequence
-        A ``(n, 3)`` array of triangle indices. May be a
-        ``numpy.ndarray`` or a list of triangle indices. For
-        efficiency, provide points as a float32 array.
-    collapses : sequence
-        The collapses to replay.
-        A ``(n, 2)`` numpy.ndarray of collapses.
-        ``collapses[i] = [i0, i1]`` means that during the i-th
-        collapse, the vertex ``i1`` was collapsed into the vertex
-        ``i0``.
+def _prepare_replay(points, triangles, collapses, positions=None):
+    """Validate and densify the inputs of a replay.
 
     Returns
     -------
-    np.ndarray
-        Points array.
-    np.ndarray
-        Triangles array.
-    np.ndarray
-        indice_mapping array.
-        A ``(n,)`` array of indices.
-        ``indice_mapping[i] = j`` means that the vertex ``i`` of
-        the original mesh was mapped to the vertex ``j`` of the
-        decimated mesh.
-
+    tuple
+        ``(points, triangles, collapses, positions, kept_vertices)`` where
+        ``positions`` is taken from the collapse history file when not
+        given, and ``kept_vertices`` is ``None`` when every point is used by
+        a triangle, or else the indices of the points that were kept.
     """
-    import numpy as np
-
-    if not isinstance(points, np.ndarray):
-        points = np.array(points, dtype=np.float32)
+    # float32 and float64 points are replayed natively, in their own dtype
+    points = np.asarray(points)
+    if points.dtype not in (np.float32, np.float64):
+        points = points.astype(np.float64)
     if not isinstance(triangles, np.ndarray):
         triangles = np.array(triangles, dtype=np.int32)
 
@@ -167,21 +106,32 @@ def replay_simplification(points, triangles, collapses):
     if not triangles.flags.c_contiguous:
         triangles = np.ascontiguousarray(triangles)
 
+    if _is_collapse_history(collapses):
+        history = load_collapses(collapses)
+        if history.n_points != points.shape[0]:
+            raise ValueError(
+                f"The collapses were recorded on a mesh with {history.n_points} points, "
+                f"not {points.shape[0]}"
+            )
+        collapses = history.collapses
+        if positions is None:
+            positions = history.positions
+
     # Vertices that are not referenced by any triangle are dropped by the
-    # decimation core, but the pure-array bookkeeping below
-    # (``compute_indice_mapping``) retains them and assigns them an index.
-    # That shifts the index of every vertex that follows an unreferenced one,
-    # so ``indice_mapping`` ends up pointing past the end of the decimated
-    # points and ``_map_isolated_points`` / the final remap raise an
-    # ``IndexError`` (issue #60). Strip the unreferenced vertices up front so
-    # the numbering is dense, then re-expand ``indice_mapping`` to the original
-    # vertex count (unreferenced vertices map to ``-1``) before returning.
+    # decimation core, but the collapse bookkeeping (``indice_mapping``)
+    # retains them and assigns them an index. That shifts the index of every
+    # vertex that follows an unreferenced one, so ``indice_mapping`` would
+    # point past the end of the decimated points and the native replay
+    # rejects such meshes (issue #60). Strip the unreferenced vertices up
+    # front so the numbering is dense; ``_expand_indice_mapping`` re-expands
+    # ``indice_mapping`` to the original vertex count afterwards
+    # (unreferenced vertices map to ``-1``).
     n_points_full = points.shape[0]
+    kept_vertices = None
     referenced = np.zeros(n_points_full, dtype=bool)
     if triangles.size:
-        referenced[np.unique(triangles)] = True
-    unreferenced_present = not referenced.all()
-    if unreferenced_present:
+        referenced[triangles] = True
+    if not referenced.all():
         kept_vertices = np.flatnonzero(referenced)
         old_to_new = np.full(n_points_full, -1, dtype=np.int64)
         old_to_new[kept_vertices] = np.arange(kept_vertices.shape[0])
@@ -200,57 +150,396 @@ def replay_simplification(points, triangles, collapses):
                 )
             collapses = np.ascontiguousarray(remapped.astype(np.int32, copy=False))
 
-    if triangles.dtype == np.int32:
-        load = _replay.load_int32
-    elif triangles.dtype == np.int64:
-        load = _replay.load_int64
-    else:
-        load = _replay.load_int32
+    if triangles.dtype not in (np.int32, np.int64):
         triangles = triangles.astype(np.int32)
+    collapses = np.asarray(collapses).reshape(-1, 2)
+    if positions is not None:
+        positions = np.ascontiguousarray(positions, dtype=np.float64)
+        if positions.shape != (collapses.shape[0], 3):
+            raise ValueError(
+                f"Expected ``positions`` to be ({collapses.shape[0]}, 3), not {positions.shape}"
+            )
+
+    return points, triangles, collapses, positions, kept_vertices
+
+
+def _expand_indice_mapping(indice_mapping, kept_vertices, n_points):
+    """Re-expand ``indice_mapping`` to the original vertex count.
+
+    Vertices that were unreferenced, and therefore not part of the
+    decimated mesh, map to ``-1``.
+    """
+    if kept_vertices is None:
+        return indice_mapping
+    full_indice_mapping = np.full(n_points, -1, dtype=indice_mapping.dtype)
+    full_indice_mapping[kept_vertices] = indice_mapping
+    return full_indice_mapping
 
-    # Collapse the points
-    n_faces = triangles.shape[0]
-    n_points = points.shape[0]
-    load(n_points, n_faces, collapses.shape[0], points, triangles, collapses)
-    _replay.replay()
-    dec_points = _replay.return_points()
 
-    # Compute the indice mapping
-    indice_mapping = _replay.compute_indice_mapping(collapses, len(points))
+@ascontiguous
+def replay_simplification(points, triangles, collapses, positions=None):
+    """Replay the decimation of a triangular mesh.
 
-    # compute the new triangles
-    # Apply the indice mapping to the triangles
-    mapped_triangles = indice_mapping[triangles.copy()]
+    Parameters
+    ----------
+    points : sequence
+        A ``(n, 3)`` array of points. May be a ``numpy.ndarray`` or a
+        list of points. ``float32`` and ``float64`` arrays are replayed
+        without conversion and the points are returned in the same
+        dtype; other inputs are converted to ``float64``.
+    triangles : sequence
+        A ``(n, 3)`` array of triangle indices. May be a
+        ``numpy.ndarray`` or a list of triangle indices.
+    collapses : sequence | str | os.PathLike
+        The collapses to replay.
+        A ``(n, 2)`` numpy.ndarray of collapses.
+        ``collapses[i] = [i0, i1]`` means that during the i-th
+        collapse, the vertex ``i1`` was collapsed into the vertex
+        ``i0``. May also be the path of a file written by
+        :func:`save_collapses`, or its content as a ``uint8``
+        :class:`numpy.memmap`.
+    positions : sequence, optional
+        A ``(n, 3)`` array with the position of the merged vertex after
+        every collapse, as returned by :func:`fast_simplification.simplify`
+        with ``return_collapse_positions=True``. Read from the collapse
+        history file when it stores them. The replay then moves the
+        vertices to these positions instead of recomputing the quadrics,
+        and the points are equal to the points returned by
+        :func:`fast_simplification.simplify` for the same input dtype.
 
-    # Extract the edges and the triangles
-    # Edges can be repeated, but this is not a problem
-    # and it is faster to do so
-    dec_edges, dec_triangles = _replay.clean_triangles_and_edges(mapped_triangles)
+    Returns
+    -------
+    np.ndarray
+        Points array, in the dtype of ``points``.
+    np.ndarray
+        Triangles array.
+    np.ndarray
+        indice_mapping array.
+        A ``(n,)`` array of indices.
+        ``indice_mapping[i] = j`` means that the vertex ``i`` of
+        the original mesh was mapped to the vertex ``j`` of the
+        decimated mesh.
 
-    # Map the isolated points to the triangles
-    mapping, points_to_merge, outliers = _map_isolated_points(
-        dec_points, dec_edges, dec_triangles, return_outliers=True
+    """
+    n_points = len(points)
+    points, triangles, collapses, positions, kept_vertices = _prepare_replay(
+        points, triangles, collapses, positions
     )
 
-    dec_triangles = mapping[dec_triangles]
-    indice_mapping = mapping[indice_mapping]
-
-    points_to_merge = np.union1d(points_to_merge, outliers)
-    # Remove the isolated points
-    # isolated_points = new_collapses[:, 1]
-    points_to_merge = np.sort(points_to_merge)[::-1]
-    mapping = np.arange(dec_points.shape[0])
-    for ip in points_to_merge:
-        dec_points = np.delete(dec_points, ip, axis=0)
-        mapping[ip:] -= 1
-    indice_mapping = mapping[indice_mapping]
-    dec_triangles = mapping[dec_triangles]
-
-    # Re-expand the mapping to the original vertex count; vertices that were
-    # unreferenced (and therefore not part of the decimated mesh) map to -1.
-    if unreferenced_present:
-        full_indice_mapping = np.full(n_points_full, -1, dtype=indice_mapping.dtype)
-        full_indice_mapping[kept_vertices] = indice_mapping
-        indice_mapping = full_indice_mapping
+    # Collapse the points, then merge the points left hanging on degenerate
+    # edges and compact the result, all in one native call
+    if positions is not None:
+        # the recorded positions make the quadrics unnecessary
+        dec_points, dec_triangles, indice_mapping = _replay.replay_positions(
+            points, triangles, collapses, positions
+        )
+    else:
+        dec_points, dec_triangles, indice_mapping = _replay.replay_full(
+            points, triangles, collapses
+        )
+    indice_mapping = _expand_indice_mapping(indice_mapping, kept_vertices, n_points)
 
     return dec_points, dec_triangles, indice_mapping
+
+
+class ReplaySession:
+    """Replay a decimation progressively, one level of detail at a time.
+
+    The mesh is loaded and its quadrics are computed once. The session can
+    then be moved to any number of replayed collapses: moving forward only
+    replays the collapses in between, and moving backward restarts from a
+    saved copy of the initial state rather than from the input mesh.
+
+    Parameters
+    ----------
+    points : sequence
+        A ``(n, 3)`` array of points.
+    triangles : sequence
+        A ``(n, 3)`` array of triangle indices.
+    collapses : sequence | str | os.PathLike
+        A ``(n, 2)`` array of collapses, as returned by
+        :func:`fast_simplification.simplify` with
+        ``return_collapses=True``, or a collapse history file as accepted
+        by :func:`replay_simplification`.
+
+    Examples
+    --------
+    >>> session = fast_simplification.ReplaySession(points, faces, collapses)
+    >>> for n in (len(collapses) // 4, len(collapses) // 2, len(collapses)):
+    ...     points_out, faces_out, indice_mapping = session.at(n)
+
+    """
+
+    def __init__(self, points, triangles, collapses):
+        self._n_points = len(points)
+        points, triangles, collapses, _, self._kept_vertices = _prepare_replay(
+            points, triangles, collapses
+        )
+        self._session = _replay.ReplaySession(points, triangles, collapses)
+
+    @property
+    def n_collapses(self):
+        """Total number of collapses that can be replayed."""
+        return self._session.n_collapses
+
+    @property
+    def position(self):
+        """Number of collapses currently replayed."""
+        return self._session.position
+
+    def seek(self, n_collapses):
+        """Move the session to ``n_collapses`` replayed collapses.
+
+        Parameters
+        ----------
+        n_collapses : int
+            Number of collapses to replay, between 0 and
+            :attr:`n_collapses`.
+        """
+        self._session.seek(n_collapses)
+
+    def advance(self, n_collapses):
+        """Replay the next ``n_collapses`` collapses.
+
+        Parameters
+        ----------
+        n_collapses : int
+            Number of additional collapses to replay.
+        """
+        self.seek(self.position + n_collapses)
+
+    def mesh(self):
+        """Return the decimated mesh at the current position.
+
+        Returns
+        -------
+        np.ndarray
+            Points array.
+        np.ndarray
+            Triangles array.
+        np.ndarray
+            indice_mapping array, as returned by
+            :func:`replay_simplification`.
+        """
+        points, triangles, indice_mapping = self._session.mesh()
+        indice_mapping = _expand_indice_mapping(indice_mapping, self._kept_vertices, self._n_points)
+        return points, triangles, indice_mapping
+
+    def at(self, n_collapses):
+        """Move to ``n_collapses`` replayed collapses and return the mesh.
+
+        Parameters
+        ----------
+        n_collapses : int
+            Number of collapses to replay.
+
+        Returns
+        -------
+        tuple
+            ``(points, triangles, indice_mapping)``, see :meth:`mesh`.
+        """
+        self.seek(n_collapses)
+        return self.mesh()
+
+
+def _point_mapping(collapses, n_points, triangles=None):
+    """Map the points of a mesh to the points of its decimated mesh.
+
+    ``collapses`` is either a ``(n, 2)`` collapse history or an
+    ``indice_mapping`` array as returned by :func:`replay_simplification`.
+
+    Returns
+    -------
+    tuple
+        ``(mapping, n_out, kept)`` where ``mapping[i]`` is the decimated
+        point of the point ``i``, or ``-1`` if it was dropped, ``n_out`` the
+        number of decimated points and ``kept`` the mask of the triangles
+        left in the decimated mesh, or ``None`` if ``triangles`` is not
+        given.
+    """
+    collapses = np.asarray(collapses)
+    if triangles is not None:
+        triangles = np.asarray(triangles).reshape(-1, 3)
+
+    if collapses.ndim == 1:
+        mapping = collapses.astype(np.int64, copy=False)
+        if mapping.shape[0] != n_points:
+            raise ValueError(
+                f"``indice_mapping`` has {mapping.shape[0]} entries, not one per point ({n_points})"
+            )
+        n_out = int(mapping.max()) + 1 if mapping.size else 0
+        kept = None
+        if triangles is not None:
+            mapped = mapping[triangles]
+            kept = (
+                (mapped[:, 0] != mapped[:, 1])
+                & (mapped[:, 0] != mapped[:, 2])
+                & (mapped[:, 1] != mapped[:, 2])
+            )
+        return mapping, n_out, kept
+
+    collapses = np.ascontiguousarray(collapses, dtype=np.int32).reshape(-1, 2)
+    roots = _replay.compute_indice_mapping(collapses, n_points).astype(np.int64)
+    if triangles is None:
+        # every point that was not collapsed is kept
+        used = roots == np.arange(n_points)
+        kept = None
+    else:
+        # as in the decimation, a point is kept if it is still used by a
+        # triangle that did not degenerate
+        mapped = roots[triangles]
+        kept = (
+            (mapped[:, 0] != mapped[:, 1])
+            & (mapped[:, 0] != mapped[:, 2])
+            & (mapped[:, 1] != mapped[:, 2])
+        )
+        used = np.zeros(n_points, dtype=bool)
+        used[mapped[kept]] = True
+    new_ids = np.cumsum(used) - 1
+    mapping = np.where(used[roots], new_ids[roots], -1)
+    return mapping, int(used.sum()), kept
+
+
+def _unpack_arrays(arrays):
+    """Return ``(keys, values)`` for a dict, a sequence or a single array."""
+    if isinstance(arrays, np.ndarray):
+        return None, [arrays]
+    if hasattr(arrays, "keys"):
+        keys = list(arrays.keys())
+        return keys, [np.asarray(arrays[key]) for key in keys]
+    return [], [np.asarray(array) for array in arrays]
+
+
+def _pack_arrays(keys, values):
+    """Inverse of :func:`_unpack_arrays`."""
+    if keys is None:
+        return values[0]
+    if keys:
+        return dict(zip(keys, values))
+    return values
+
+
+def apply_collapses_to_point_data(arrays, collapses, reduction="mean", triangles=None):
+    """Carry point data arrays through a decimation.
+
+    Every point of the decimated mesh gets the reduction of the values of
+    the original points merged into it. All the arrays are reduced by a
+    single native call that streams each of them once.
+
+    Parameters
+    ----------
+    arrays : numpy.ndarray | sequence | dict
+        A ``(n_points, ...)`` array, a sequence of them or a dict of them,
+        such as normals, scalars, colors or labels. Every array keeps its
+        dtype.
+    collapses : sequence
+        Either the ``(n, 2)`` collapses returned by
+        :func:`fast_simplification.simplify`, or the ``indice_mapping``
+        returned by :func:`replay_simplification`.
+    reduction : str, default: "mean"
+        ``"mean"`` averages the merged values, ``"first"`` keeps the value
+        of the merged point with the lowest index and ``"max"`` keeps the
+        largest value, component by component. Only floating point arrays
+        are averaged: integer, boolean and other arrays such as ids or
+        labels always keep the value of a merged point, the first one with
+        ``"mean"``.
+    triangles : sequence, optional
+        The ``(n, 3)`` triangles of the original mesh. Only used with
+        collapses: the points left without any triangle are then dropped
+        exactly as :func:`fast_simplification.simplify` drops them.
+        Without triangles, every point that was not collapsed is assumed
+        to be kept.
+
+    Returns
+    -------
+    numpy.ndarray | list | dict
+        The reduced arrays, with one row per point of the decimated mesh,
+        in the same container as ``arrays``.
+
+    Examples
+    --------
+    >>> points_out, faces_out, collapses = fast_simplification.simplify(
+    ...     points, faces, 0.9, return_collapses=True
+    ... )
+    >>> normals_out = fast_simplification.apply_collapses_to_point_data(
+    ...     normals, collapses, triangles=faces
+    ... )
+
+    """
+    if reduction not in ("mean", "first", "max"):
+        raise ValueError(f"``reduction`` must be 'mean', 'first' or 'max', not {reduction!r}")
+    keys, values = _unpack_arrays(arrays)
+    if not values:
+        return _pack_arrays(keys, values)
+
+    n_points = values[0].shape[0]
+    mapping, n_out, _ = _point_mapping(collapses, n_points, triangles)
+
+    for value in values:
+        if value.shape[0] != n_points:
+            raise ValueError("Every array must have one entry per point")
+
+    # floating point arrays are reduced natively; the others keep the value
+    # of one of the merged points, picked exactly whatever their dtype
+    native = [i for i, value in enumerate(values) if value.dtype in (np.float32, np.float64)]
+    flat = [np.ascontiguousarray(values[i].reshape(n_points, -1)) for i in native]
+    reduced = dict(zip(native, _replay.reduce_point_data(flat, mapping, n_out, reduction)))
+    if len(native) < len(values):
+        sources = np.flatnonzero(mapping >= 0)
+        targets = mapping[sources]
+        # every decimated point has at least one source; the first one has
+        # the lowest index since sources is sorted
+        _, first = np.unique(targets, return_index=True)
+        first = sources[first]
+
+    out = []
+    for i, value in enumerate(values):
+        if i in reduced:
+            result = reduced[i].reshape((n_out,) + value.shape[1:])
+        else:
+            result = value[first]
+            if reduction == "max":
+                np.maximum.at(result, targets, value[sources])
+        out.append(result)
+    return _pack_arrays(keys, out)
+
+
+def apply_collapses_to_cell_data(arrays, triangles, collapses):
+    """Carry cell data arrays through a decimation.
+
+    The triangles left in the decimated mesh are the original triangles
+    that did not degenerate, in their original order, whatever the engine
+    and the number of partitions, so every cell of the decimated mesh keeps
+    the values of the triangle it comes from.
+
+    Parameters
+    ----------
+    arrays : numpy.ndarray | sequence | dict
+        A ``(n_triangles, ...)`` array, a sequence of them or a dict of
+        them.
+    triangles : sequence
+        The ``(n_triangles, 3)`` triangles of the original mesh.
+    collapses : sequence
+        Either the ``(n, 2)`` collapses returned by
+        :func:`fast_simplification.simplify`, or the ``indice_mapping``
+        returned by :func:`replay_simplification`.
+
+    Returns
+    -------
+    numpy.ndarray | list | dict
+        The arrays restricted to the cells of the decimated mesh, in the
+        same container as ``arrays``.
+
+    """
+    triangles = np.asarray(triangles).reshape(-1, 3)
+    n_points = int(triangles.max()) + 1 if triangles.size else 0
+    collapses = np.asarray(collapses)
+    if collapses.ndim == 1:
+        n_points = collapses.shape[0]
+    _, _, kept = _point_mapping(collapses, n_points, triangles)
+
+    keys, values = _unpack_arrays(arrays)
+    for value in values:
+        if value.shape[0] != triangles.shape[0]:
+            raise ValueError("Every array must have one entry per triangle")
+    return _pack_arrays(keys, [value[kept] for value in values])
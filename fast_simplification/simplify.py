@@ -1,12 +1,55 @@
 """Simplification library."""
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, NamedTuple
 
 import numpy as np
 from numpy.typing import NDArray
 
 from . import _simplify
-from .utils import ascontiguous
+from .replay import apply_collapses_to_cell_data, apply_collapses_to_point_data
+
+#: Token that stops a running :func:`simplify`; see ``cancel_token``.
+CancellationToken = _simplify.CancellationToken
+
+
+class SimplifyStats(NamedTuple):
+    """Statistics of a decimation returned by :func:`simplify`.
+
+    A candidate is an edge the decimation tried to collapse. It is either
+    collapsed or rejected, because it touches a border or locked vertex or
+    because the collapse would flip a triangle. The ``"heap"`` engine counts
+    a border edge every time it skips queueing it. With ``n_partitions``, the
+    counters include every partition while ``iterations`` and
+    ``thresholds`` describe the final pass over the merged mesh only.
+    """
+
+    #: Number of iterations, or passes, of the collapse loop.
+    iterations: int
+    #: Error bound of every iteration: the threshold of the ``"threshold"``
+    #: engine, the largest error collapsed by a ``"heap"`` pass, or
+    #: ``DBL_EPSILON`` in lossless mode.
+    thresholds: np.ndarray
+    #: Number of collapse candidates.
+    candidates: int
+    #: Number of collapses performed.
+    collapsed: int
+    #: Candidates rejected because of a border or locked vertex.
+    rejected_border: int
+    #: Candidates rejected because the collapse would flip a triangle.
+    rejected_flipped: int
+    #: True if ``time_budget`` or ``cancel_token`` stopped the decimation.
+    interrupted: bool
+    #: Seconds spent loading the mesh.
+    time_load: float
+    #: Seconds spent building the quadrics, edge errors and references.
+    time_update_mesh: float
+    #: Seconds spent in the collapse loop.
+    time_collapse: float
+    #: Seconds spent compacting the result.
+    time_compact: float
+    #: Seconds spent exporting the result.
+    time_export: float
+
 
 if TYPE_CHECKING:
     try:
@@ -34,7 +77,28 @@ def _check_args(target_reduction, target_count, n_faces):
     return int(target_count)
 
 
-@ascontiguous
+def _check_method(method):
+    """Check the collapse ordering engine."""
+    if method not in ("threshold", "heap"):
+        raise ValueError(f"``method`` must be either 'threshold' or 'heap', not {method!r}")
+
+
+def _as_mesh_arrays(points, triangles):
+    """Return points and triangles as arrays the loader reads in place.
+
+    Arrays of a supported dtype (float32/float64 points, int32/int64/uint32
+    triangles) are passed through untouched, whatever their strides; only
+    sequences and other dtypes are converted.
+    """
+    points = np.asarray(points)
+    if points.dtype not in (np.float32, np.float64):
+        points = points.astype(np.float64)
+    triangles = np.asarray(triangles)
+    if triangles.dtype not in (np.int32, np.int64, np.uint32):
+        triangles = triangles.astype(np.int32)
+    return points, triangles
+
+
 def simplify(
     points: NDArray[np.float64],
     triangles: NDArray[np.int32],
@@ -45,25 +109,36 @@ def simplify(
     return_collapses: bool = False,
     lossless: bool = False,
     preserve_border: bool = False,
-) -> (
-    tuple[NDArray[np.float64], NDArray[np.int32]]
-    | tuple[NDArray[np.float64], NDArray[np.int32], NDArray[np.int32]]
-):
+    method: str = "threshold",
+    n_threads: int | None = None,
+    n_partitions: int | None = None,
+    return_collapse_positions: bool = False,
+    max_error: float | None = None,
+    relative_error: bool = False,
+    time_budget: float | None = None,
+    cancel_token: CancellationToken | None = None,
+    progress: Callable[[int, int], object] | None = None,
+    progress_interval: int = 10000,
+    return_stats: bool = False,
+) -> tuple:
     """Simplify a triangular mesh.
 
     Parameters
     ----------
     points : sequence[float | double]
         A ``(n, 3)`` array of points. May be a ``numpy.ndarray`` or a
-        sequence of points. Internally converted to double precision.
+        sequence of points. ``float32`` and ``float64`` arrays are read in
+        place, with any strides, and the points are returned in the same
+        dtype. Other inputs are converted to ``float64``.
     triangles : sequence
         A ``(n, 3)`` array of triangle indices. May be a
-        ``numpy.ndarray`` or a list of triangle indices.
+        ``numpy.ndarray`` or a list of triangle indices. ``int32``,
+        ``int64`` and ``uint32`` arrays are read in place, with any strides.
     target_reduction : float, optional
         Fraction of the original mesh to remove.  If set to ``0.9``,
         this function will try to reduce the data set to 10% of its
         original size and will remove 90% of the input triangles. Use
-        this parameter or ``target_count``.
+        this parameter, ``target_count`` or ``max_error``.
     target_count : int, optional
         Target number of triangles to reduce mesh to.  This may be
         used in place of ``target_reduction``, but both cannot be set.
@@ -74,7 +149,9 @@ def simplify(
         expense of time.  Setting a low value may result in being unable to
         reach the ``target_reduction`` or ``target_count``.
     verbose : bool, optional
-        Enable verbose output when simplifying the mesh.
+        Enable verbose output when simplifying the mesh. The compiled core
+        prints it to stdout; ``progress`` and ``return_stats`` give the same
+        information to the caller.
     return_collapses : bool, optional
         If True, return the history of collapses as a ``(n_collapses, 2)``
         array of indices.  ``collapses[i] = [i0, i1]`` means that durint the
@@ -84,16 +161,88 @@ def simplify(
     preserve_border : bool, default: False
         If True, preserve the open boundary (border) of the mesh by
         preventing the collapse of any edge that touches a border vertex.
+        Non-manifold edges, shared by three or more triangles, are
+        treated as borders too.
         Applies to both the standard and lossless simplification paths.
+    method : str, default: "threshold"
+        Collapse ordering engine. ``"threshold"`` sweeps the mesh with an
+        error threshold that grows at a rate set by ``agg``. ``"heap"``
+        keeps the edge costs in a priority queue and always collapses the
+        cheapest edge, which reaches ``target_count`` almost exactly with a
+        predictable ``O(n log n)`` runtime. It also lets triangles that
+        already are slivers, such as the poles of a UV sphere, keep
+        collapsing as long as they do not degenerate. ``agg`` is ignored by
+        the ``"heap"`` engine. Ignored when ``lossless`` is True.
+    n_threads : int, optional
+        Number of OpenMP threads used to initialize the quadrics, compute the
+        edge errors and build the vertex references. The collapse loop itself
+        is sequential and the result does not depend on this value. Defaults
+        to the number of available cores.
+    n_partitions : int, optional
+        Split the mesh into this many spatial slabs of equal triangle count
+        and decimate them concurrently on ``n_threads`` native threads. The
+        vertices shared between slabs are locked, the same way
+        ``preserve_border`` locks open borders, and a final pass over the
+        merged mesh reuses the accumulated quadrics to decimate across the
+        seams. Intended for very large meshes; the result differs slightly
+        from a single-partition run but the returned collapses can still be
+        replayed with :func:`replay_simplification`.
+    return_collapse_positions : bool, default: False
+        If True, also return the position of the merged vertex after every
+        collapse as a ``(n_collapses, 3)`` array, after the collapses, which
+        are then returned as well. Passing these positions to
+        :func:`replay_simplification` skips the quadric computation and
+        reproduces the simplified points exactly.
+    max_error : float, optional
+        Only collapse edges whose quadric error, the sum of the squared
+        distances to the planes of the merged triangles, is below this
+        value, and stop once every edge left is more expensive. Without
+        ``target_reduction`` or ``target_count`` the mesh is decimated as
+        far as this bound allows, in a single run. With one of them, the
+        decimation stops at whichever limit comes first. Not compatible
+        with ``lossless``, which uses a fixed bound of ``DBL_EPSILON``.
+    relative_error : bool, default: False
+        If True, ``max_error`` is relative to the bounding box diagonal
+        ``d`` of the mesh and the bound is ``max_error * d**2``, so that
+        the same value gives the same result whatever the scale of the
+        mesh. For example ``max_error=1e-6`` allows a deviation of about
+        ``1e-3 * d``.
+    time_budget : float, optional
+        Wall-clock budget of the call in seconds. Once it has run out, the
+        decimation stops where it is and returns the mesh reached so far,
+        with the collapses that led to it, even if the target is not
+        reached. Loading the mesh, building the quadrics and exporting the
+        result are not interrupted and may overrun the budget.
+    cancel_token : CancellationToken, optional
+        Token that stops the decimation the same way once another thread
+        calls its ``cancel()`` method.
+    progress : callable, optional
+        Called as ``progress(n_collapses, n_triangles)`` every
+        ``progress_interval`` collapses with the number of collapses so far
+        and of triangles left. The decimation waits for the call, which
+        holds the GIL. An exception raised by ``progress`` aborts the
+        decimation and is raised by this function. With ``n_partitions``,
+        the collapses of the concurrent partitions are counted together,
+        so the calls may come from different threads and the triangle
+        count is only approximate while the partitions run.
+    progress_interval : int, default: 10000
+        Number of collapses between two calls to ``progress``.
+    return_stats : bool, default: False
+        If True, also return a :class:`SimplifyStats` with the counters and
+        phase times of the decimation, after every other output.
 
     Returns
     -------
     np.ndarray
-        Points array.
+        Points array, in the dtype of ``points``.
     np.ndarray
         Triangles array.
     np.ndarray (optional)
         Collapses array.
+    np.ndarray (optional)
+        Collapse positions array.
+    SimplifyStats (optional)
+        Statistics of the decimation.
 
     Examples
     --------
@@ -126,9 +275,17 @@ def simplify(
 
     """
 
-    points = np.asarray(points, dtype=np.float64)
-    if not isinstance(triangles, np.ndarray):
-        triangles = np.array(triangles, dtype=np.int32)
+    _check_method(method)
+    if time_budget is not None and time_budget < 0:
+        raise ValueError("``time_budget`` must be non-negative")
+    if progress is not None and progress_interval < 1:
+        raise ValueError("``progress_interval`` must be at least 1")
+    if max_error is not None:
+        if lossless:
+            raise ValueError("``max_error`` cannot be combined with ``lossless``")
+        if max_error < 0:
+            raise ValueError("``max_error`` must be non-negative")
+    points, triangles = _as_mesh_arrays(points, triangles)
 
     if points.ndim != 2:
         raise ValueError("``points`` array must be 2 dimensional")
@@ -142,34 +299,280 @@ def simplify(
 
     n_faces = triangles.shape[0]
 
-    triangles = np.ascontiguousarray(triangles)
-
-    if triangles.dtype == np.int32:
-        load = _simplify.load_int32
-    elif triangles.dtype == np.int64:
-        load = _simplify.load_int64
+    # each call owns its mesh buffers, so concurrent calls do not interfere
+    simplifier = _simplify.Simplifier()
+    simplifier.n_threads = 0 if n_threads is None else n_threads
+    simplifier.record_positions = return_collapse_positions
+    if time_budget is not None:
+        simplifier.set_time_budget(time_budget)
+    simplifier.set_cancel_token(cancel_token)
+    if progress is not None:
+        simplifier.set_progress(progress, progress_interval)
+    if max_error is not None:
+        if relative_error and points.shape[0]:
+            diagonal = np.linalg.norm(np.ptp(points, axis=0).astype(np.float64))
+            max_error = max_error * diagonal**2
+        simplifier.max_error = max_error
+        if target_reduction is None and target_count is None:
+            target_count = 0
+    simplifier.load(points, triangles)
+
+    if n_partitions is not None and n_partitions > 1:
+        if not lossless:
+            target_count = _check_args(target_reduction, target_count, n_faces)
+        simplifier.simplify_partitioned(
+            0 if lossless else target_count,
+            n_partitions,
+            agg,
+            lossless,
+            method == "heap",
+            verbose,
+            preserve_border,
+            simplifier.n_threads,
+        )
+    elif lossless:
+        simplifier.simplify_lossless(verbose, preserve_border)
     else:
-        load = _simplify.load_int32
-        triangles = triangles.astype(np.int32)
+        target_count = _check_args(target_reduction, target_count, n_faces)
+        if method == "heap":
+            simplifier.simplify_heap(target_count, verbose, preserve_border)
+        else:
+            simplifier.simplify(target_count, agg, verbose, preserve_border)
+    # arrays are built once at their final size and the core's buffers are
+    # released before the collapses are returned
+    points, faces = simplifier.return_mesh()
+
+    out = (points, faces)
+    if return_collapse_positions:
+        collapses = simplifier.return_collapses()
+        out += (collapses, simplifier.return_collapse_positions())
+    elif return_collapses:
+        out += (simplifier.return_collapses(),)
+    if return_stats:
+        out += (SimplifyStats(**simplifier.return_stats()),)
+    return out
+
+
+def simplify_lods(
+    points: NDArray[np.float64],
+    triangles: NDArray[np.int32],
+    reductions=(0.5, 0.75, 0.9, 0.99),
+    agg: float = 7.0,
+    verbose: bool = False,
+    preserve_border: bool = False,
+    method: str = "threshold",
+    n_threads: int | None = None,
+) -> tuple[list, NDArray[np.int32]]:
+    """Build several levels of detail of a mesh in a single decimation.
 
-    load(
-        points.shape[0],
-        n_faces,
-        points,
-        triangles,
-    )
+    The mesh is decimated once down to the deepest reduction. Each time the
+    triangle count crosses the target of another level, a copy of the mesh
+    is taken, so every level is identical to the result of :func:`simplify`
+    with that reduction at about the cost of the deepest one alone.
+
+    Parameters
+    ----------
+    points : sequence[float | double]
+        A ``(n, 3)`` array of points. See :func:`simplify`.
+    triangles : sequence
+        A ``(n, 3)`` array of triangle indices. See :func:`simplify`.
+    reductions : sequence[float], default: (0.5, 0.75, 0.9, 0.99)
+        Fraction of the original mesh to remove at each level, each between
+        0 and 1.
+    agg : float, default: 7.0
+        Decimation aggressiveness. See :func:`simplify`.
+    verbose : bool, optional
+        Enable verbose output when simplifying the mesh.
+    preserve_border : bool, default: False
+        If True, preserve the open boundary (border) of the mesh.
+        Non-manifold edges, shared by three or more triangles, are
+        treated as borders too.
+    method : str, default: "threshold"
+        Collapse ordering engine, ``"threshold"`` or ``"heap"``. See
+        :func:`simplify`.
+    n_threads : int, optional
+        Number of threads used by the parallel setup phases. See
+        :func:`simplify`.
+
+    Returns
+    -------
+    list[tuple]
+        One ``(points, faces, n_collapses)`` tuple per entry of
+        ``reductions``, in the same order, with points in the dtype of
+        ``points``. ``collapses[:n_collapses]``
+        replays the original mesh to that level.
+    np.ndarray
+        Collapses array of the deepest level, shared by every level.
+
+    Examples
+    --------
+    >>> import fast_simplification
+    >>> import pyvista as pv
+    >>> mesh = pv.Sphere()
+    >>> lods, collapses = fast_simplification.simplify_lods(
+    ...     mesh.points, mesh.regular_faces, reductions=[0.5, 0.9]
+    ... )
+    >>> points_half, faces_half, _ = lods[0]
 
-    if lossless:
-        _simplify.simplify_lossless(verbose, preserve_border)
+    """
+    _check_method(method)
+    points, triangles = _as_mesh_arrays(points, triangles)
+
+    if points.ndim != 2:
+        raise ValueError("``points`` array must be 2 dimensional")
+    if points.shape[1] != 3:
+        raise ValueError(f"Expected ``points`` array to be (n, 3), not {points.shape}")
+
+    if triangles.ndim != 2:
+        raise ValueError("``triangles`` array must be 2 dimensional")
+    if triangles.shape[1] != 3:
+        raise ValueError(f"Expected ``triangles`` array to be (n, 3), not {triangles.shape}")
+
+    n_faces = triangles.shape[0]
+    reductions = list(reductions)
+    if not reductions:
+        raise ValueError("``reductions`` must contain at least one value")
+    target_counts = [_check_args(reduction, None, n_faces) for reduction in reductions]
+
+    # levels from the finest to the coarsest; the coarsest is the final mesh
+    order = sorted(range(len(reductions)), key=lambda i: -target_counts[i])
+
+    simplifier = _simplify.Simplifier()
+    simplifier.n_threads = 0 if n_threads is None else n_threads
+    simplifier.load(points, triangles)
+    simplifier.set_lod_targets([target_counts[i] for i in order[:-1]])
+    if method == "heap":
+        simplifier.simplify_heap(target_counts[order[-1]], verbose, preserve_border)
     else:
-        target_count = _check_args(target_reduction, target_count, n_faces)
-        _simplify.simplify(target_count, agg, verbose, preserve_border)
-    points = _simplify.return_points()
-    faces = _simplify.return_faces_int32_no_padding().reshape(-1, 3)
+        simplifier.simplify(target_counts[order[-1]], agg, verbose, preserve_border)
+
+    snapshots = simplifier.return_lods()
+    points, faces = simplifier.return_mesh()
+    collapses = simplifier.return_collapses()
+    snapshots.append((points, faces, collapses.shape[0]))
 
-    if return_collapses:
-        return points, faces, _simplify.return_collapses()
-    return points, faces
+    lods = [None] * len(reductions)
+    for i, level in zip(order, snapshots):
+        lods[i] = level
+    return lods, collapses
+
+
+def _per_mesh(value, n_meshes, name):
+    """Broadcast a scalar argument to one value per mesh."""
+    if value is None or np.isscalar(value):
+        return [value] * n_meshes
+    value = list(value)
+    if len(value) != n_meshes:
+        raise ValueError(f"``{name}`` must have one entry per mesh ({n_meshes}), not {len(value)}")
+    return value
+
+
+def simplify_many(
+    meshes,
+    target_reduction: float | None = None,
+    target_count: int | None = None,
+    agg: float = 7.0,
+    lossless: bool = False,
+    preserve_border: bool = False,
+    return_collapses: bool = False,
+    n_threads: int | None = None,
+    method: str = "threshold",
+) -> list:
+    """Simplify a batch of triangular meshes in parallel.
+
+    The whole batch is handed to the compiled core in a single call and
+    decimated on a pool of native threads, which avoids the per-call Python
+    overhead of :func:`simplify` when processing many small meshes.
+
+    Parameters
+    ----------
+    meshes : sequence[tuple[sequence, sequence]]
+        Sequence of ``(points, triangles)`` pairs, each as accepted by
+        :func:`simplify`.
+    target_reduction : float | sequence[float], optional
+        Fraction of each mesh to remove. Either a single value applied to
+        every mesh or one value per mesh. Use this parameter or
+        ``target_count``.
+    target_count : int | sequence[int], optional
+        Target number of triangles of each mesh. Either a single value
+        applied to every mesh or one value per mesh.
+    agg : float | sequence[float], default: 7.0
+        Decimation aggressiveness, either a single value or one value per
+        mesh. See :func:`simplify`.
+    lossless : bool, default: False
+        If True, simplify every mesh losslessly.
+    preserve_border : bool, default: False
+        If True, preserve the open boundary (border) of every mesh.
+        Non-manifold edges, shared by three or more triangles, are
+        treated as borders too.
+    return_collapses : bool, default: False
+        If True, also return the history of collapses of each mesh.
+    n_threads : int, optional
+        Number of native threads to use. Defaults to the number of
+        available cores.
+    method : str, default: "threshold"
+        Collapse ordering engine, ``"threshold"`` or ``"heap"``. See
+        :func:`simplify`.
+
+    Returns
+    -------
+    list[tuple]
+        One ``(points, faces)`` tuple per input mesh, in input order, or
+        ``(points, faces, collapses)`` when ``return_collapses`` is True.
+        The points of each mesh keep the dtype of its input points.
+
+    Examples
+    --------
+    Decimate two spheres with a different target reduction each.
+
+    >>> import fast_simplification
+    >>> import pyvista as pv
+    >>> meshes = [pv.Sphere(), pv.Sphere(theta_resolution=60)]
+    >>> results = fast_simplification.simplify_many(
+    ...     [(mesh.points, mesh.regular_faces) for mesh in meshes],
+    ...     target_reduction=[0.5, 0.9],
+    ... )
+    >>> points_out, faces_out = results[0]
+
+    """
+    _check_method(method)
+    meshes = list(meshes)
+    n_meshes = len(meshes)
+    reductions = _per_mesh(target_reduction, n_meshes, "target_reduction")
+    counts = _per_mesh(target_count, n_meshes, "target_count")
+    aggs = _per_mesh(agg, n_meshes, "agg")
+
+    points_list = []
+    faces_list = []
+    target_counts = []
+    for i, (points, triangles) in enumerate(meshes):
+        points, triangles = _as_mesh_arrays(points, triangles)
+
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError(f"Expected ``points`` array {i} to be (n, 3), not {points.shape}")
+        if triangles.ndim != 2 or triangles.shape[1] != 3:
+            raise ValueError(
+                f"Expected ``triangles`` array {i} to be (n, 3), not {triangles.shape}"
+            )
+
+        if lossless:
+            target_counts.append(0)
+        else:
+            target_counts.append(_check_args(reductions[i], counts[i], triangles.shape[0]))
+        points_list.append(points)
+        faces_list.append(triangles)
+
+    return _simplify.simplify_many(
+        points_list,
+        faces_list,
+        target_counts,
+        [float(value) for value in aggs],
+        lossless,
+        method == "heap",
+        preserve_border,
+        return_collapses,
+        0 if n_threads is None else n_threads,
+    )
 
 
 def simplify_mesh(
@@ -179,6 +582,8 @@ def simplify_mesh(
     agg: float = 7.0,
     verbose: bool = False,
     preserve_border: bool = False,
+    method: str = "threshold",
+    n_threads: int | None = None,
 ):
     """Simplify a pyvista mesh.
 
@@ -205,6 +610,14 @@ def simplify_mesh(
     preserve_border : bool, default: False
         If True, preserve the open boundary (border) of the mesh by
         preventing the collapse of any edge that touches a border vertex.
+        Non-manifold edges, shared by three or more triangles, are
+        treated as borders too.
+    method : str, default: "threshold"
+        Collapse ordering engine, ``"threshold"`` or ``"heap"``. See
+        :func:`simplify`.
+    n_threads : int, optional
+        Number of threads used by the parallel setup phases. See
+        :func:`simplify`.
 
     Returns
     -------
@@ -214,7 +627,11 @@ def simplify_mesh(
         the history of collapses as a ``(n_collapses, 2)`` array of
         indices. ``collapses[i] = [i0, i1]`` means that during the
         i-th collapse, the vertex ``i1`` was collapsed into the vertex
-        ``i0``.
+        ``i0``. The point data of ``mesh`` is carried over by averaging
+        the values of the merged points, or, for arrays that are not
+        floating point such as ids and labels, by keeping the value of the
+        first merged point, see :func:`apply_collapses_to_point_data`.
+        Every cell keeps the cell data of the triangle it comes from.
 
     """
     try:
@@ -222,16 +639,21 @@ def simplify_mesh(
     except ImportError:
         raise ImportError("Please install pyvista to use this feature with:\npip install pyvista")
 
+    _check_method(method)
     n_faces = mesh.n_cells
-    _simplify.load_from_vtk(
-        mesh.n_points,
-        mesh.points.astype(np.float64, order="C", copy=False),
-        mesh.faces.astype(np.int32, order="C", copy=False),
-        n_faces,
-    )
+    simplifier = _simplify.Simplifier()
+    simplifier.n_threads = 0 if n_threads is None else n_threads
+    simplifier.load_from_vtk(mesh.n_points, mesh.points, mesh.faces, n_faces)
+    point_data = {name: mesh.point_data[name] for name in mesh.point_data.keys()}
+    cell_data = {name: mesh.cell_data[name] for name in mesh.cell_data.keys()}
+    if point_data or cell_data:
+        triangles = mesh.faces.reshape(-1, 4)[:, 1:]
 
     target_count = _check_args(target_reduction, target_count, n_faces)
-    _simplify.simplify(target_count, agg, verbose, preserve_border)
+    if method == "heap":
+        simplifier.simplify_heap(target_count, verbose, preserve_border)
+    else:
+        simplifier.simplify(target_count, agg, verbose, preserve_border)
 
     # Fast simplification only produces triangle meshes, so the output cell
     # array is uniformly 3-wide.  On VTK >= 9.6.2 this is a perfect fit for
@@ -244,7 +666,8 @@ def simplify_mesh(
         # unpadded flat connectivity (length n_tri * 3), int32.  numpy_to_vtk
         # maps int32 to a ``vtkTypeInt32Array``, one of the connectivity array
         # widths accepted by ``vtkCellArray.SetData``.
-        connectivity = _simplify.return_faces_int32_no_padding()
+        points, faces = simplifier.return_mesh()
+        connectivity = faces.reshape(-1)
         connectivity_vtk = numpy_to_vtk(connectivity, deep=False)
 
         carr = vtkCellArray()
@@ -256,18 +679,27 @@ def simplify_mesh(
         # no spurious vertex cells are generated (as would happen when passing
         # only points to the PolyData constructor)
         mesh = pv.PolyData()
-        mesh.points = _simplify.return_points()
+        mesh.points = points
         mesh.SetPolys(carr)
     else:
         # return the correct datatype of the faces
         if pv._get_vtk_id_type() == np.int32:
-            faces = _simplify.return_faces_int32()
+            faces = simplifier.return_faces_int32()
         else:
-            faces = _simplify.return_faces_int64()
+            faces = simplifier.return_faces_int64()
 
         # construct mesh
-        mesh = pv.PolyData(_simplify.return_points(), faces, deep=False)
-
-    mesh.field_data["fast_simplification_collapses"] = _simplify.return_collapses()
+        mesh = pv.PolyData(simplifier.return_points(), faces, deep=False)
+
+    collapses = simplifier.return_collapses()
+    if point_data:
+        point_data = apply_collapses_to_point_data(point_data, collapses, triangles=triangles)
+        for name, array in point_data.items():
+            mesh.point_data[name] = array
+    if cell_data:
+        cell_data = apply_collapses_to_cell_data(cell_data, triangles, collapses)
+        for name, array in cell_data.items():
+            mesh.cell_data[name] = array
+    mesh.field_data["fast_simplification_collapses"] = collapses
 
     return mesh
@@ -1,151 +1,202 @@
 // wrap simplify header file for integration with cython
+#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <stdexcept>
+#include <thread>
+#include <type_traits>
+#include <unordered_map>
+
 #include "Simplify.h"
 
 namespace Simplify{
 
-  // load triangles
-  void load_points(const int n_points, double* points){
-    vertices.clear();
-    // load vertices
-    for (int ii = 0; ii < n_points; ii ++){
-      Vertex v;
-      v.p.x = points[0 + 3*ii];
-      v.p.y = points[1 + 3*ii];
-      v.p.z = points[2 + 3*ii];
-      vertices.push_back(v);
+  // run fn(ii) for every ii in [0, n_jobs) on up to n_threads native threads
+  // (0 selects the hardware concurrency); the first exception raised by a
+  // job is rethrown once every thread has joined
+  template <typename Fn>
+  void parallel_for(const int n_jobs, int n_threads, Fn fn){
+    if (n_threads <= 0){
+      n_threads = std::thread::hardware_concurrency();
+    }
+    if (n_threads > n_jobs){
+      n_threads = n_jobs;
+    }
+    if (n_threads < 1){
+      n_threads = 1;
+    }
+
+    std::atomic<int> next(0);
+    std::exception_ptr error;
+    std::mutex error_mutex;
+    auto worker = [&](){
+      for (int ii = next++; ii < n_jobs; ii = next++){
+        try {
+          fn(ii);
+        } catch (...) {
+          std::lock_guard<std::mutex> lock(error_mutex);
+          if (!error){
+            error = std::current_exception();
+          }
+        }
+      }
+    };
+
+    if (n_threads == 1){
+      worker();
+    } else {
+      std::vector<std::thread> pool;
+      for (int ii = 0; ii < n_threads; ii ++){
+        pool.emplace_back(worker);
+      }
+      for (std::thread &t : pool){
+        t.join();
+      }
+    }
+    if (error){
+      std::rethrow_exception(error);
     }
   }
 
-  // load triangles
-  void load_triangles(const int n_tri, int* faces){
-    triangles.clear();
-    for (int ii = 0; ii < n_tri; ii ++){
-      Triangle t;
-      t.attr = 0;
-      t.material = -1;
-      t.v[0] = faces[0 + 3*ii];
-      t.v[1] = faces[1 + 3*ii];
-      t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
+  // load points of any floating type, read with the given element strides,
+  // into the vertex array reserved at its final size
+  template <typename T>
+  void load_points(Simplifier &s, const int n_points, const T* points,
+                   const int64_t s0 = 3, const int64_t s1 = 1){
+    s.single_precision = std::is_same<T, float>::value;
+    s.vertices.clear();
+    s.vertices.reserve(n_points);
+    Vertex v;
+    for (int ii = 0; ii < n_points; ii ++){
+      const T* p = points + ii*s0;
+      v.p.x = p[0];
+      v.p.y = p[s1];
+      v.p.z = p[2*s1];
+      s.vertices.push_back(v);
     }
   }
 
-  // load triangles
-  void load_triangles_int64(const int n_tri, int64_t* faces){
-    triangles.clear();
+  // load triangles of any integer type, read with the given element strides,
+  // into the triangle array reserved at its final size. Returns false if an
+  // index lies outside [0, n_points); a negative n_points skips the check
+  template <typename T>
+  bool load_triangles(Simplifier &s, const int n_tri, const T* faces,
+                      const int64_t s0 = 3, const int64_t s1 = 1,
+                      const int n_points = -1){
+    s.resize_triangles(0);
+    s.triangles.reserve(n_tri);
+    uint64_t limit = n_points >= 0 ? (uint64_t)n_points : UINT64_MAX;
+    bool valid = true;
+    Triangle t = {};
     for (int ii = 0; ii < n_tri; ii ++){
-      Triangle t;
-      t.attr = 0;
-      t.material = -1;
-      t.v[0] = faces[0 + 3*ii];
-      t.v[1] = faces[1 + 3*ii];
-      t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
+      const T* f = faces + ii*s0;
+      for (int jj = 0; jj < 3; jj ++){
+        // negative indices wrap around to large unsigned values
+        uint64_t index = (uint64_t)(int64_t)f[jj*s1];
+        valid &= index < limit;
+        t.v[jj] = (int)index;
+      }
+      s.triangles.push_back(t);
     }
+    return valid;
   }
 
   // load triangles from vtk and deal with padding
-  int load_triangles_from_vtk(const int n_tri, int* faces){
-    triangles.clear();
+  template <typename T>
+  int load_triangles_from_vtk(Simplifier &s, const int n_tri, const T* faces){
+    s.resize_triangles(0);
+    s.triangles.reserve(n_tri);
+    Triangle t = {};
     for (int ii = 0; ii < n_tri; ii ++){
-      Triangle t;
-      t.attr = 0;
-      t.material = -1;
       if (faces[4*ii] != 3){
         return 1;
       }
       t.v[0] = faces[1 + 4*ii];
       t.v[1] = faces[2 + 4*ii];
       t.v[2] = faces[3 + 4*ii];
-      triangles.push_back(t);
+      s.triangles.push_back(t);
     }
     return 0;
   }
 
-  void load_arrays_int32(const int n_points, const int n_tri,
+  void load_arrays_int32(Simplifier &s, const int n_points, const int n_tri,
                          double* points, int* faces){
-    load_points(n_points, points);
-    load_triangles(n_tri, faces);
+    load_points(s, n_points, points);
+    load_triangles(s, n_tri, faces);
   }
 
-  void load_arrays_int64(const int n_points, const int n_tri,
+  void load_arrays_int64(Simplifier &s, const int n_points, const int n_tri,
                          double* points, int64_t* faces){
-    load_points(n_points, points);
-    load_triangles_int64(n_tri, faces);
+    load_points(s, n_points, points);
+    load_triangles(s, n_tri, faces);
   }
 
-  int n_points(){
-    return vertices.size();
+  int n_points(const Simplifier &s){
+    return s.vertices.size();
   }
 
-  int n_triangles(){
-    return triangles.size();
+  int n_triangles(const Simplifier &s){
+    return s.triangles.size();
   }
 
-  int n_collapses(){
-    return collapses.size();
+  // number of triangles not marked as deleted, i.e. the size of the result
+  int n_live_triangles(const Simplifier &s){
+    int n = 0;
+    for (const Triangle &t : s.triangles){
+      n += !t.deleted;
+    }
+    return n;
   }
 
-  // load triangles
-  void load_triangles(const int n_tri, int64_t* faces){
-    triangles.clear();
-    for (int ii = 0; ii < n_tri; ii ++){
-      Triangle t;
-      t.attr = 0;
-      t.material = -1;
-      t.v[0] = faces[0 + 3*ii];
-      t.v[1] = faces[1 + 3*ii];
-      t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
-    }
+  int n_collapses(const Simplifier &s){
+    return s.collapses.size() / 2;
   }
 
-  // populate a contiguous array with the points in the vertices vector
-  void get_points(double* points){
+  // populate a contiguous array of any floating type with the points in the
+  // vertices vector
+  template <typename T>
+  void get_points(Simplifier &s, T* points){
 
     // load vertices
-    int n_points = vertices.size();
+    int n_points = s.vertices.size();
     for (int ii = 0; ii < n_points; ii ++){
-      points[0 + 3*ii] = vertices[ii].p.x;
-      points[1 + 3*ii] = vertices[ii].p.y;
-      points[2 + 3*ii] = vertices[ii].p.z;
+      points[0 + 3*ii] = s.vertices[ii].p.x;
+      points[1 + 3*ii] = s.vertices[ii].p.y;
+      points[2 + 3*ii] = s.vertices[ii].p.z;
     }
   }
 
   // populate a contiguous array with the points in the vertices vector
-  void get_triangles(int* tri){
+  void get_triangles(Simplifier &s, int* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     for (int ii = 0; ii < n_tri; ii ++){
-      tri[0 + 3*ii] = triangles[ii].v[0];
-      tri[1 + 3*ii] = triangles[ii].v[1];
-      tri[2 + 3*ii] = triangles[ii].v[2];
+      tri[0 + 3*ii] = s.triangles[ii].v[0];
+      tri[1 + 3*ii] = s.triangles[ii].v[1];
+      tri[2 + 3*ii] = s.triangles[ii].v[2];
     }
   }
 
-  void get_collapses(int* coll){
-
-    // load vertices
-    int n_collapse = collapses.size();
-    for (int ii = 0; ii < n_collapse; ii ++){
-      coll[0 + 2*ii] = collapses.at(ii).at(0);
-      coll[1 + 2*ii] = collapses.at(ii).at(1);
+  void get_collapses(Simplifier &s, int* coll){
+    if (!s.collapses.empty()){
+      memcpy(coll, s.collapses.data(), s.collapses.size() * sizeof(int));
     }
   }
 
   // populate a contiguous array with the points in the vertices vector
-  int get_faces_int32(int32_t* tri){
+  int get_faces_int32(Simplifier &s, int32_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
+      if (!s.triangles[ii].deleted){
         tri[0 + 4*jj] = 3;
-        tri[1 + 4*jj] = triangles[ii].v[0];
-        tri[2 + 4*jj] = triangles[ii].v[1];
-        tri[3 + 4*jj] = triangles[ii].v[2];
+        tri[1 + 4*jj] = s.triangles[ii].v[0];
+        tri[2 + 4*jj] = s.triangles[ii].v[1];
+        tri[3 + 4*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
@@ -154,16 +205,16 @@ namespace Simplify{
 
   // populate a contiguous array with the points in the vertices
   // vector without the vtk padding
-  int get_faces_int32_no_padding(int32_t* tri){
+  int get_faces_int32_no_padding(Simplifier &s, int32_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
-        tri[0 + 3*jj] = triangles[ii].v[0];
-        tri[1 + 3*jj] = triangles[ii].v[1];
-        tri[2 + 3*jj] = triangles[ii].v[2];
+      if (!s.triangles[ii].deleted){
+        tri[0 + 3*jj] = s.triangles[ii].v[0];
+        tri[1 + 3*jj] = s.triangles[ii].v[1];
+        tri[2 + 3*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
@@ -171,20 +222,307 @@ namespace Simplify{
   }
 
   // populate a contiguous array with the points in the vertices vector
-  int get_faces_int64(int64_t* tri){
+  int get_faces_int64(Simplifier &s, int64_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
+      if (!s.triangles[ii].deleted){
         tri[0 + 4*jj] = 3;
-        tri[1 + 4*jj] = triangles[ii].v[0];
-        tri[2 + 4*jj] = triangles[ii].v[1];
-        tri[3 + 4*jj] = triangles[ii].v[2];
+        tri[1 + 4*jj] = s.triangles[ii].v[0];
+        tri[2 + 4*jj] = s.triangles[ii].v[1];
+        tri[3 + 4*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
     return jj;
   }
+
+  // release the vertex, triangle and reference buffers of the core; the
+  // collapse log is kept
+  void release_mesh(Simplifier &s){
+    std::vector<Vertex>().swap(s.vertices);
+    std::vector<Triangle>().swap(s.triangles);
+    std::vector<Ref>().swap(s.refs);
+    std::vector<std::array<vec3f,3> >().swap(s.triangle_uvs);
+    std::vector<int>().swap(s.triangle_materials);
+    std::vector<int>().swap(s.vertex_map);
+  }
+
+  // populate (n, 3) point and face arrays sized to the result, then release
+  // the core's buffers so the exported arrays are the only copy left
+  template <typename T>
+  void export_mesh(Simplifier &s, T* points, int32_t* faces){
+    get_points(s, points);
+    get_faces_int32_no_padding(s, faces);
+    release_mesh(s);
+  }
+
+  // decimate one partition of a mesh; the partition owns a local copy of
+  // its triangles and vertices, with the seam vertices locked
+  struct Partition {
+    Simplifier s;
+    std::vector<int> l2g;  // global index of every local vertex
+  };
+
+  // Split the triangles into n_partitions slabs of equal size along the
+  // longest axis of the bounding box, decimate the slabs concurrently with
+  // the vertices shared between slabs locked, then run a final pass over the
+  // merged mesh with the accumulated quadrics to clean up the seams. The
+  // collapses of every pass are recorded with the global vertex indices.
+  void simplify_partitioned(Simplifier &s, int target_count, int n_partitions,
+                            double agressiveness, bool lossless, bool heap,
+                            bool verbose, bool preserve_border, int n_threads){
+    auto run = [&](Simplifier &m, int target, bool verbose){
+      if (lossless){
+        m.simplify_mesh_lossless(verbose, preserve_border);
+      } else if (heap){
+        m.simplify_mesh_heap(target, verbose, preserve_border);
+      } else {
+        m.simplify_mesh(target, agressiveness, verbose, preserve_border);
+      }
+    };
+
+    int n_tri = s.triangles.size();
+    int n_vert = s.vertices.size();
+    if (n_partitions < 2 || n_tri < n_partitions){
+      run(s, target_count, verbose);
+      return;
+    }
+
+    // slab coordinate of every triangle: its centroid on the longest axis
+    vec3f lo = s.vertices[0].p, hi = s.vertices[0].p;
+    for (int ii = 0; ii < n_vert; ii ++){
+      const vec3f &p = s.vertices[ii].p;
+      lo.x = std::min(lo.x, p.x); hi.x = std::max(hi.x, p.x);
+      lo.y = std::min(lo.y, p.y); hi.y = std::max(hi.y, p.y);
+      lo.z = std::min(lo.z, p.z); hi.z = std::max(hi.z, p.z);
+    }
+    vec3f ext = hi - lo;
+    int axis = (ext.x >= ext.y && ext.x >= ext.z) ? 0 : (ext.y >= ext.z ? 1 : 2);
+    auto coord = [&](const vec3f &p){
+      return axis == 0 ? p.x : (axis == 1 ? p.y : p.z);
+    };
+    std::vector<double> key(n_tri);
+    for (int ii = 0; ii < n_tri; ii ++){
+      const Triangle &t = s.triangles[ii];
+      key[ii] = coord(s.vertices[t.v[0]].p) + coord(s.vertices[t.v[1]].p)
+        + coord(s.vertices[t.v[2]].p);
+    }
+
+    // cut values at the quantiles of the slab coordinate
+    std::vector<double> cuts(n_partitions - 1);
+    {
+      std::vector<double> sorted(key);
+      for (int ii = 0; ii < n_partitions - 1; ii ++){
+        auto nth = sorted.begin() + (size_t)n_tri * (ii + 1) / n_partitions;
+        std::nth_element(sorted.begin(), nth, sorted.end());
+        cuts[ii] = *nth;
+      }
+      std::sort(cuts.begin(), cuts.end());
+    }
+    std::vector<int> part(n_tri);
+    std::vector<int> part_size(n_partitions, 0);
+    for (int ii = 0; ii < n_tri; ii ++){
+      part[ii] = std::upper_bound(cuts.begin(), cuts.end(), key[ii]) - cuts.begin();
+      part_size[part[ii]] ++;
+    }
+    std::vector<double>().swap(key);
+
+    // a vertex used by triangles of two partitions lies on a seam
+    std::vector<int> owner(n_vert, -1);
+    std::vector<char> seam(n_vert, 0);
+    for (int ii = 0; ii < n_tri; ii ++){
+      for (int jj = 0; jj < 3; jj ++){
+        int v = s.triangles[ii].v[jj];
+        if (owner[v] == -1){
+          owner[v] = part[ii];
+        } else if (owner[v] != part[ii]){
+          seam[v] = 1;
+        }
+      }
+    }
+
+    // triangles of every partition, in their global order
+    std::vector<int> offset(n_partitions + 1, 0);
+    for (int pp = 0; pp < n_partitions; pp ++){
+      offset[pp + 1] = offset[pp] + part_size[pp];
+    }
+    std::vector<int> order(n_tri);
+    {
+      std::vector<int> fill(offset.begin(), offset.end() - 1);
+      for (int ii = 0; ii < n_tri; ii ++){
+        order[fill[part[ii]]++] = ii;
+      }
+    }
+
+    std::vector<Partition> parts(n_partitions);
+    std::vector<int> g2l(n_vert, -1);  // written only by the owning partition
+
+    // the partitions report their progress together: their collapses are
+    // counted as one and the callback runs every progress_interval of them,
+    // one call at a time. Once a call has thrown, the other partitions stop.
+    std::atomic<int> n_collapsed(0), n_removed(0);
+    std::atomic<bool> failed(false);
+    std::exception_ptr progress_error;
+    std::mutex progress_mutex;
+    {
+      // the concurrent partition runs count as collapse loop time
+      ScopedTimer timer(s.stats.time_collapse);
+      try {
+        parallel_for(n_partitions, n_threads, [&](int pp){
+          Partition &P = parts[pp];
+          std::unordered_map<int, int> seam_g2l;
+          P.s.triangles.reserve(part_size[pp]);
+          for (int kk = offset[pp]; kk < offset[pp + 1]; kk ++){
+            int tid = order[kk];
+            Triangle t = s.triangles[tid];
+            if (!s.triangle_uvs.empty()){
+              P.s.triangle_uvs.push_back(s.triangle_uvs[tid]);
+            }
+            if (!s.triangle_materials.empty()){
+              P.s.triangle_materials.push_back(s.triangle_materials[tid]);
+            }
+            P.s.triangle_ids.push_back(tid);
+            for (int jj = 0; jj < 3; jj ++){
+              int g = t.v[jj];
+              int local = P.l2g.size();
+              bool added;
+              if (seam[g]){
+                auto it = seam_g2l.emplace(g, local);
+                local = it.first->second;
+                added = it.second;
+              } else {
+                added = g2l[g] == -1;
+                if (added){
+                  g2l[g] = local;
+                }
+                local = g2l[g];
+              }
+              if (added){
+                P.l2g.push_back(g);
+                P.s.vertices.push_back(s.vertices[g]);
+                P.s.locked.push_back(seam[g]);
+              }
+              t.v[jj] = local;
+            }
+            P.s.triangles.push_back(t);
+          }
+          if (P.s.triangles.empty()){
+            return;
+          }
+          P.s.record_positions = s.record_positions;
+          P.s.max_error = s.max_error;
+          P.s.cancel_token = s.cancel_token;
+          P.s.deadline = s.deadline;
+          if (s.progress){
+            P.s.progress = [&, live_before = part_size[pp]](int, int live) mutable {
+              if (failed){
+                throw std::runtime_error("progress callback failed");
+              }
+              int removed = n_removed += live_before - live;
+              live_before = live;
+              int n = ++n_collapsed;
+              if (n % s.progress_interval == 0){
+                std::lock_guard<std::mutex> lock(progress_mutex);
+                try {
+                  s.progress(n, n_tri - removed);
+                } catch (...) {
+                  progress_error = std::current_exception();
+                  failed = true;
+                  throw;
+                }
+              }
+            };
+          }
+          int target = (int)((double)target_count * part_size[pp] / n_tri);
+          run(P.s, target, false);
+        });
+      } catch (...) {
+        // report the error of the callback rather than the aborts it caused
+        if (progress_error){
+          std::rethrow_exception(progress_error);
+        }
+        throw;
+      }
+    }
+
+    // merge the partitions back into the global mesh. Every triangle left
+    // goes back to its original index, so the merged mesh keeps the
+    // original triangle order; the slots of the removed triangles are
+    // compacted away below. Vertices collapsed in a partition are no longer
+    // referenced and go away with the final compaction; the partial
+    // quadrics of the seam vertices are summed.
+    std::vector<int> collapses;
+    std::vector<double> positions;
+    for (Triangle &t : s.triangles){
+      t.deleted = 1;
+    }
+    for (int ii = 0; ii < n_vert; ii ++){
+      if (seam[ii]){
+        s.vertices[ii].q = SymetricMatrix(0.0);
+      }
+    }
+    for (int pp = 0; pp < n_partitions; pp ++){
+      Partition &P = parts[pp];
+      // an interrupted partition stops the cross-seam pass as well
+      s.interrupted |= P.s.interrupted;
+      s.stats.candidates += P.s.stats.candidates;
+      s.stats.collapsed += P.s.stats.collapsed;
+      s.stats.rejected_border += P.s.stats.rejected_border;
+      s.stats.rejected_flipped += P.s.stats.rejected_flipped;
+      for (int c : P.s.collapses){
+        collapses.push_back(P.l2g[c]);
+      }
+      positions.insert(positions.end(), P.s.collapse_positions.begin(),
+                       P.s.collapse_positions.end());
+      std::vector<int> global(P.s.vertices.size());
+      for (size_t ii = 0; ii < global.size(); ii ++){
+        int g = P.l2g[P.s.vertex_map[ii]];
+        global[ii] = g;
+        Vertex &v = s.vertices[g];
+        v.p = P.s.vertices[ii].p;
+        v.q = seam[g] ? v.q + P.s.vertices[ii].q : P.s.vertices[ii].q;
+      }
+      for (size_t ii = 0; ii < P.s.triangles.size(); ii ++){
+        int tid = P.s.triangle_ids[ii];
+        Triangle &t = s.triangles[tid];
+        t = P.s.triangles[ii];
+        for (int jj = 0; jj < 3; jj ++){
+          t.v[jj] = global[t.v[jj]];
+        }
+        if (!P.s.triangle_uvs.empty()){
+          s.triangle_uvs[tid] = P.s.triangle_uvs[ii];
+        }
+        if (!P.s.triangle_materials.empty()){
+          s.triangle_materials[tid] = P.s.triangle_materials[ii];
+        }
+      }
+      P = Partition();
+    }
+    int n_left = 0;
+    for (int ii = 0; ii < n_tri; ii ++){
+      if (!s.triangles[ii].deleted){
+        s.copy_triangle(n_left++, ii);
+      }
+    }
+    s.resize_triangles(n_left);
+
+    if (verbose){
+      printf("partitions - triangles %d seams %d\n", (int)s.triangles.size(),
+             (int)std::count(seam.begin(), seam.end(), 1));
+    }
+
+    // cross-seam pass without rebuilding the quadrics
+    s.keep_quadrics = true;
+    s.progress_base = n_collapsed;
+    run(s, target_count, verbose);
+    s.keep_quadrics = false;
+    collapses.insert(collapses.end(), s.collapses.begin(), s.collapses.end());
+    s.collapses.swap(collapses);
+    positions.insert(positions.end(), s.collapse_positions.begin(),
+                     s.collapse_positions.end());
+    s.collapse_positions.swap(positions);
+  }
 }
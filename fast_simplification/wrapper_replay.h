@@ -1,35 +1,35 @@
 // wrap simplify header file for integration with cython
+#include <type_traits>
+
 #include "Replay.h"
 
 namespace Replay{
 
   // load collapses
-  void load_collapses(const int n_coll, int* coll){
-    collapses.clear();
-    for (int ii = 0; ii < n_coll; ii ++){
-      std::vector<int> c;
-      c.push_back(coll[0 + 2*ii]);
-      c.push_back(coll[1 + 2*ii]);
-      collapses.push_back(c);
-    }
+  void load_collapses(Replayer &s, const int n_coll, int* coll){
+    s.collapses.assign(coll, coll + 2*(size_t)n_coll);
   }
 
-  // load points
-  void load_points(const int n_points, float* points){
-    vertices.clear();
+  // load points of any floating type
+  template <typename T>
+  void load_points(Replayer &s, const int n_points, const T* points){
+    s.single_precision = std::is_same<T, float>::value;
+    s.vertices.clear();
+    s.vertices.reserve(n_points);
     // load vertices
     for (int ii = 0; ii < n_points; ii ++){
       Vertex v;
       v.p.x = points[0 + 3*ii];
       v.p.y = points[1 + 3*ii];
       v.p.z = points[2 + 3*ii];
-      vertices.push_back(v);
+      s.vertices.push_back(v);
     }
   }
 
   // load triangles
-  void load_triangles(const int n_tri, int* faces){
-    triangles.clear();
+  void load_triangles(Replayer &s, const int n_tri, int* faces){
+    s.triangles.clear();
+    s.triangles.reserve(n_tri);
     for (int ii = 0; ii < n_tri; ii ++){
       Triangle t;
       t.attr = 0;
@@ -37,13 +37,14 @@ namespace Replay{
       t.v[0] = faces[0 + 3*ii];
       t.v[1] = faces[1 + 3*ii];
       t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
+      s.triangles.push_back(t);
     }
   }
 
   // load triangles
-  void load_triangles_int64(const int n_tri, int64_t* faces){
-    triangles.clear();
+  void load_triangles_int64(Replayer &s, const int n_tri, int64_t* faces){
+    s.triangles.clear();
+    s.triangles.reserve(n_tri);
     for (int ii = 0; ii < n_tri; ii ++){
       Triangle t;
       t.attr = 0;
@@ -51,13 +52,14 @@ namespace Replay{
       t.v[0] = faces[0 + 3*ii];
       t.v[1] = faces[1 + 3*ii];
       t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
+      s.triangles.push_back(t);
     }
   }
 
   // load triangles from vtk and deal with padding
-  int load_triangles_from_vtk(const int n_tri, int* faces){
-    triangles.clear();
+  int load_triangles_from_vtk(Replayer &s, const int n_tri, int* faces){
+    s.triangles.clear();
+    s.triangles.reserve(n_tri);
     for (int ii = 0; ii < n_tri; ii ++){
       Triangle t;
       t.attr = 0;
@@ -68,40 +70,43 @@ namespace Replay{
       t.v[0] = faces[1 + 4*ii];
       t.v[1] = faces[2 + 4*ii];
       t.v[2] = faces[3 + 4*ii];
-      triangles.push_back(t);
+      s.triangles.push_back(t);
     }
     return 0;
   }
 
-  void load_arrays_int32(const int n_points, const int n_tri, const int n_coll,
-                         float* points, int* faces, int* collapses){
-    load_points(n_points, points);
-    load_triangles(n_tri, faces);
-    load_collapses(n_coll, collapses);
+  template <typename T>
+  void load_arrays_int32(Replayer &s, const int n_points, const int n_tri, const int n_coll,
+                         const T* points, int* faces, int* collapses){
+    load_points(s, n_points, points);
+    load_triangles(s, n_tri, faces);
+    load_collapses(s, n_coll, collapses);
   }
 
-  void load_arrays_int64(const int n_points, const int n_tri, const int n_coll,
-                         float* points, int64_t* faces, int* collapses){
-    load_points(n_points, points);
-    load_triangles_int64(n_tri, faces);
-    load_collapses(n_coll, collapses);
+  template <typename T>
+  void load_arrays_int64(Replayer &s, const int n_points, const int n_tri, const int n_coll,
+                         const T* points, int64_t* faces, int* collapses){
+    load_points(s, n_points, points);
+    load_triangles_int64(s, n_tri, faces);
+    load_collapses(s, n_coll, collapses);
   }
 
-  int n_points(){
-    return vertices.size();
+  int n_points(const Replayer &s){
+    return s.vertices.size();
   }
 
-  int n_triangles(){
-    return triangles.size();
+  int n_triangles(const Replayer &s){
+    return s.triangles.size();
   }
 
-  int n_collapses(){
-    return collapses.size();
+  int n_collapses(const Replayer &s){
+    return s.collapses.size() / 2;
   }
 
   // load triangles
-  void load_triangles(const int n_tri, int64_t* faces){
-    triangles.clear();
+  void load_triangles(Replayer &s, const int n_tri, int64_t* faces){
+    s.triangles.clear();
+    s.triangles.reserve(n_tri);
     for (int ii = 0; ii < n_tri; ii ++){
       Triangle t;
       t.attr = 0;
@@ -109,56 +114,54 @@ namespace Replay{
       t.v[0] = faces[0 + 3*ii];
       t.v[1] = faces[1 + 3*ii];
       t.v[2] = faces[2 + 3*ii];
-      triangles.push_back(t);
+      s.triangles.push_back(t);
     }
   }
 
-  // populate a contiguous array with the points in the vertices vector
-  void get_points(float* points){
+  // populate a contiguous array of any floating type with the points in the
+  // vertices vector
+  template <typename T>
+  void get_points(Replayer &s, T* points){
 
     // load vertices
-    int n_points = vertices.size();
+    int n_points = s.vertices.size();
     for (int ii = 0; ii < n_points; ii ++){
-      points[0 + 3*ii] = vertices[ii].p.x;
-      points[1 + 3*ii] = vertices[ii].p.y;
-      points[2 + 3*ii] = vertices[ii].p.z;
+      points[0 + 3*ii] = s.vertices[ii].p.x;
+      points[1 + 3*ii] = s.vertices[ii].p.y;
+      points[2 + 3*ii] = s.vertices[ii].p.z;
     }
   }
 
   // populate a contiguous array with the points in the vertices vector
-  void get_triangles(int* tri){
+  void get_triangles(Replayer &s, int* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     for (int ii = 0; ii < n_tri; ii ++){
-      tri[0 + 3*ii] = triangles[ii].v[0];
-      tri[1 + 3*ii] = triangles[ii].v[1];
-      tri[2 + 3*ii] = triangles[ii].v[2];
+      tri[0 + 3*ii] = s.triangles[ii].v[0];
+      tri[1 + 3*ii] = s.triangles[ii].v[1];
+      tri[2 + 3*ii] = s.triangles[ii].v[2];
     }
   }
 
-  void get_collapses(int* coll){
-
-    // load vertices
-    int n_collapse = collapses.size();
-    for (int ii = 0; ii < n_collapse; ii ++){
-      coll[0 + 2*ii] = collapses.at(ii).at(0);
-      coll[1 + 2*ii] = collapses.at(ii).at(1);
+  void get_collapses(Replayer &s, int* coll){
+    if (!s.collapses.empty()){
+      memcpy(coll, s.collapses.data(), s.collapses.size() * sizeof(int));
     }
   }
 
   // populate a contiguous array with the points in the vertices vector
-  int get_faces_int32(int32_t* tri){
+  int get_faces_int32(Replayer &s, int32_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
+      if (!s.triangles[ii].deleted){
         tri[0 + 3*jj] = 3;
-        tri[1 + 3*jj] = triangles[ii].v[0];
-        tri[2 + 3*jj] = triangles[ii].v[1];
-        tri[3 + 3*jj] = triangles[ii].v[2];
+        tri[1 + 3*jj] = s.triangles[ii].v[0];
+        tri[2 + 3*jj] = s.triangles[ii].v[1];
+        tri[3 + 3*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
@@ -167,16 +170,16 @@ namespace Replay{
 
   // populate a contiguous array with the points in the vertices
   // vector without the vtk padding
-  int get_faces_int32_no_padding(int32_t* tri){
+  int get_faces_int32_no_padding(Replayer &s, int32_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
-        tri[0 + 3*jj] = triangles[ii].v[0];
-        tri[1 + 3*jj] = triangles[ii].v[1];
-        tri[2 + 3*jj] = triangles[ii].v[2];
+      if (!s.triangles[ii].deleted){
+        tri[0 + 3*jj] = s.triangles[ii].v[0];
+        tri[1 + 3*jj] = s.triangles[ii].v[1];
+        tri[2 + 3*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
@@ -184,17 +187,17 @@ namespace Replay{
   }
 
   // populate a contiguous array with the points in the vertices vector
-  int get_faces_int64(int64_t* tri){
+  int get_faces_int64(Replayer &s, int64_t* tri){
 
     // load vertices
-    int n_tri = triangles.size();
+    int n_tri = s.triangles.size();
     int jj = 0;
     for (int ii = 0; ii < n_tri; ii ++){
-      if (!triangles[ii].deleted){
+      if (!s.triangles[ii].deleted){
         tri[0 + 4*jj] = 3;
-        tri[1 + 4*jj] = triangles[ii].v[0];
-        tri[2 + 4*jj] = triangles[ii].v[1];
-        tri[3 + 4*jj] = triangles[ii].v[2];
+        tri[1 + 4*jj] = s.triangles[ii].v[0];
+        tri[2 + 4*jj] = s.triangles[ii].v[1];
+        tri[3 + 4*jj] = s.triangles[ii].v[2];
         jj += 1;
       }
     }
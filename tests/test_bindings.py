@@ -61,6 +61,14 @@ def sphere():
     return pv.Sphere()
 
 
+def _simplified_plane(target_count=4):
+    """Return a ``Simplifier`` holding the decimated plane mesh."""
+    simplifier = _simplify.Simplifier()
+    simplifier.load_int32(PLANE_POINTS.shape[0], PLANE_FACES.shape[0], PLANE_POINTS, PLANE_FACES)
+    simplifier.simplify(target_count)
+    return simplifier
+
+
 # ---------------------------------------------------------------------------
 # Loader dtype dispatch
 # ---------------------------------------------------------------------------
@@ -113,9 +121,8 @@ def test_simplify_float32_points():
 
 
 def test_noncontiguous_input():
-    # nanobind's ``c_contig`` constraint is stricter than a plain pointer
-    # hand-off; the ``@ascontiguous`` decorator plus the wrapper's own
-    # ascontiguousarray calls must absorb non-contiguous input. Build
+    # The loader reads arrays of any strides in place, so non-contiguous
+    # views must load without a copy and give the same result. Build
     # non-contiguous views by slicing a padded buffer.
     padded_pts = np.zeros((PLANE_POINTS.shape[0], 4), dtype=np.float64)
     padded_pts[:, :3] = PLANE_POINTS
@@ -129,6 +136,36 @@ def test_noncontiguous_input():
 
     points, faces = fast_simplification.simplify(pts_view, faces_view, target_reduction=0.5)
     assert faces.shape == (4, 3)
+    expected_points, expected_faces = fast_simplification.simplify(
+        PLANE_POINTS, PLANE_FACES, target_reduction=0.5
+    )
+    assert np.array_equal(points, expected_points)
+    assert np.array_equal(faces, expected_faces)
+
+
+def test_simplify_uint32_faces():
+    _, f32 = fast_simplification.simplify(PLANE_POINTS, PLANE_FACES, target_reduction=0.5)
+    _, fu32 = fast_simplification.simplify(
+        PLANE_POINTS, PLANE_FACES.astype(np.uint32), target_reduction=0.5
+    )
+    assert np.array_equal(f32, fu32)
+
+
+@pytest.mark.parametrize("bad_index", [-1, 9])
+def test_simplify_faces_out_of_range(bad_index):
+    faces = PLANE_FACES.copy()
+    faces[3, 1] = bad_index
+    with pytest.raises(ValueError, match="outside the range"):
+        fast_simplification.simplify(PLANE_POINTS, faces, target_reduction=0.5)
+
+
+def test_simplify_too_many_faces():
+    # triangle ids are packed into 30 bits; a zero-stride view stands in for a
+    # mesh of 2**30 faces without allocating it
+    faces = np.broadcast_to(PLANE_FACES[:1].astype(np.int32), (1 << 30, 3))
+    simplifier = _simplify.Simplifier()
+    with pytest.raises(ValueError, match="too many faces"):
+        simplifier.load(PLANE_POINTS, faces)
 
 
 # ---------------------------------------------------------------------------
@@ -179,7 +216,7 @@ def test_return_faces_no_padding_is_flat_connectivity():
     # VTK >= 9.6.2: a flat int32 connectivity buffer, length n_tri*3, no
     # leading count column. It must match the reshaped (m, 3) faces.
     _, faces = fast_simplification.simplify(PLANE_POINTS, PLANE_FACES, target_reduction=0.5)
-    unpadded = _simplify.return_faces_int32_no_padding()
+    unpadded = _simplified_plane().return_faces_int32_no_padding()
     assert unpadded.dtype == np.int32
     assert unpadded.size == faces.size
     assert np.array_equal(unpadded.reshape(-1, 3), faces)
@@ -191,32 +228,101 @@ def test_return_faces_int32_is_vtk_padded():
     # a flat int32 buffer of length n_tri*4. A stride bug in the C++ core used
     # to write 4 values while advancing by 3, clobbering the next triangle's
     # leading count and leaving a garbage tail; guard against a regression.
-    fast_simplification.simplify(PLANE_POINTS, PLANE_FACES, target_reduction=0.5)
-    padded = _simplify.return_faces_int32()
+    simplifier = _simplified_plane()
+    padded = simplifier.return_faces_int32()
     assert padded.dtype == np.int32
     assert padded.size % 4 == 0
     quads = padded.reshape(-1, 4)
     assert np.all(quads[:, 0] == 3)  # every leading count is 3, no garbage tail
-    unpadded = _simplify.return_faces_int32_no_padding()
+    unpadded = simplifier.return_faces_int32_no_padding()
     assert np.array_equal(quads[:, 1:].ravel(), unpadded)
     # and it agrees with the (correctly strided) int64 accessor
-    assert np.array_equal(padded.astype(np.int64), _simplify.return_faces_int64())
+    assert np.array_equal(padded.astype(np.int64), simplifier.return_faces_int64())
 
 
 def test_return_faces_int64_is_vtk_padded():
     # ``return_faces_int64`` is the path simplify.py uses on the standard
     # 64-bit-vtkIdType build: VTK-padded connectivity [3, i, j, k] per
     # triangle. Its stripped payload must equal the unpadded connectivity.
-    fast_simplification.simplify(PLANE_POINTS, PLANE_FACES, target_reduction=0.5)
-    padded = _simplify.return_faces_int64()
+    simplifier = _simplified_plane()
+    padded = simplifier.return_faces_int64()
     assert padded.dtype == np.int64
     assert padded.size % 4 == 0
     quads = padded.reshape(-1, 4)
     assert np.all(quads[:, 0] == 3)
-    unpadded = _simplify.return_faces_int32_no_padding()
+    unpadded = simplifier.return_faces_int32_no_padding()
     assert np.array_equal(quads[:, 1:].ravel().astype(np.int32), unpadded)
 
 
+def test_return_mesh_releases_core_buffers():
+    simplifier = _simplified_plane()
+    expected_points = simplifier.return_points()
+    expected_faces = simplifier.return_faces_int32_no_padding().reshape(-1, 3)
+    n_collapses = simplifier.n_collapses()
+
+    points, faces = simplifier.return_mesh()
+    assert points.dtype == np.float64 and faces.dtype == np.int32
+    assert np.array_equal(points, expected_points)
+    assert np.array_equal(faces, expected_faces)
+    # the mesh buffers are gone, the collapse log is kept
+    assert simplifier.n_points() == 0
+    assert simplifier.n_triangles() == 0
+    assert simplifier.return_collapses().shape == (n_collapses, 2)
+
+
+def test_return_collapses_hands_off_log():
+    # The flat collapse log is moved into the returned array without a copy,
+    # so the Simplifier keeps nothing behind and a second call is empty.
+    simplifier = _simplified_plane()
+    n_collapses = simplifier.n_collapses()
+    collapses = simplifier.return_collapses()
+    assert collapses.dtype == np.int32
+    assert collapses.shape == (n_collapses, 2)
+    assert collapses.flags["C_CONTIGUOUS"] and collapses.flags["WRITEABLE"]
+    assert simplifier.n_collapses() == 0
+    assert simplifier.return_collapses().shape == (0, 2)
+
+
+# ---------------------------------------------------------------------------
+# Simplifier instances
+# ---------------------------------------------------------------------------
+
+
+def test_simplifier_instances_are_independent():
+    # Two instances hold separate meshes; loading or simplifying one must not
+    # touch the other.
+    first = _simplified_plane(target_count=4)
+    points_first = first.return_points()
+
+    second = _simplify.Simplifier()
+    second.load_int32(3, 1, PLANE_POINTS[:3].copy(), np.array([[0, 1, 2]], dtype=np.int32))
+    assert second.n_triangles() == 1
+
+    assert first.n_triangles() == 4
+    assert np.array_equal(first.return_points(), points_first)
+
+
+@skip_no_vtk
+def test_simplify_concurrent_threads_match_serial():
+    from concurrent.futures import ThreadPoolExecutor
+
+    meshes = [pv.Sphere(theta_resolution=10 + 5 * i, phi_resolution=10 + 5 * i) for i in range(4)]
+    args = [(mesh.points, mesh.regular_faces) for mesh in meshes]
+
+    def run(points_faces):
+        points, faces = points_faces
+        return fast_simplification.simplify(points, faces, 0.7, return_collapses=True)
+
+    serial = [run(arg) for arg in args]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        threaded = list(pool.map(run, args * 4))
+
+    for i, result in enumerate(threaded):
+        expected = serial[i % len(serial)]
+        for arr, arr_expected in zip(result, expected):
+            assert np.array_equal(arr, arr_expected)
+
+
 # ---------------------------------------------------------------------------
 # Argument validation
 # ---------------------------------------------------------------------------
@@ -380,3 +486,80 @@ def test_replay_sphere_roundtrip(sphere):
     )
     assert np.allclose(points_out, replay_points)
     assert np.array_equal(faces_out, replay_faces)
+
+
+@skip_no_vtk
+def test_replay_concurrent_threads_match_serial(sphere):
+    from concurrent.futures import ThreadPoolExecutor
+
+    points = sphere.points
+    faces = sphere.regular_faces
+    _, _, collapses = fast_simplification.simplify(points, faces, 0.8, return_collapses=True)
+    prefixes = [collapses[: len(collapses) * (i + 1) // 4] for i in range(4)]
+
+    def run(coll):
+        return fast_simplification.replay_simplification(points, faces, coll)
+
+    serial = [run(coll) for coll in prefixes]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        threaded = list(pool.map(run, prefixes * 4))
+
+    for i, result in enumerate(threaded):
+        expected = serial[i % len(serial)]
+        for arr, arr_expected in zip(result, expected):
+            assert np.array_equal(arr, arr_expected)
+
+
+@skip_no_vtk
+def test_compute_indice_mapping_matches_sweep(sphere):
+    from fast_simplification import _replay
+
+    points = sphere.points
+    _, _, collapses = fast_simplification.simplify(
+        points, sphere.regular_faces, 0.95, return_collapses=True
+    )
+
+    # reference: sweep ``mapping[origin] = mapping[mapping[origin]]`` to a fixed point
+    expected = np.arange(points.shape[0])
+    expected[collapses[:, 1]] = collapses[:, 0]
+    while True:
+        updated = expected[expected[collapses[:, 1]]]
+        if np.array_equal(updated, expected[collapses[:, 1]]):
+            break
+        expected[collapses[:, 1]] = updated
+    keep = np.setdiff1d(np.arange(points.shape[0]), collapses[:, 1])
+    application = np.zeros(points.shape[0], dtype=np.int64)
+    application[keep] = np.arange(keep.shape[0])
+
+    mapping = _replay.compute_indice_mapping(collapses, points.shape[0])
+    assert np.array_equal(mapping, application[expected])
+
+
+def test_compute_indice_mapping_rejects_invalid_collapses():
+    from fast_simplification import _replay
+
+    with pytest.raises(ValueError, match="cycle"):
+        _replay.compute_indice_mapping(np.array([[1, 0], [2, 1], [0, 2]], dtype=np.int32), 3)
+    with pytest.raises(ValueError, match="invalid point index"):
+        _replay.compute_indice_mapping(np.array([[0, 3]], dtype=np.int32), 3)
+
+
+def test_replay_full_matches_replay_simplification():
+    from fast_simplification import _replay
+
+    _, _, collapses = fast_simplification.simplify(
+        PLANE_POINTS, PLANE_FACES, target_reduction=0.5, return_collapses=True
+    )
+    points, triangles, indice_mapping = _replay.replay_full(
+        PLANE_POINTS.astype(np.float32), PLANE_FACES, collapses
+    )
+    expected = fast_simplification.replay_simplification(PLANE_POINTS, PLANE_FACES, collapses)
+    assert points.dtype == np.float32
+    assert triangles.dtype == np.int64 and indice_mapping.dtype == np.int64
+    for arr, arr_expected in zip((points, triangles, indice_mapping), expected):
+        assert np.array_equal(arr, arr_expected)
+
+    # every point must belong to a triangle; replay_simplification strips the others
+    extra = np.vstack([PLANE_POINTS, [[2.0, 2.0, 0.0]]]).astype(np.float32)
+    with pytest.raises(ValueError, match="not used by any triangle"):
+        _replay.replay_full(extra, PLANE_FACES, collapses)
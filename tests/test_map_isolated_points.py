@@ -204,3 +204,42 @@ def test_map_isolated_points():
     mapping, merged_points = map_isolated_points(points, edges, triangles)
     assert np.allclose(mapping, target_mapping)
     assert np.allclose(merged_points, target_merged_points)
+
+
+def _map_isolated_points_reference(n_points, edges, triangles):
+    # level-by-level fixed point the native implementation must reproduce
+    to_connect = np.intersect1d(np.setdiff1d(np.arange(n_points), np.unique(triangles)), edges)
+    mapping = np.arange(n_points, dtype=np.int64)
+    edges = edges[np.isin(edges, to_connect).any(axis=1)]
+    n_edges_old = -1
+    while edges.shape[0] > 0 and edges.shape[0] != n_edges_old:
+        n_edges_old = edges.shape[0]
+        keep = np.isin(edges, to_connect).all(axis=1)
+        connexions = edges[~keep]
+        a = np.isin(connexions, to_connect)
+        merged = connexions[np.where(a)]
+        mapping[merged] = mapping[connexions[np.where(~a)]]
+        to_connect = np.setdiff1d(to_connect, merged)
+        edges = edges[keep]
+        edges = edges[np.isin(edges, to_connect).any(axis=1)]
+    return mapping, np.where(mapping != np.arange(n_points))[0], to_connect
+
+
+def test_map_isolated_points_random_graphs():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n_points = 60
+        triangles = rng.integers(0, n_points, (rng.integers(1, 8), 3))
+        edges = rng.integers(0, n_points, (rng.integers(0, 80), 2))
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        points = rng.random((n_points, 3))
+
+        mapping, merged, outliers = map_isolated_points(
+            points, edges, triangles, return_outliers=True
+        )
+        ref_mapping, ref_merged, ref_outliers = _map_isolated_points_reference(
+            n_points, edges, triangles
+        )
+        assert np.array_equal(mapping, ref_mapping)
+        assert np.array_equal(merged, ref_merged)
+        assert np.array_equal(outliers, ref_outliers)
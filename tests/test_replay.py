@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 import fast_simplification
+from fast_simplification import _replay
 
 try:
     import pyvista as pv
@@ -221,3 +222,217 @@ def test_replay_unreferenced_vertices_middle_matches_clean():
 
     for v in np.unique(faces):
         assert vm0[v] == vm1[shifted(v)]
+
+
+@skip_no_vtk
+def test_replay_session_matches_replay(mesh):
+    points = mesh.points
+    faces = mesh.regular_faces
+    _, _, collapses = fast_simplification.simplify(points, faces, 0.9, return_collapses=True)
+    session = fast_simplification.ReplaySession(points, faces, collapses)
+    assert session.n_collapses == len(collapses)
+
+    # forward, then backward through the levels of detail
+    counts = [len(collapses) // 4, len(collapses) // 2, len(collapses)]
+    for n in counts + counts[::-1] + [0]:
+        expected = fast_simplification.replay_simplification(points, faces, collapses[:n])
+        for arr, arr_expected in zip(session.at(n), expected):
+            assert np.array_equal(arr, arr_expected)
+        assert session.position == n
+
+    session.advance(10)
+    assert session.position == 10
+    with pytest.raises(ValueError, match="n_collapses"):
+        session.seek(len(collapses) + 1)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_replay_keeps_point_dtype(mesh, dtype):
+    points = mesh.points.astype(dtype)
+    faces = mesh.regular_faces
+    _, _, collapses = fast_simplification.simplify(points, faces, 0.9, return_collapses=True)
+
+    points_out, _, _ = fast_simplification.replay_simplification(points, faces, collapses)
+    assert points_out.dtype == dtype
+    session = fast_simplification.ReplaySession(points, faces, collapses)
+    assert session.at(len(collapses))[0].dtype == dtype
+
+    # float64 points are no longer rounded to float32 on the way in
+    points_single, _, _ = fast_simplification.replay_simplification(
+        points.astype(np.float32), faces, collapses
+    )
+    assert np.allclose(points_out, points_single, atol=1e-5)
+
+
+def _reduce_point_data_reference(values, mapping, n_out):
+    total = np.zeros((n_out,) + values.shape[1:])
+    count = np.zeros(n_out)
+    np.add.at(total, mapping, values)
+    np.add.at(count, mapping, 1)
+    return total / count.reshape((-1,) + (1,) * (values.ndim - 1))
+
+
+def test_apply_collapses_to_point_data(mesh):
+    points = mesh.points.astype(np.float64)
+    faces = mesh.regular_faces
+    points_out, faces_out, collapses = fast_simplification.simplify(
+        points, faces, 0.9, return_collapses=True
+    )
+    _, _, indice_mapping = fast_simplification.replay_simplification(points, faces, collapses)
+    normals = mesh.point_normals
+    data = {"points": points, "normals": normals, "ids": np.arange(len(points))}
+
+    # the collapses with the triangles and the replayed mapping agree
+    from_collapses = fast_simplification.apply_collapses_to_point_data(
+        data, collapses, triangles=faces
+    )
+    from_mapping = fast_simplification.apply_collapses_to_point_data(data, indice_mapping)
+    for name in data:
+        assert np.allclose(from_collapses[name], from_mapping[name])
+    assert from_collapses["normals"].dtype == normals.dtype
+    expected = _reduce_point_data_reference(normals, indice_mapping, len(points_out))
+    assert np.allclose(from_collapses["normals"], expected, atol=1e-6)
+
+    # every surviving point keeps its own id, the lowest of the merged ones
+    first = fast_simplification.apply_collapses_to_point_data(
+        [data["ids"], points], indice_mapping, "first"
+    )
+    assert first[0].dtype == data["ids"].dtype
+    assert np.array_equal(first[1], points[first[0]])
+    # non floating point arrays are never averaged and keep their dtype
+    labels = {"ids": data["ids"].astype(np.int32), "flags": data["ids"] % 3 == 0}
+    for reduction in ("mean", "first"):
+        kept = fast_simplification.apply_collapses_to_point_data(labels, indice_mapping, reduction)
+        assert kept["ids"].dtype == np.int32 and kept["flags"].dtype == bool
+        assert np.array_equal(kept["ids"], first[0])
+        assert np.array_equal(kept["flags"], labels["flags"][first[0]])
+    large = data["ids"] + (1 << 60)
+    kept = fast_simplification.apply_collapses_to_point_data(large, indice_mapping, "max")
+    expected = np.zeros(len(points_out), dtype=np.int64)
+    np.maximum.at(expected, indice_mapping, large)
+    assert np.array_equal(kept, expected)
+    maximum = fast_simplification.apply_collapses_to_point_data(points, indice_mapping, "max")
+    for axis in range(3):
+        expected = np.full(len(points_out), -np.inf)
+        np.maximum.at(expected, indice_mapping, points[:, axis])
+        assert np.array_equal(maximum[:, axis], expected)
+
+    with pytest.raises(ValueError, match="reduction"):
+        fast_simplification.apply_collapses_to_point_data(points, indice_mapping, "median")
+    with pytest.raises(ValueError, match="one entry per point"):
+        fast_simplification.apply_collapses_to_point_data([points, points[1:]], indice_mapping)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"method": "heap"}, {"n_partitions": 3}])
+def test_apply_collapses_to_cell_data(mesh, kwargs):
+    points = mesh.points
+    faces = mesh.regular_faces
+    _, faces_out, collapses = fast_simplification.simplify(
+        points, faces, 0.9, return_collapses=True, **kwargs
+    )
+    _, _, indice_mapping = fast_simplification.replay_simplification(points, faces, collapses)
+    ids = np.arange(len(faces))
+    for source in (collapses, indice_mapping):
+        kept = fast_simplification.apply_collapses_to_cell_data(ids, faces, source)
+        assert kept.shape == (len(faces_out),)
+        # the surviving triangles map to the decimated triangles
+        assert np.array_equal(indice_mapping[faces[kept]], faces_out)
+
+
+def test_replay_session_unreferenced_points():
+    points = np.array(
+        [[0.0, 0.0, 0.0], [9.0, 9.0, 9.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0]]
+    )
+    faces = np.array([[0, 2, 3], [2, 4, 3]])
+    _, _, collapses = fast_simplification.simplify(points, faces, 0.5, return_collapses=True)
+    session = fast_simplification.ReplaySession(points, faces, collapses)
+    expected = fast_simplification.replay_simplification(points, faces, collapses)
+    result = session.at(len(collapses))
+    for arr, arr_expected in zip(result, expected):
+        assert np.array_equal(arr, arr_expected)
+    assert result[2][1] == -1
+
+
+@skip_no_vtk
+def test_collapse_history_roundtrip(mesh, tmp_path):
+    points = mesh.points
+    faces = mesh.regular_faces
+    _, _, collapses = fast_simplification.simplify(points, faces, 0.9, return_collapses=True)
+    positions = np.random.default_rng(0).random((len(collapses), 3))
+    errors = np.arange(len(collapses), dtype=np.float64)
+
+    path = tmp_path / "sphere.fsc"
+    fast_simplification.save_collapses(path, collapses, len(points), positions, errors)
+    # varint deltas are much smaller than int32 pairs
+    assert path.stat().st_size < collapses.nbytes + positions.nbytes + errors.nbytes
+
+    history = fast_simplification.load_collapses(path)
+    assert history.n_points == len(points)
+    assert np.array_equal(history.collapses, collapses)
+    assert np.array_equal(history.positions, positions)
+    assert np.array_equal(history.errors, errors)
+
+    # the stored positions are used by the replay
+    expected = fast_simplification.replay_simplification(points, faces, collapses, positions)
+    for source in (path, str(path), np.memmap(path, dtype=np.uint8, mode="r")):
+        result = fast_simplification.replay_simplification(points, faces, source)
+        for arr, arr_expected in zip(result, expected):
+            assert np.array_equal(arr, arr_expected)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"method": "heap"}, {"n_partitions": 4}, {"lossless": True}],
+)
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_replay_positions_match_simplify(mesh, kwargs, dtype):
+    points = mesh.points.astype(dtype)
+    faces = mesh.regular_faces
+    points_out, faces_out, collapses, positions = fast_simplification.simplify(
+        points, faces, 0.9, return_collapse_positions=True, **kwargs
+    )
+    assert positions.shape == (len(collapses), 3)
+
+    points_replay, faces_replay, _ = fast_simplification.replay_simplification(
+        points, faces, collapses, positions
+    )
+    assert points_replay.dtype == points_out.dtype == dtype
+    assert np.array_equal(points_replay, points_out)
+    assert np.array_equal(faces_replay, faces_out)
+
+    with pytest.raises(ValueError, match="positions"):
+        fast_simplification.replay_simplification(points, faces, collapses, positions[:, :2])
+
+
+def test_collapse_history_errors(tmp_path):
+    path = tmp_path / "empty.fsc"
+    fast_simplification.save_collapses(path, np.zeros((0, 2), dtype=np.int32), 4)
+    history = fast_simplification.load_collapses(path)
+    assert history.collapses.shape == (0, 2)
+    assert history.positions is None and history.errors is None
+
+    data = np.fromfile(path, dtype=np.uint8)
+    with pytest.raises(ValueError, match="not a collapse history"):
+        fast_simplification.load_collapses(data[::-1].copy())
+
+    path = tmp_path / "plane.fsc"
+    fast_simplification.save_collapses(path, [[0, 1], [2, 3]], 4)
+    data = np.fromfile(path, dtype=np.uint8)
+    tampered = data.copy()
+    tampered[24] = 3  # claim a third collapse
+    with pytest.raises(ValueError, match="corrupted"):
+        fast_simplification.load_collapses(tampered)
+    tampered = data.copy()
+    tampered[24:40] = np.array([1 << 40, 1 << 41], dtype="<u8").view(np.uint8)
+    with pytest.raises(ValueError, match="truncated"):
+        fast_simplification.load_collapses(tampered)
+    with pytest.raises(ValueError, match="truncated"):
+        fast_simplification.load_collapses(data[:40])
+    with pytest.raises(ValueError, match="truncated"):
+        _replay.decode_collapses(data[40:44], 1 << 36)
+    with pytest.raises(ValueError, match="outside the range"):
+        fast_simplification.save_collapses(path, [[0, 4]], 4)
+    with pytest.raises(ValueError, match="recorded on a mesh with 4 points"):
+        fast_simplification.replay_simplification(
+            np.zeros((3, 3)), [[0, 1, 2]], tmp_path / "empty.fsc"
+        )
@@ -1,3 +1,5 @@
+import threading
+
 import numpy as np
 import pytest
 
@@ -88,6 +90,11 @@ def test_simplify(mesh):
     n_collapses = collapses.shape[0]
     assert n_points_after_simplification == n_points_before_simplification - n_collapses
 
+    # points come back in the dtype they were given in
+    assert points.dtype == mesh.points.dtype == np.float32
+    points, faces = fast_simplification.simplify(
+        mesh.points.astype(np.float64), triangles, reduction
+    )
     assert points.dtype == np.float64
 
 
@@ -100,6 +107,21 @@ def test_simplify_lossless(mesh):
     assert np.allclose(triangles, faces)
 
 
+@skip_no_vtk
+def test_simplify_lossless_flat_region():
+    # the inside of the plane collapses over many passes, the sphere is kept
+    plane = pv.Plane(i_resolution=60, j_resolution=60).triangulate()
+    sphere = pv.Sphere().translate((3, 0, 0))
+    merged = plane + sphere
+    points, faces = fast_simplification.simplify(
+        merged.points, merged.regular_faces, lossless=True, preserve_border=True
+    )
+    out = pv.PolyData(points, np.insert(faces, 0, 3, axis=1))
+    assert out.n_cells < merged.n_cells // 2
+    assert np.allclose(out.bounds, merged.bounds)
+    assert np.isclose(out.area, merged.area)
+
+
 @skip_no_vtk
 def test_simplify_agg(mesh):
     triangles = mesh._connectivity_array.reshape(-1, 3)
@@ -131,6 +153,30 @@ def test_simplify_mesh(mesh):
     assert mesh_out.n_cells == mesh.n_cells * reduction
 
 
+@skip_no_vtk
+def test_simplify_mesh_carries_data(mesh):
+    mesh = mesh.copy()
+    mesh.point_data["height"] = mesh.points[:, 2]
+    mesh.point_data["point_ids"] = np.arange(mesh.n_points, dtype=np.int32)
+    mesh.cell_data["ids"] = np.arange(mesh.n_cells)
+    mesh_out = fast_simplification.simplify_mesh(mesh, 0.5)
+
+    assert mesh_out.point_data["Normals"].shape == (mesh_out.n_points, 3)
+    # heights are averaged over the merged points, so they stay in range
+    height = mesh_out.point_data["height"]
+    assert height.shape == (mesh_out.n_points,)
+    assert mesh.points[:, 2].min() <= height.min() and height.max() <= mesh.points[:, 2].max()
+    # integer ids are not averaged: every point keeps the id of one of the
+    # points merged into it, so they stay distinct
+    point_ids = mesh_out.point_data["point_ids"]
+    assert point_ids.dtype == np.int32
+    assert np.unique(point_ids).size == mesh_out.n_points
+    # every cell keeps the id of the triangle it comes from
+    ids = mesh_out.cell_data["ids"]
+    assert ids.shape == (mesh_out.n_cells,)
+    assert np.all(np.diff(ids) > 0)
+
+
 @skip_no_vtk
 def test_simplify_mesh_fixed_size_storage(mesh):
     reduction = 0.5
@@ -195,3 +241,354 @@ def test_preserve_border():
 
     assert _n_boundary_points(_as_polydata(p_free, f_free)) < n_border_in
     assert _n_boundary_points(_as_polydata(p_kept, f_kept)) == n_border_in
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("n_threads", [1, 3])
+def test_simplify_many_matches_simplify(n_threads):
+    meshes = [pv.Sphere(theta_resolution=10 + 4 * i, phi_resolution=12 + 2 * i) for i in range(5)]
+    reductions = [0.1, 0.3, 0.5, 0.7, 0.9]
+    aggs = [7, 5, 7, 3, 7]
+    batch = [(mesh.points, mesh.regular_faces.astype(np.int64)) for mesh in meshes]
+
+    results = fast_simplification.simplify_many(
+        batch, target_reduction=reductions, agg=aggs, return_collapses=True, n_threads=n_threads
+    )
+    assert len(results) == len(meshes)
+    for (points, faces), reduction, agg, result in zip(batch, reductions, aggs, results):
+        expected = fast_simplification.simplify(
+            points, faces, reduction, agg=agg, return_collapses=True
+        )
+        for arr, arr_expected in zip(result, expected):
+            assert arr.dtype == arr_expected.dtype
+            assert np.array_equal(arr, arr_expected)
+
+
+@skip_no_vtk
+def test_simplify_many_target_count(mesh):
+    batch = [(mesh.points, mesh.regular_faces)] * 3
+    results = fast_simplification.simplify_many(batch, target_count=[100, 200, 300])
+    assert [faces.shape[0] for _, faces in results] == [100, 200, 300]
+
+
+def test_simplify_many_bad_args():
+    points = [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    faces = [[0, 1, 2]]
+    with pytest.raises(ValueError, match="one entry per mesh"):
+        fast_simplification.simplify_many([(points, faces)] * 2, target_reduction=[0.5])
+    with pytest.raises(ValueError, match="You must specify"):
+        fast_simplification.simplify_many([(points, faces)])
+    with pytest.raises(ValueError, match=r"\(n, 3\)"):
+        fast_simplification.simplify_many([(points, [[0, 1]])], target_reduction=0.5)
+    assert fast_simplification.simplify_many([], target_reduction=0.5) == []
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("reduction", [0.25, 0.5, 0.9])
+def test_simplify_heap_reaches_target(reduction):
+    mesh = pv.Sphere(theta_resolution=60, phi_resolution=60)
+    triangles = mesh.regular_faces
+    target_count = int((1 - reduction) * triangles.shape[0])
+    points, faces, collapses = fast_simplification.simplify(
+        mesh.points, triangles, reduction, return_collapses=True, method="heap"
+    )
+    # each collapse removes one or two triangles
+    assert target_count - 1 <= faces.shape[0] <= target_count
+    assert points.shape[0] == mesh.n_points - collapses.shape[0]
+
+    replay_points, replay_faces, _ = fast_simplification.replay_simplification(
+        mesh.points, triangles, collapses
+    )
+    assert np.allclose(points, replay_points, atol=1e-5)
+    assert np.array_equal(faces, replay_faces)
+
+
+@skip_no_vtk
+def test_simplify_heap_reaches_target_fine_poles():
+    # the pole fans of a fine UV sphere are made of slivers, which used to
+    # stall the heap engine thousands of triangles above the target
+    mesh = pv.Sphere(theta_resolution=300, phi_resolution=300)
+    triangles = mesh.regular_faces
+    target_count = 1000
+    points, faces, collapses = fast_simplification.simplify(
+        mesh.points, triangles, target_count=target_count, return_collapses=True, method="heap"
+    )
+    assert target_count - 1 <= faces.shape[0] <= target_count
+
+    replay_points, replay_faces, _ = fast_simplification.replay_simplification(
+        mesh.points, triangles, collapses
+    )
+    assert np.allclose(points, replay_points, atol=1e-5)
+    assert np.array_equal(faces, replay_faces)
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("method", ["threshold", "heap"])
+def test_simplify_max_error(method):
+    mesh = pv.Sphere(theta_resolution=60, phi_resolution=60)
+    points = mesh.points.astype(np.float64)
+    faces = mesh.regular_faces
+
+    # a bound that is never reached leaves the decimation untouched
+    expected = fast_simplification.simplify(points, faces, 0.9, method=method)
+    bounded = fast_simplification.simplify(points, faces, 0.9, method=method, max_error=np.inf)
+    for arr, arr_expected in zip(bounded, expected):
+        assert np.array_equal(arr, arr_expected)
+
+    # without a target, a larger bound removes more triangles
+    n_faces = [
+        fast_simplification.simplify(points, faces, method=method, max_error=eps)[1].shape[0]
+        for eps in (1e-8, 1e-6, 1e-4)
+    ]
+    assert faces.shape[0] > n_faces[0] > n_faces[1] > n_faces[2]
+
+    # with a target, the first limit reached wins
+    _, faces_out = fast_simplification.simplify(points, faces, 0.5, method=method, max_error=1e-4)
+    assert faces_out.shape[0] == faces.shape[0] // 2
+
+    with pytest.raises(ValueError, match="lossless"):
+        fast_simplification.simplify(points, faces, lossless=True, max_error=1e-6)
+    with pytest.raises(ValueError, match="non-negative"):
+        fast_simplification.simplify(points, faces, method=method, max_error=-1.0)
+
+
+@skip_no_vtk
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"method": "heap"}, {"lossless": True}, {"n_partitions": 3}]
+)
+def test_simplify_interrupted(kwargs):
+    mesh = pv.Plane(i_resolution=300, j_resolution=300).triangulate()
+    points = mesh.points.astype(np.float64)
+    faces = mesh.regular_faces
+
+    # an exhausted budget or a cancelled token stops before the first collapse
+    token = fast_simplification.CancellationToken()
+    token.cancel()
+    for interrupt in ({"time_budget": 0}, {"cancel_token": token}):
+        points_out, faces_out, collapses = fast_simplification.simplify(
+            points, faces, 0.9, return_collapses=True, **interrupt, **kwargs
+        )
+        assert collapses.shape == (0, 2)
+        assert np.array_equal(points_out, points)
+        assert np.array_equal(np.sort(faces_out, axis=0), np.sort(faces, axis=0))
+
+    # cancelled from another thread: the partial result is a valid mesh
+    # that the returned collapses reproduce
+    token.reset()
+    threading.Timer(0.02, token.cancel).start()
+    points_out, faces_out, collapses = fast_simplification.simplify(
+        points, faces, 0.9, return_collapses=True, cancel_token=token, **kwargs
+    )
+    assert token.cancelled
+    assert faces_out.shape[0] <= faces.shape[0]
+    assert faces_out.max() < points_out.shape[0]
+    replayed_points, replayed_faces, _ = fast_simplification.replay_simplification(
+        points, faces, collapses
+    )
+    assert replayed_points.shape == points_out.shape
+    assert replayed_faces.shape == faces_out.shape
+
+    # checked before the mesh is even looked at
+    with pytest.raises(ValueError, match="``time_budget`` must be non-negative"):
+        fast_simplification.simplify(points[:, :2], faces, 0.9, time_budget=-1.0)
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("kwargs", [{}, {"method": "heap"}, {"n_partitions": 3}])
+def test_simplify_progress_and_stats(kwargs):
+    mesh = pv.Sphere(theta_resolution=60, phi_resolution=60)
+    points = mesh.points.astype(np.float64)
+    faces = mesh.regular_faces
+
+    calls = []
+    points_out, faces_out, collapses, stats = fast_simplification.simplify(
+        points,
+        faces,
+        0.9,
+        return_collapses=True,
+        progress=lambda n_collapses, n_triangles: calls.append((n_collapses, n_triangles)),
+        progress_interval=100,
+        return_stats=True,
+        **kwargs,
+    )
+
+    # reporting progress does not change the result
+    expected = fast_simplification.simplify(points, faces, 0.9, return_collapses=True, **kwargs)
+    for arr, arr_expected in zip((points_out, faces_out, collapses), expected):
+        assert np.array_equal(arr, arr_expected)
+
+    assert isinstance(stats, fast_simplification.SimplifyStats)
+    assert stats.collapsed == collapses.shape[0]
+    assert stats.candidates == stats.collapsed + stats.rejected_border + stats.rejected_flipped
+    assert stats.thresholds.shape == (stats.iterations,)
+    assert not stats.interrupted
+    assert stats.time_load > 0 and stats.time_collapse > 0 and stats.time_export > 0
+    # the concurrent partitions count their collapses together, but may
+    # report them out of order
+    assert len(calls) == collapses.shape[0] // 100
+    assert sorted(n for n, _ in calls) == list(range(100, 100 * len(calls) + 1, 100))
+    if "n_partitions" not in kwargs:
+        assert all(a[1] > b[1] for a, b in zip(calls, calls[1:]))
+
+    def abort(n_collapses, n_triangles):
+        raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError, match="abort"):
+        fast_simplification.simplify(
+            points, faces, 0.9, progress=abort, progress_interval=10, **kwargs
+        )
+    with pytest.raises(ValueError, match="progress_interval"):
+        fast_simplification.simplify(points, faces, 0.9, progress=abort, progress_interval=0)
+    # the interval is ignored without a callback
+    fast_simplification.simplify(points, faces, 0.9, progress_interval=0)
+
+
+@skip_no_vtk
+def test_simplify_relative_error_scale_invariant():
+    mesh = pv.Sphere(theta_resolution=40, phi_resolution=40)
+    points = mesh.points.astype(np.float64)
+    faces = mesh.regular_faces
+    # scaling by a power of two is exact, so every quadric error scales by
+    # the square of the factor and the heap collapses the same edges
+    results = [
+        fast_simplification.simplify(
+            points * scale, faces, method="heap", max_error=1e-5, relative_error=True
+        )
+        for scale in (1.0, 1024.0)
+    ]
+    assert results[0][1].shape[0] < faces.shape[0]
+    assert np.array_equal(results[0][1], results[1][1])
+    assert np.array_equal(results[0][0] * 1024.0, results[1][0])
+
+
+def test_preserve_border_high_valence_fan():
+    # a flat disk made of a single fan: the center has a valence of n and
+    # every rim point is on the border
+    n = 2000
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    rim = np.column_stack([np.cos(angles), np.sin(angles), np.zeros(n)])
+    points = np.vstack([[0.0, 0.0, 0.0], rim])
+    faces = np.column_stack([np.zeros(n), 1 + np.arange(n), 1 + (np.arange(n) + 1) % n])
+    faces = faces.astype(np.int32)
+
+    _, faces_out, collapses = fast_simplification.simplify(
+        points, faces, 0.5, preserve_border=True, return_collapses=True
+    )
+    # only the center may move, so nothing can be collapsed
+    assert len(collapses) == 0
+    assert faces_out.shape == faces.shape
+
+
+def test_preserve_border_non_manifold_edge():
+    # three grid pages sharing a spine: every spine edge is used by three
+    # triangles, so the spine is a border even though no edge of an inner
+    # spine point is open
+    m = 10
+    t = np.linspace(0, 1, m + 1)
+    points = [np.column_stack([t, np.zeros(m + 1), np.zeros(m + 1)])]
+    faces = []
+    for k, angle in enumerate(np.linspace(0, 2 * np.pi, 3, endpoint=False)):
+        direction = np.array([0.0, np.cos(angle), np.sin(angle)])
+        ids = [np.arange(m + 1)]
+        for row in range(1, m + 1):
+            ids.append((m + 1) * (1 + k * m + row - 1) + np.arange(m + 1))
+            points.append(np.column_stack([t, np.zeros(m + 1), np.zeros(m + 1)]))
+            points[-1] += direction * row / m
+        for row in range(m):
+            a, b = ids[row], ids[row + 1]
+            faces.append(np.column_stack([a[:-1], a[1:], b[1:]]))
+            faces.append(np.column_stack([a[:-1], b[1:], b[:-1]]))
+    points = np.vstack(points)
+    faces = np.vstack(faces).astype(np.int32)
+
+    points_out, _ = fast_simplification.simplify(points, faces, 0.9, preserve_border=True)
+    for point in points[: m + 1]:
+        assert np.isclose(points_out, point).all(axis=1).any()
+
+
+@skip_no_vtk
+def test_simplify_heap_preserve_border():
+    mesh = pv.Plane(i_resolution=20, j_resolution=20).triangulate()
+    n_border_in = _n_boundary_points(mesh)
+    out = fast_simplification.simplify_mesh(
+        mesh, target_reduction=0.9, preserve_border=True, method="heap"
+    )
+    assert _n_boundary_points(out) == n_border_in
+
+
+def test_simplify_bad_method():
+    points = [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+    with pytest.raises(ValueError, match="``method``"):
+        fast_simplification.simplify(points, [[0, 1, 2]], 0.5, method="greedy")
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("method", ["threshold", "heap"])
+def test_simplify_n_threads_deterministic(method):
+    mesh = pv.Plane(i_resolution=30, j_resolution=30).triangulate()
+    expected = fast_simplification.simplify(
+        mesh.points, mesh.regular_faces, 0.8, return_collapses=True, method=method, n_threads=1
+    )
+    for n_threads in [2, 4]:
+        result = fast_simplification.simplify(
+            mesh.points,
+            mesh.regular_faces,
+            0.8,
+            return_collapses=True,
+            method=method,
+            n_threads=n_threads,
+        )
+        for arr, arr_expected in zip(result, expected):
+            assert np.array_equal(arr, arr_expected)
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("method", ["threshold", "heap"])
+@pytest.mark.parametrize("n_partitions", [2, 5])
+def test_simplify_partitioned(method, n_partitions):
+    mesh = pv.Sphere(theta_resolution=80, phi_resolution=80)
+    triangles = mesh.regular_faces
+    target_count = int(0.1 * triangles.shape[0])
+    points, faces, collapses = fast_simplification.simplify(
+        mesh.points,
+        triangles,
+        target_count=target_count,
+        return_collapses=True,
+        method=method,
+        n_partitions=n_partitions,
+        n_threads=2,
+    )
+    assert target_count - n_partitions <= faces.shape[0] <= target_count
+    assert points.shape[0] == mesh.n_points - collapses.shape[0]
+
+    replay_points, replay_faces, _ = fast_simplification.replay_simplification(
+        mesh.points, triangles, collapses
+    )
+    assert np.allclose(points, replay_points, atol=1e-5)
+    assert np.array_equal(faces, replay_faces)
+
+
+@skip_no_vtk
+@pytest.mark.parametrize("method", ["threshold", "heap"])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_simplify_lods_match_simplify(method, dtype):
+    mesh = pv.Sphere(theta_resolution=60, phi_resolution=60)
+    points = mesh.points.astype(dtype)
+    faces = mesh.regular_faces
+    reductions = [0.9, 0.5, 0.99, 0.75]
+
+    lods, collapses = fast_simplification.simplify_lods(
+        points, faces, reductions=reductions, method=method
+    )
+    assert len(lods) == len(reductions)
+    for reduction, (points_out, faces_out, n_collapses) in zip(reductions, lods):
+        expected_points, expected_faces, expected_collapses = fast_simplification.simplify(
+            points, faces, reduction, return_collapses=True, method=method
+        )
+        assert points_out.dtype == expected_points.dtype == dtype
+        assert np.array_equal(points_out, expected_points)
+        assert np.array_equal(faces_out, expected_faces)
+        assert np.array_equal(collapses[:n_collapses], expected_collapses)
+
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        fast_simplification.simplify_lods(points, faces, reductions=[0.5, 1.5])